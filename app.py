@@ -1,10 +1,35 @@
 import streamlit as st
-import ccxt
 import pandas as pd
-import pandas_ta as ta
 import datetime
-import matplotlib.pyplot as plt
-import numpy as np 
+import os
+import time
+
+import core
+from core import RSI_PERIOD, RSIRegistry, check_trading_signal
+from core.backfill import load_history
+from core.backtest import ExecutionModel, scaled_results
+from core.cache import AnalysisCache, data_version
+from core.charts import (
+    VOLUME_COLOR, analysis_chart, base_charts, distribution_chart, equity_chart, forecast_chart, heatmap_chart,
+    walk_forward_chart,
+)
+from core.indicators import drop_incomplete
+from core.live import LiveFeed, create_stream_client, start_feed_thread
+from core.metrics import (
+    OPERATION_SECONDS, cache_summary, operation_summary, register_cache, register_pool, start_http_server, timed,
+)
+from core.optimizer import profit_heatmap, sweep
+from core.pool import get_pool
+from core.robustness import distribution_summary, monte_carlo, walk_forward
+from core.strategy import (
+    PRESET_LABELS, PRESETS, All, Any, BollingerBreak, EMACross, MACDCross, RSIAbove, RSIBelow, Strategy, VolumeAbove,
+    build_strategy,
+)
+from core.timeframes import timeframe_to_timedelta
+from core.universe import AVAILABLE_SYMBOLS, AVAILABLE_TIMEFRAMES
+
+# Debut de l'execution du script (duree de chaque relance, voir Diagnostics)
+RERUN_START = time.perf_counter()
 
 # --- 1. Custom CSS pour un Design "Fintech Moderne" ---
 CUSTOM_CSS = """
@@ -114,94 +139,133 @@ footer { visibility: hidden; }
 """
 
 # --- Configuration et Constantes ---
-AVAILABLE_SYMBOLS = [
-    'BTC/USDT', 'ETH/USDT', 'SOL/USDT', 'BNB/USDT', 
-    'XRP/USDT', 'ADA/USDT', 'DOGE/USDT', 'LINK/USDT'
-]
-EXCHANGE = ccxt.coinbase() 
-RSI_PERIOD = 14
-
-@st.cache_data(ttl=60*5)
+EXCHANGE_ID = 'coinbase' # Flux temps reel ; les bougies REST viennent du pool de places (variable EXCHANGES)
+LIVE_REFRESH_S = 2 # Rafraichissement du panneau temps reel (secondes)
+LIVE_HISTORY = 500 # Bougies cloturees gardees par flux temps reel
+# Metriques Prometheus du serveur Streamlit sur http://127.0.0.1:METRICS_PORT/metrics (0 : desactive)
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9109"))
+
+@st.cache_resource
+def get_data_pool():
+    # Pool de places partage par toutes les sessions : routage par latence, reprises et bascule
+    pool = get_pool().connect()
+    register_pool(pool)
+    return pool
+
+@st.cache_resource(ttl=60*5, show_spinner=False)
 def get_ohlcv_data(symbol, timeframe):
+    # Cache partage (pas de copie par session) : vue en lecture seule des colonnes du stockage local
     st.info(f"Connexion à l'exchange pour charger les données {symbol}...")
     try:
-        ohlcv = EXCHANGE.fetch_ohlcv(symbol, timeframe, limit=500)
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df = df.set_index('timestamp')
-        return df
+        # Seules les bougies plus recentes que le stockage local sont telechargees
+        return core.get_ohlcv_data(get_data_pool(), symbol, timeframe, limit=500)
     except Exception as e:
         st.error(f"Erreur de connexion à l'exchange ou de récupération des données : {e}")
         st.error("Impossible de charger les données. Veuillez vérifier l'exchange ou la paire sélectionnée.")
         return pd.DataFrame()
 
-def calculate_indicators(df):
+@st.cache_resource(ttl=60*5, show_spinner=False)
+def get_history_data(symbol, timeframe, since_ms):
+    # Cache partage (pas de copie par session) : le DataFrame ne doit pas etre modifie
+    progress_bar = st.progress(0.0, text=f"Téléchargement de l'historique {symbol} {timeframe}...")
+    try:
+        # Tout l'historique vient de la meme place (celle qui sert actuellement la paire)
+        df = load_history(
+            get_data_pool().route(symbol), symbol, timeframe, since_ms,
+            progress=lambda fraction: progress_bar.progress(fraction),
+        )
+        return core.calculate_indicators(df)
+    except Exception as e:
+        st.error(f"Erreur lors du téléchargement de l'historique : {e}")
+        return pd.DataFrame()
+    finally:
+        progress_bar.empty()
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def get_base_charts(_df, symbol, timeframe, history_days, version):
+    # Vues sous-echantillonnees reconstruites uniquement quand les bougies changent, bougie en cours
+    # comprise (version : voir data_version) ; un changement de seuil RSI ne redessine que les lignes de seuil
+    return base_charts(_df, timeframe)
+
+@st.cache_resource(show_spinner=False)
+def get_live_feed(symbol, timeframe):
+    # Un flux websocket par paire, partage par toutes les sessions du serveur ; les bougies cloturees
+    # sont gardees pour les strategies multi-indicateurs
+    feed = LiveFeed(symbol, timeframe, keep_candles=LIVE_HISTORY)
+    # Historique de la place du flux, et non du pool : une serie ne melange jamais les prix de deux places
+    try:
+        feed.seed(core.get_ohlcv_data(core.get_exchange(EXCHANGE_ID), symbol, timeframe, limit=500))
+    except Exception as e:
+        st.warning(f"Historique {EXCHANGE_ID} indisponible pour {symbol}, le flux démarre sans historique : {e}")
+    start_feed_thread(feed, lambda: create_stream_client(EXCHANGE_ID))
+    return feed
+
+@st.cache_resource
+def get_analysis_cache():
+    # Indicateurs et trades (capital unitaire) par version des donnees, partages par toutes les sessions
+    cache = AnalysisCache()
+    for layer in ('indicators', 'trades', 'metrics'):
+        register_cache(layer, getattr(cache, f'{layer}_cache'))
+    return cache
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_server():
+    # Un seul serveur par processus, partage par toutes les sessions
+    try:
+        return start_http_server(METRICS_PORT) if METRICS_PORT else None
+    except OSError as e:
+        st.warning(f"Export des métriques impossible sur le port {METRICS_PORT} : {e}")
+        return None
+
+@st.cache_resource
+def get_rsi_registry():
+    # Etat RSI incremental partage par toutes les sessions du serveur
+    return RSIRegistry(RSI_PERIOD, keep_history=True)
+
+@timed('indicators')
+def calculate_indicators(df, symbol, timeframe):
     if not df.empty:
-        df['RSI'] = ta.rsi(df['close'], length=RSI_PERIOD)
-        df = df.dropna()
+        # Seules les bougies cloturees depuis le dernier passage sont calculees
+        rsi_values = get_rsi_registry().series((symbol, timeframe), df.index.as_unit('ms').asi8, df['close'].to_numpy())
+        # Nouveau frame : les colonnes de bougies restent des vues partagees du cache de bougies
+        df = drop_incomplete(df.assign(RSI=rsi_values))
     return df
 
-def check_trading_signal(df, rsi_oversold, rsi_overbought):
-    if df.empty:
-        return 'ERREUR', 0.0, 0.0
-        
-    last_row = df.iloc[-1]
-    last_rsi = last_row['RSI']
-    close_price = last_row['close']
-    
-    signal = 'NEUTRE'
-
-    if last_rsi < rsi_oversold:
-        signal = 'ACHAT FORT'
-    elif last_rsi > rsi_overbought:
-        signal = 'VENTE/CLÔTURE'
-    
-    return signal, close_price, last_rsi
-
-def run_backtest(df, rsi_oversold, rsi_overbought, start_balance):
-    if df.empty:
-        return pd.DataFrame(), 0.0, 0.0, 0
-    
-    df['Signal'] = 0
-    df.loc[df['RSI'] < rsi_oversold, 'Signal'] = 1
-    df.loc[df['RSI'] > rsi_overbought, 'Signal'] = -1
-    
-    balance = start_balance 
-    position = 0.0
-    trade_count = 0
-    
-    backtest_df = pd.DataFrame(columns=['Date', 'Type', 'Prix', 'Quantité', 'Capital'])
-
-    for index, row in df.iterrows():
-        if row['Signal'] == 1 and position == 0:
-            amount_to_buy = balance * 0.98 / row['close'] 
-            balance -= amount_to_buy * row['close']
-            position += amount_to_buy
-            trade_count += 1
-            backtest_df.loc[len(backtest_df)] = [index.strftime('%Y-%m-%d %H:%M'), 'ACHAT', f"{row['close']:.2f}", amount_to_buy, f"{balance:.2f}"]
-            
-        elif row['Signal'] == -1 and position > 0:
-            balance += position * row['close']
-            position = 0.0
-            trade_count += 1
-            backtest_df.loc[len(backtest_df)] = [index.strftime('%Y-%m-%d %H:%M'), 'VENTE', f"{row['close']:.2f}", 0, f"{balance:.2f}"]
-
-    final_value = balance + (position * df['close'].iloc[-1])
-    
-    if start_balance > 0:
-        profit_percent = ((final_value - start_balance) / start_balance) * 100
-    else:
-        profit_percent = 0.0
-    
-    return backtest_df, final_value, profit_percent, trade_count
-
 # --- Interface Streamlit ---
 
 st.set_page_config(layout="wide", page_title="Mon Bot Analyste Crypto", initial_sidebar_state="expanded")
 st.markdown(CUSTOM_CSS, unsafe_allow_html=True) # Injecte le CSS personnalisé
 
-# Changement de style Matplotlib pour correspondre au thème sombre
-plt.style.use('dark_background') 
+def show_signal_metrics(symbol, timeframe, price, last_rsi, signal):
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Paire / Intervalle", f"{symbol} / {timeframe}")
+    col2.metric("Prix Actuel", f"${price:.2f}")
+    col3.metric(f"RSI ({RSI_PERIOD})", f"{last_rsi:.2f}")
+    
+    # Affichage du Signal (utilise les styles CSS personnalisés)
+    if signal == 'ACHAT FORT':
+        col4.success(f"SIGNAL : {signal}")
+    elif signal == 'VENTE/CLÔTURE':
+        col4.error(f"SIGNAL : {signal}")
+    else:
+        col4.warning(f"SIGNAL : {signal}")
+
+@st.fragment(run_every=LIVE_REFRESH_S)
+def live_signal_metrics(symbol, timeframe, oversold, overbought, strategy):
+    # Seul ce fragment est reexecute : ni relance du script, ni requete REST
+    feed = get_live_feed(symbol, timeframe)
+    snapshot = feed.snapshot(oversold, overbought)
+    signal = snapshot['signal']
+    if not strategy.uses_only_rsi(RSI_PERIOD) and snapshot['candle'] is not None:
+        # Strategie multi-indicateurs : le signal RSI du flux ne s'applique pas, la strategie est
+        # evaluee sur les bougies du flux, bougie en cours comprise (comme le signal hors temps reel)
+        signal, _, _ = strategy.last_signal(feed.live_frame())
+    show_signal_metrics(symbol, timeframe, snapshot['price'], snapshot['rsi'], signal)
+    if snapshot['updated_at'] is None:
+        st.caption("⚡ Connexion au flux temps réel...")
+    else:
+        age = datetime.datetime.now().timestamp() - snapshot['updated_at']
+        st.caption(f"⚡ Temps réel : {snapshot['trades']} trades reçus, dernier il y a {age:.0f} s")
 
 st.title("💰 Bot d'Analyse Crypto (RSI) & Backtest")
 st.caption(f"Dernière mise à jour : {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -209,7 +273,11 @@ st.caption(f"Dernière mise à jour : {datetime.datetime.now().strftime('%Y-%m-%
 # --- 1. Barre Latérale de Configuration ---
 st.sidebar.header("⚙️ Paramètres")
 selected_symbol = st.sidebar.selectbox("Paire Crypto", AVAILABLE_SYMBOLS)
-selected_timeframe = st.sidebar.selectbox("Intervalle", ['15m', '30m', '1h', '4h', '1d']) 
+selected_timeframe = st.sidebar.selectbox("Intervalle", AVAILABLE_TIMEFRAMES) 
+live_mode = st.sidebar.toggle(
+    "⚡ Mode temps réel",
+    help="Prix, RSI de la bougie en cours et signal mis à jour en continu depuis le flux websocket des trades.",
+)
 
 st.sidebar.markdown("---")
 st.sidebar.subheader("💰 Capital (Prix à mettre)")
@@ -222,44 +290,135 @@ user_capital = st.sidebar.number_input(
 )
 st.sidebar.markdown("---")
 
-st.sidebar.subheader("Stratégie RSI")
+st.sidebar.subheader("📚 Historique du Backtest")
+history_days = st.sidebar.select_slider(
+    "Profondeur",
+    options=[0, 30, 90, 180, 365, 730, 1095],
+    value=0,
+    format_func=lambda days: "500 dernières bougies" if days == 0 else f"{days} jours",
+    help="Au-delà de 500 bougies, l'historique est téléchargé page par page puis conservé localement.",
+)
+st.sidebar.markdown("---")
+
+st.sidebar.subheader("Stratégie")
 rsi_oversold = st.sidebar.slider("RSI Survente (Achat)", 10, 40, 30)
 rsi_overbought = st.sidebar.slider("RSI Surachat (Vente)", 60, 90, 70)
-st.sidebar.info(f"**Achat :** RSI < {rsi_oversold} | **Vente :** RSI > {rsi_overbought}")
+strategy_name = st.sidebar.selectbox(
+    "Règles", [*PRESETS, 'custom'],
+    format_func=lambda name: PRESET_LABELS.get(name, "Personnalisée"),
+    help="Le backtest, les indicateurs de performance et le signal utilisent ces règles.",
+)
+if strategy_name == 'custom':
+    # Conditions disponibles pour la strategie personnalisee (seuils RSI de la barre laterale)
+    entry_rules = {
+        f"RSI < {rsi_oversold}": RSIBelow(rsi_oversold),
+        "MACD croise son signal à la hausse": MACDCross('up'),
+        "Clôture < Bollinger basse": BollingerBreak('lower'),
+        "EMA 9 croise EMA 21 à la hausse": EMACross('up'),
+        "Volume > 1,5 × moyenne": VolumeAbove(1.5),
+    }
+    exit_rules = {
+        f"RSI > {rsi_overbought}": RSIAbove(rsi_overbought),
+        "MACD croise son signal à la baisse": MACDCross('down'),
+        "Clôture > Bollinger haute": BollingerBreak('upper'),
+        "EMA 9 croise EMA 21 à la baisse": EMACross('down'),
+    }
+    entry_choice = st.sidebar.multiselect("Conditions d'achat", list(entry_rules), default=list(entry_rules)[:1])
+    entry_join = st.sidebar.radio("Combinaison (achat)", ['ET', 'OU'], horizontal=True)
+    exit_choice = st.sidebar.multiselect("Conditions de vente", list(exit_rules), default=list(exit_rules)[:1])
+    exit_join = st.sidebar.radio("Combinaison (vente)", ['ET', 'OU'], horizontal=True, index=1)
+    entry_combiner = All if entry_join == 'ET' else Any
+    exit_combiner = All if exit_join == 'ET' else Any
+    strategy = Strategy(
+        entry_combiner(*[entry_rules[label] for label in entry_choice or list(entry_rules)[:1]]),
+        exit_combiner(*[exit_rules[label] for label in exit_choice or list(exit_rules)[:1]]),
+        'custom',
+    )
+else:
+    strategy = build_strategy(strategy_name, rsi_oversold, rsi_overbought)
+st.sidebar.info(strategy.describe().replace("Achat :", "**Achat :**").replace("\nVente :", "  \n**Vente :**"))
+
+with st.sidebar.expander("🏦 Exécution des Ordres"):
+    sizing = st.radio(
+        "Taille de position", ['fraction', 'notional'], horizontal=True,
+        format_func=lambda value: "% du capital" if value == 'fraction' else "Montant fixe",
+    )
+    if sizing == 'fraction':
+        buy_fraction = st.slider("Part du capital engagée (%)", 5, 100, 98) / 100
+        notional = 0.0
+    else:
+        buy_fraction = 0.0
+        notional = st.number_input("Montant par achat (USDT)", min_value=1.0, value=min(100.0, user_capital), step=10.0)
+    order_type = st.radio(
+        "Type d'ordre", ['market', 'limit'], horizontal=True,
+        format_func=lambda value: "Marché (taker)" if value == 'market' else "Limite (maker)",
+    )
+    maker_fee = st.number_input("Frais maker (%)", min_value=0.0, max_value=5.0, value=0.0, step=0.01, format="%.3f")
+    taker_fee = st.number_input("Frais taker (%)", min_value=0.0, max_value=5.0, value=0.0, step=0.01, format="%.3f")
+    slippage_bps = st.number_input(
+        "Slippage (points de base)", min_value=0.0, max_value=500.0, value=0.0, step=1.0,
+        disabled=order_type == 'limit', help="Appliqué aux ordres au marché uniquement.",
+    )
+    fill = st.radio(
+        "Prix d'exécution", ['close', 'next_open'], horizontal=True,
+        format_func=lambda value: "Clôture du signal" if value == 'close' else "Ouverture suivante",
+    )
+execution = ExecutionModel(
+    sizing=sizing, fraction=buy_fraction, notional=notional, order_type=order_type,
+    maker_fee=maker_fee / 100, taker_fee=taker_fee / 100, slippage_bps=slippage_bps, fill=fill,
+)
+
+with st.sidebar.expander("🌐 Sources de Données"):
+    venue_stats = pd.DataFrame(get_data_pool().stats())
+    st.dataframe(
+        venue_stats.rename(columns={
+            'venue': 'Place', 'healthy': 'Disponible', 'requests': 'Requêtes', 'errors': 'Erreurs',
+            'error_rate': 'Erreurs %', 'latency_ms': 'Latence (ms)', 'p50_ms': 'p50 (ms)', 'p95_ms': 'p95 (ms)',
+            'symbols': 'Paires servies', 'last_error': 'Dernière erreur',
+        }),
+        hide_index=True, use_container_width=True,
+    )
+    route = get_data_pool().routes.get(selected_symbol)
+    if route:
+        st.caption(f"{selected_symbol} est servie par **{route}**.")
 
 # --- 2. Récupération et Analyse ---
-df = get_ohlcv_data(selected_symbol, selected_timeframe)
-df = calculate_indicators(df)
+analysis_cache = get_analysis_cache()
+if history_days:
+    # Debut arrondi au jour pour que la cle de cache reste stable d'une execution a l'autre
+    history_start = pd.Timestamp.now(tz='UTC').normalize() - pd.Timedelta(days=history_days)
+    history_since = history_start.value // 10**6
+    df = get_history_data(selected_symbol, selected_timeframe, history_since)
+else:
+    df = analysis_cache.indicators(
+        selected_symbol, selected_timeframe, get_ohlcv_data(selected_symbol, selected_timeframe),
+        compute=lambda frame: calculate_indicators(frame, selected_symbol, selected_timeframe),
+    )
 
 if not df.empty:
     signal, price, last_rsi = check_trading_signal(df, rsi_oversold, rsi_overbought)
+    if strategy_name != 'rsi':
+        signal, _, _ = strategy.last_signal(df)
     
     st.header("Analyse en Temps Réel")
     
-    col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Paire / Intervalle", f"{selected_symbol} / {selected_timeframe}")
-    col2.metric("Prix Actuel", f"${price:.2f}")
-    col3.metric(f"RSI ({RSI_PERIOD})", f"{last_rsi:.2f}")
-    
-    # Affichage du Signal (utilise les styles CSS personnalisés)
-    if signal == 'ACHAT FORT':
-        col4.success(f"SIGNAL : {signal}")
-    elif signal == 'VENTE/CLÔTURE':
-        col4.error(f"SIGNAL : {signal}")
+    if live_mode:
+        live_signal_metrics(selected_symbol, selected_timeframe, rsi_oversold, rsi_overbought, strategy)
     else:
-        col4.warning(f"SIGNAL : {signal}")
+        show_signal_metrics(selected_symbol, selected_timeframe, price, last_rsi, signal)
         
     st.markdown("---")
     
     # --- 3. Backtesting et Performance ---
     st.header("Backtesting de la Stratégie")
     
-    backtest_df, final_value, profit_percent, trade_count = run_backtest(
-        df.copy(), 
-        rsi_oversold, 
-        rsi_overbought, 
-        user_capital
+    # Trades mis en cache par regles et modele d'execution ; en taille fractionnelle,
+    # un changement de capital ne fait que les remettre a l'echelle
+    trades = analysis_cache.trades(
+        selected_symbol, selected_timeframe, df, rsi_oversold, rsi_overbought,
+        model=execution, start_balance=user_capital, strategy=strategy,
     )
+    backtest_df, final_value, profit_percent, trade_count = scaled_results(df.index, trades, user_capital)
     
     start_date = df.index.min()
     end_date = df.index.max()
@@ -291,70 +450,161 @@ if not df.empty:
         help=f"Basé sur un gain total de ${total_profit:.2f} sur une période de {total_hours:.1f} heures."
     )
 
+    # Indicateurs de performance (independants du capital, mis en cache avec les trades)
+    metrics = analysis_cache.metrics(
+        selected_symbol, selected_timeframe, df, rsi_oversold, rsi_overbought,
+        model=execution, start_balance=user_capital, strategy=strategy,
+    )
+    col_f, col_g, col_h, col_i, col_j = st.columns(5)
+    col_f.metric(
+        "Achat & Conservation", f"{metrics['buy_and_hold']:.2f}%",
+        delta=f"{metrics['total_return'] - metrics['buy_and_hold']:.2f} pts",
+        help="Rendement d'un achat au début de la période conservé jusqu'à la fin ; l'écart est celui de la stratégie.",
+    )
+    col_g.metric("Drawdown Max", f"{metrics['max_drawdown']:.2f}%")
+    col_h.metric("Sharpe / Sortino", f"{metrics['sharpe']:.2f} / {metrics['sortino']:.2f}", help="Annualisés, sans taux sans risque.")
+    col_i.metric("Trades Gagnants", f"{metrics['win_rate']:.0f}%", help=f"Sur {metrics['round_trips']} allers-retours clôturés.")
+    col_j.metric(
+        "Exposition", f"{metrics['exposure']:.0f}%",
+        help=f"Part des bougies avec une position ouverte. Frais payés : {metrics['fees']:.2f}% du capital.",
+    )
+
+    st.altair_chart(
+        equity_chart(df.index, trades.equity / trades.capital, df['close'].to_numpy(), user_capital),
+        use_container_width=True,
+    )
+
     st.subheader("Historique des Transactions")
-    st.dataframe(backtest_df, use_container_width=True, hide_index=True)
+    st.dataframe(
+        backtest_df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Date': st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm"),
+            'Prix': st.column_config.NumberColumn(format="%.2f"),
+            'Frais': st.column_config.NumberColumn(format="%.4f"),
+            'Capital': st.column_config.NumberColumn(format="%.2f"),
+            'Rendement %': st.column_config.NumberColumn(format="%.2f %%"),
+        },
+    )
+
+    # Resultats des calculs a la demande, par paire, intervalle et strategie : changer de selection
+    # n'affiche jamais ceux d'une autre paire
+    run_results = st.session_state.setdefault('run_results', {}).setdefault(
+        (selected_symbol, selected_timeframe, strategy.describe()), {}
+    )
+
+    # 3.1 Optimisation des seuils et de la période RSI
+    with st.expander("🔎 Optimisation des Paramètres RSI"):
+        opt_mode = st.radio("Mode de recherche", ['Grille complète', 'Aléatoire'], horizontal=True)
+        opt_periods = st.multiselect("Périodes RSI", [7, 10, 14, 21, 28], default=[7, 10, 14, 21, 28])
+        opt_samples = None
+        if opt_mode == 'Aléatoire':
+            opt_samples = st.number_input("Nombre de combinaisons", min_value=10, value=500, step=50)
+
+        if st.button("Lancer l'optimisation") and opt_periods:
+            run_results['optimisation'] = sweep(
+                df, start_balance=user_capital, periods=opt_periods,
+                n_samples=int(opt_samples) if opt_samples else None, model=execution,
+            )
+
+        opt_results = run_results.get('optimisation')
+        if opt_results is not None and not opt_results.empty:
+            st.dataframe(opt_results.head(20), use_container_width=True, hide_index=True)
+
+            heatmap = profit_heatmap(opt_results)
+            best_period = opt_results['RSI Période'].iloc[0]
+            st.altair_chart(heatmap_chart(heatmap, f"Profit % (RSI {best_period})"), use_container_width=True)
+
+    # 3.2 Robustesse : walk-forward et Monte-Carlo (calculs repartis sur plusieurs processus)
+    with st.expander("🎲 Robustesse : Walk-Forward & Monte-Carlo"):
+        tab_wf, tab_mc = st.tabs(["Walk-Forward", "Monte-Carlo"])
+
+        with tab_wf:
+            st.caption(
+                "Les seuils sont optimisés sur une fenêtre d'entraînement puis appliqués tels quels à la fenêtre "
+                "suivante : seuls les résultats hors échantillon comptent."
+            )
+            wf_col1, wf_col2, wf_col3 = st.columns(3)
+            wf_train = wf_col1.number_input("Entraînement (bougies)", min_value=50, value=max(50, len(df) // 3), step=50)
+            wf_test = wf_col2.number_input("Test (bougies)", min_value=10, value=max(10, len(df) // 10), step=10)
+            wf_step = wf_col3.slider("Pas de la grille RSI", 1, 10, 5)
+            wf_periods = st.multiselect("Périodes RSI", [7, 10, 14, 21, 28], default=[7, 14, 21], key='wf_periods')
+
+            if st.button("Lancer le walk-forward") and wf_periods:
+                try:
+                    run_results['walk_forward'] = walk_forward(
+                        df, int(wf_train), int(wf_test), start_balance=user_capital,
+                        oversold_values=range(10, 41, wf_step), overbought_values=range(60, 91, wf_step),
+                        periods=wf_periods, model=execution,
+                    )
+                except ValueError as e:
+                    st.error(str(e))
+
+            wf_results = run_results.get('walk_forward')
+            if wf_results is not None:
+                if wf_results.empty:
+                    st.warning("Historique trop court pour ces fenêtres : augmentez la profondeur ou réduisez les fenêtres.")
+                else:
+                    compounded = ((1 + wf_results['Rendement %'] / 100).prod() - 1) * 100
+                    wf_m1, wf_m2, wf_m3 = st.columns(3)
+                    wf_m1.metric("Rendement Composé (test)", f"{compounded:.2f}%")
+                    wf_m2.metric("Fenêtres Gagnantes", f"{(wf_results['Rendement %'] > 0).mean() * 100:.0f}%",
+                                 help=f"Sur {len(wf_results)} fenêtres de test.")
+                    wf_m3.metric("Pire Drawdown (test)", f"{wf_results['Drawdown Max %'].min():.2f}%")
+                    st.altair_chart(walk_forward_chart(wf_results), use_container_width=True)
+                    st.dataframe(wf_results, use_container_width=True, hide_index=True)
+
+        with tab_mc:
+            mc_mode = st.radio(
+                "Rééchantillonnage", ['returns', 'trades'], horizontal=True,
+                format_func=lambda mode: "Blocs de rendements" if mode == 'returns' else "Ordre des trades",
+                help="Blocs de rendements : trajectoires de prix synthétiques. Ordre des trades : tirage avec remise des allers-retours réels.",
+            )
+            mc_col1, mc_col2 = st.columns(2)
+            mc_simulations = mc_col1.number_input("Simulations", min_value=100, max_value=20000, value=1000, step=100)
+            mc_block = mc_col2.number_input("Taille des blocs (bougies)", min_value=1, value=24, step=1,
+                                            disabled=mc_mode == 'trades')
+
+            if st.button("Lancer le Monte-Carlo"):
+                run_results['monte_carlo'] = monte_carlo(
+                    df, rsi_oversold, rsi_overbought, int(mc_simulations), mode=mc_mode, block_size=int(mc_block),
+                    start_balance=user_capital, model=execution,
+                )
+
+            mc_results = run_results.get('monte_carlo')
+            if mc_results is not None:
+                if mc_results.empty:
+                    st.warning("Aucun aller-retour clôturé à rééchantillonner.")
+                else:
+                    mc_m1, mc_m2 = st.columns(2)
+                    mc_m1.metric("Probabilité de Perte", f"{(mc_results['Rendement %'] < 0).mean() * 100:.1f}%")
+                    mc_m2.metric("Rendement Médian", f"{mc_results['Rendement %'].median():.2f}%")
+                    mc_chart1, mc_chart2 = st.columns(2)
+                    mc_chart1.altair_chart(distribution_chart(mc_results, 'Rendement %', "Distribution du Rendement"),
+                                           use_container_width=True)
+                    mc_chart2.altair_chart(distribution_chart(mc_results, 'Drawdown Max %', "Distribution du Drawdown",
+                                                              color=VOLUME_COLOR), use_container_width=True)
+                    st.dataframe(distribution_summary(mc_results).style.format("{:.2f}"), use_container_width=True)
 
     st.markdown("---")
 
     # --- 4. Visualisation Graphique ---
     st.header(f"Graphiques d'Analyse Technique pour {selected_symbol}")
-    
-    # 4.1 Graphique du Prix
-    fig_price, ax1 = plt.subplots(figsize=(10, 5))
-    ax1.plot(df.index, df['close'], label='Prix de Clôture', color='#4CAF50') # Vert
-    ax1.set_title(f"Prix de Clôture ({selected_timeframe})", fontsize=14, color='white')
-    ax1.set_ylabel("Prix (USDT)", color='white')
-    ax1.tick_params(axis='y', labelcolor='white')
-    ax1.tick_params(axis='x', labelcolor='white')
-    ax1.grid(True, color='#444444')
-    st.pyplot(fig_price)
-    plt.close(fig_price)
-    
-    # 4.2 Graphique du RSI
-    fig_rsi, ax2 = plt.subplots(figsize=(10, 3))
-    ax2.plot(df.index, df['RSI'], label='RSI (14)', color='cyan') # Cyan
-    ax2.axhline(rsi_overbought, color='red', linestyle='--', label=f'Surachat ({rsi_overbought})')
-    ax2.axhline(rsi_oversold, color='green', linestyle='--', label=f'Survente ({rsi_oversold})')
-    ax2.set_title("Indice de Force Relative (RSI)", fontsize=14, color='white')
-    ax2.set_ylim(0, 100)
-    ax2.legend(loc='lower left', frameon=True, facecolor='#2b2b2b', edgecolor='none', labelcolor='white')
-    ax2.tick_params(axis='y', labelcolor='white')
-    ax2.tick_params(axis='x', labelcolor='white')
-    ax2.grid(True, color='#444444')
-    st.pyplot(fig_rsi)
-    plt.close(fig_rsi)
-
-    # 4.3 Graphique du Volume
-    fig_volume, ax3 = plt.subplots(figsize=(10, 3))
-    ax3.bar(df.index, df['volume'], color='#FFA500', alpha=0.6) # Orange
-    ax3.set_title("Volume de Trading", fontsize=14, color='white')
-    ax3.set_ylabel("Volume", color='white')
-    ax3.tick_params(axis='y', labelcolor='white')
-    ax3.tick_params(axis='x', labelcolor='white')
-    ax3.grid(True, color='#444444')
-    st.pyplot(fig_volume)
-    plt.close(fig_volume)
-
-    # 4.4 Graphique de pronostic
+    charts = get_base_charts(
+        df, selected_symbol, selected_timeframe, history_days, data_version(df)
+    )
+
+    # 4.1 Prix, RSI et Volume sur un axe temporel partage (le zoom du prix deplace les deux autres)
+    st.altair_chart(analysis_chart(charts, rsi_oversold, rsi_overbought), use_container_width=True)
+
+    # 4.2 Graphique de pronostic
     st.header(f"Pronostic du Prix pour {selected_symbol}")
-    fig_forecast, ax_forecast = plt.subplots(figsize=(10, 5))
-    
-    ax_forecast.plot(df.index, df['close'], label='Prix de Clôture Historique', color='#4CAF50', alpha=0.7)
 
     last_close = df['close'].iloc[-1]
     last_timestamp = df.index[-1]
 
-    if 'm' in selected_timeframe:
-        delta_unit = int(selected_timeframe.replace('m', ''))
-        time_delta = datetime.timedelta(minutes=delta_unit)
-    elif 'h' in selected_timeframe:
-        delta_unit = int(selected_timeframe.replace('h', ''))
-        time_delta = datetime.timedelta(hours=delta_unit)
-    elif 'd' in selected_timeframe:
-        delta_unit = int(selected_timeframe.replace('d', ''))
-        time_delta = datetime.timedelta(days=delta_unit)
-    else:
-        time_delta = datetime.timedelta(hours=1) 
+    time_delta = timeframe_to_timedelta(selected_timeframe)
     
     future_timestamps = [last_timestamp + (time_delta * (i + 1)) for i in range(10)]
     forecast_prices = [last_close]
@@ -375,28 +625,40 @@ if not df.empty:
         forecast_label = 'Pronostic : Neutre'
 
     plot_timestamps = [last_timestamp] + future_timestamps
-    
-    ax_forecast.plot(plot_timestamps, forecast_prices, 
-                     label=forecast_label, 
-                     color=forecast_color, 
-                     linestyle='--', 
-                     marker='o', 
-                     markersize=4) 
-    
-    ax_forecast.plot(last_timestamp, last_close, 'o', color='white', markersize=6, label='Point de départ du pronostic')
-
-    ax_forecast.set_title("Pronostic du Prix basés sur le RSI", fontsize=14, color='white')
-    ax_forecast.set_ylabel("Prix (USDT)", color='white')
-    ax_forecast.tick_params(axis='y', labelcolor='white')
-    ax_forecast.tick_params(axis='x', labelcolor='white')
-    ax_forecast.grid(True, color='#444444')
-    ax_forecast.legend(loc='upper left', frameon=True, facecolor='#2b2b2b', edgecolor='none', labelcolor='white')
-    st.pyplot(fig_forecast)
-    plt.close(fig_forecast)
+    forecast = pd.DataFrame({'timestamp': plot_timestamps, 'close': forecast_prices})
+    st.altair_chart(forecast_chart(charts, forecast, forecast_color, forecast_label), use_container_width=True)
 
 else:
     st.error("Impossible de charger les données. Veuillez vérifier votre connexion ou les paramètres.")
 
+# --- 5. Diagnostics ---
+OPERATION_SECONDS.observe(time.perf_counter() - RERUN_START, 'streamlit_rerun')
+metrics_server = start_metrics_server()
+with st.expander("🩺 Diagnostics"):
+    st.subheader("Durées des opérations")
+    st.dataframe(
+        pd.DataFrame(operation_summary()).rename(columns={
+            'operation': 'Opération', 'calls': 'Appels', 'errors': 'Erreurs',
+            'mean_ms': 'Moyenne (ms)', 'p50_ms': 'p50 (ms)', 'p95_ms': 'p95 (ms)',
+        }),
+        hide_index=True, use_container_width=True,
+    )
+    st.subheader("Caches d'analyse")
+    caches = {layer: getattr(analysis_cache, f'{layer}_cache') for layer in ('indicators', 'trades', 'metrics')}
+    st.dataframe(
+        pd.DataFrame(cache_summary(caches)).drop(columns='coalesced').rename(columns={
+            'cache': 'Cache', 'hits': 'Succès', 'misses': 'Échecs', 'hit_rate': 'Taux de succès (%)',
+        }),
+        hide_index=True, use_container_width=True,
+    )
+    if metrics_server is not None:
+        st.caption(f"Export Prometheus : http://127.0.0.1:{metrics_server.server_port}/metrics")
+
 if st.button('🔄 Rafraîchir les Données'):
-    st.cache_data.clear()
+    # Seul le symbole affiche est invalide : les autres paires restent en cache
+    for timeframe in AVAILABLE_TIMEFRAMES:
+        get_ohlcv_data.clear(selected_symbol, timeframe)
+    if history_days:
+        get_history_data.clear(selected_symbol, selected_timeframe, history_since)
+    analysis_cache.invalidate(selected_symbol)
     st.rerun()
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""Simulates a burst of /analyse requests: blocking handler vs executor + coalescing cache.
+
+Usage : python benchmarks/bench_analyse.py [--requests 200] [--pairs 5] [--latency 0.3]
+
+The exchange is simulated by a sleep of --latency seconds per fetch. For
+each mode the script prints the burst duration, the number of fetches and
+the worst event-loop lag measured by a 10 ms ticker (how long the bot could
+not answer anything else).
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.concurrency import CoalescingCache  # noqa: E402
+
+TICK_S = 0.01
+
+
+async def measure(handler, requests):
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_S)
+            lag = max(lag, time.perf_counter() - start - TICK_S)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(pair) for pair in requests))
+    elapsed = time.perf_counter() - start
+    done = True
+    await tick
+    return elapsed, lag
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--pairs', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.3)
+    args = parser.parse_args()
+
+    requests = [(f"PAIR{i % args.pairs}/USDT", '4h') for i in range(args.requests)]
+    fetches = []
+
+    def analyse(symbol, timeframe):
+        fetches.append(symbol)
+        time.sleep(args.latency)
+        return symbol, timeframe
+
+    async def blocking(pair):
+        analyse(*pair)
+
+    cache = CoalescingCache(10, executor=ThreadPoolExecutor(max_workers=4))
+
+    async def coalesced(pair):
+        await cache.get(pair, analyse, *pair)
+
+    print(f"{args.requests} requetes sur {args.pairs} paires, {args.latency * 1000:.0f} ms par requete exchange")
+    # Le mode bloquant est mesure sur un echantillon (sinon requests x latency secondes)
+    sample = requests[:min(len(requests), 20)]
+    for label, handler, burst in (('bloquant', blocking, sample), ('coalescent', coalesced, requests)):
+        fetches.clear()
+        elapsed, lag = asyncio.run(measure(handler, burst))
+        print(f"{label:>10} : {len(burst):>4} requetes en {elapsed:6.2f} s, {len(fetches):>4} appels exchange, "
+              f"boucle bloquee jusqu'a {lag * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
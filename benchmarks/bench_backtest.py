@@ -0,0 +1,111 @@
+"""Compares the vectorized backtest with the original iterrows loop.
+
+Usage : python benchmarks/bench_backtest.py [--sizes 10000 100000 1000000]
+
+Both engines run on the same synthetic candles; the script checks that the
+trade logs match trade for trade (to float rounding: the new engine works
+with a unit capital, then rescales) and prints the timings.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.backtest import run_backtest  # noqa: E402
+from core.indicators import calculate_indicators  # noqa: E402
+
+RSI_PERIOD = 14
+RSI_OVERSOLD = 30
+RSI_OVERBOUGHT = 70
+START_BALANCE = 1000.0
+
+
+def legacy_run_backtest(df, rsi_oversold, rsi_overbought, start_balance):
+    """Copy of the original app.run_backtest, kept as the reference."""
+    if df.empty:
+        return pd.DataFrame(), 0.0, 0.0, 0
+
+    df['Signal'] = 0
+    df.loc[df['RSI'] < rsi_oversold, 'Signal'] = 1
+    df.loc[df['RSI'] > rsi_overbought, 'Signal'] = -1
+
+    balance = start_balance
+    position = 0.0
+    trade_count = 0
+
+    backtest_df = pd.DataFrame(columns=['Date', 'Type', 'Prix', 'Quantité', 'Capital'])
+
+    for index, row in df.iterrows():
+        if row['Signal'] == 1 and position == 0:
+            amount_to_buy = balance * 0.98 / row['close']
+            balance -= amount_to_buy * row['close']
+            position += amount_to_buy
+            trade_count += 1
+            backtest_df.loc[len(backtest_df)] = [index.strftime('%Y-%m-%d %H:%M'), 'ACHAT', f"{row['close']:.2f}", amount_to_buy, f"{balance:.2f}"]
+
+        elif row['Signal'] == -1 and position > 0:
+            balance += position * row['close']
+            position = 0.0
+            trade_count += 1
+            backtest_df.loc[len(backtest_df)] = [index.strftime('%Y-%m-%d %H:%M'), 'VENTE', f"{row['close']:.2f}", 0, f"{balance:.2f}"]
+
+    final_value = balance + (position * df['close'].iloc[-1])
+
+    if start_balance > 0:
+        profit_percent = ((final_value - start_balance) / start_balance) * 100
+    else:
+        profit_percent = 0.0
+
+    return backtest_df, final_value, profit_percent, trade_count
+
+
+def synthetic_candles(n_candles, seed=42):
+    """Random-walk closes on a 15m grid with a Wilder RSI column."""
+    rng = np.random.default_rng(seed)
+    close = 30000.0 * np.exp(np.cumsum(rng.normal(0.0, 0.004, n_candles)))
+    index = pd.date_range('2020-01-01', periods=n_candles, freq='15min', name='timestamp')
+    df = pd.DataFrame({'close': close}, index=index)
+    return calculate_indicators(df, RSI_PERIOD)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'candles':>10} {'trades':>8} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}  match")
+    for n_candles in args.sizes:
+        df = synthetic_candles(n_candles)
+        params = (RSI_OVERSOLD, RSI_OVERBOUGHT, START_BALANCE)
+
+        (old_log, old_final, old_profit, old_count), old_time = timed(legacy_run_backtest, df.copy(), *params)
+        (new_log, new_final, new_profit, new_count), new_time = timed(run_backtest, df, *params)
+
+        match = (
+            old_count == new_count
+            and np.isclose(old_final, new_final, rtol=1e-12)
+            and np.isclose(old_profit, new_profit, rtol=1e-9, atol=1e-9)
+            and old_log['Date'].tolist() == new_log['Date'].dt.strftime('%Y-%m-%d %H:%M').tolist()
+            and old_log['Type'].tolist() == new_log['Type'].astype(str).tolist()
+            and old_log['Prix'].tolist() == [f"{price:.2f}" for price in new_log['Prix']]
+            and np.allclose(old_log['Quantité'].astype(float), new_log['Quantité'], rtol=1e-12)
+            and np.allclose(old_log['Capital'].astype(float), new_log['Capital'], rtol=1e-9, atol=0.006)
+        )
+        print(f"{len(df):>10} {new_count:>8} {old_time:>12.3f} {new_time:>15.4f} {old_time / new_time:>8.0f}x  {'OK' if match else 'DIFF'}")
+        if not match:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Memory of the candle frames held by dashboard sessions and pool workers: private copies vs shared views.
+
+Usage : python benchmarks/bench_memory.py [--sessions 20] [--pairs 8] [--candles 35000] [--workers 2]
+
+Each mode runs in a fresh process. 'copies' reproduces the former flow:
+every session gets its own copy of each pair's frame (st.cache_data
+unpickles one per call) and the indicators are computed on another copy.
+'views' is the current one: every session reads the same read-only views of
+the store's column maps. The script prints the frame bytes per candle and
+the growth of the resident memory (anonymous and file-backed pages), then
+the same for worker processes receiving either a pickled frame or the
+(path, rows, generation, version) spec of the series.
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import synthetic_ohlcv, to_ohlcv_rows  # noqa: E402
+from core.indicators import calculate_indicators  # noqa: E402
+from core.store import CandleStore  # noqa: E402
+
+
+def memory_kb():
+    """{VmRSS, RssAnon, RssFile} of this process, in kB (Linux)."""
+    values = {}
+    with open('/proc/self/status') as handle:
+        for line in handle:
+            name, _, value = line.partition(':')
+            if name in ('VmRSS', 'RssAnon', 'RssFile'):
+                values[name] = int(value.split()[0])
+    return values
+
+
+def pair_symbols(pairs):
+    return [f"PAIR{i}/USDT" for i in range(pairs)]
+
+
+def fill_store(root, pairs, candles):
+    store = CandleStore(root)
+    for i, symbol in enumerate(pair_symbols(pairs)):
+        store.append('bench', symbol, '15m', to_ohlcv_rows(synthetic_ohlcv(candles, seed=i)))
+
+
+def run_sessions(root, mode, sessions, pairs):
+    store = CandleStore(root)
+    symbols = pair_symbols(pairs)
+    before = memory_kb()
+    held, indicators = [], {}
+    for _ in range(sessions):
+        for symbol in symbols:
+            if mode == 'copies':
+                df = pickle.loads(pickle.dumps(store.frame('bench', symbol, '15m', copy=True)))
+                if symbol not in indicators:
+                    indicators[symbol] = calculate_indicators(df.copy())
+            else:
+                df = store.frame('bench', symbol, '15m')
+                if symbol not in indicators:
+                    indicators[symbol] = calculate_indicators(df)
+            # La session lit toutes les colonnes (graphiques, backtest) : les pages sont chargees
+            float(df['close'].sum() + df['volume'].sum() + df.index.as_unit('ms').asi8[-1])
+            held.append(df)
+    after = memory_kb()
+    df = held[0]
+    private = df.memory_usage(deep=True, index=True).sum() if mode == 'copies' else 0
+    shared = 0 if mode == 'copies' else sum(values.nbytes for values in store.load('bench', symbols[0], '15m').values())
+    return {
+        'private_per_candle': float(private / len(df)), 'shared_per_candle': float(shared / len(df)),
+        **{name: after[name] - before[name] for name in after},
+    }
+
+
+def worker_task(payload):
+    before = memory_kb()
+    if isinstance(payload, bytes):
+        columns = pickle.loads(payload)
+        close = columns['close'].to_numpy()
+    else:
+        close = CandleStore.attach(payload)['close']
+    total = float(np.sum(close))
+    after = memory_kb()
+    return total, {name: after[name] - before[name] for name in after}
+
+
+def run_workers(root, mode, workers, pairs):
+    store = CandleStore(root)
+    symbols = pair_symbols(pairs)
+    if mode == 'copies':
+        payloads = [pickle.dumps(store.frame('bench', symbol, '15m', copy=True)) for symbol in symbols]
+    else:
+        payloads = [store.spec('bench', symbol, '15m') for symbol in symbols]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(worker_task, payloads))
+    growth = {name: sum(result[1][name] for result in results) for name in results[0][1]}
+    return {'payload_bytes': sum(len(pickle.dumps(payload)) for payload in payloads), **growth}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--pairs', type=int, default=8)
+    parser.add_argument('--candles', type=int, default=35_000)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # Processus enfant : une seule mesure, resultat sur la sortie standard
+        kind, mode = args.child[0].split(':')[0], args.child[1]
+        root = args.child[0].split(':', 1)[1]
+        if kind == 'sessions':
+            print(json.dumps(run_sessions(root, mode, args.sessions, args.pairs)))
+        else:
+            print(json.dumps(run_workers(root, mode, args.workers, args.pairs)))
+        return
+
+    with tempfile.TemporaryDirectory() as root:
+        fill_store(root, args.pairs, args.candles)
+        candles = args.sessions * args.pairs * args.candles
+        print(f"{args.sessions} sessions x {args.pairs} paires x {args.candles} bougies "
+              f"({candles / 1e6:.1f} M bougies lues)")
+        for kind in ('sessions', 'workers'):
+            for mode in ('copies', 'views'):
+                output = subprocess.run(
+                    [sys.executable, __file__, '--sessions', str(args.sessions), '--pairs', str(args.pairs),
+                     '--workers', str(args.workers), '--child', f"{kind}:{root}", mode],
+                    capture_output=True, text=True, check=True,
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                rss = (f"RSS +{result['VmRSS'] / 1024:7.1f} Mo (anonyme +{result['RssAnon'] / 1024:7.1f} Mo, "
+                       f"fichiers +{result['RssFile'] / 1024:6.1f} Mo)")
+                if kind == 'sessions':
+                    print(f"sessions {mode:>6} : {result['private_per_candle']:5.1f} octets/bougie prives par session, "
+                          f"{result['shared_per_candle']:4.1f} partages | {rss}")
+                else:
+                    print(f"workers  {mode:>6} : {result['payload_bytes']:>10,} octets envoyes | {rss} (somme des workers)")
+
+
+if __name__ == '__main__':
+    main()
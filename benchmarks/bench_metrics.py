@@ -0,0 +1,72 @@
+"""Measures the overhead of the instrumentation and scrapes the Prometheus endpoint.
+
+Usage : python benchmarks/bench_metrics.py [--calls 200000] [--candles 500] [--runs 200]
+
+Prints the cost of a timed call against a bare call, then the cost of the
+instrumentation relative to one pass of the analysis pipeline (fetch from
+a replay exchange, indicators, signal, backtest), and finally the
+operations exported on the local HTTP endpoint.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import synthetic_ohlcv, to_ohlcv_rows  # noqa: E402
+from core import calculate_indicators, check_trading_signal, get_ohlcv_data, run_backtest  # noqa: E402
+from core.metrics import operation_summary, start_http_server, timed  # noqa: E402
+from core.replay import ReplayExchange  # noqa: E402
+from core.store import CandleStore  # noqa: E402
+
+
+def per_call(func, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200_000)
+    parser.add_argument('--candles', type=int, default=500)
+    parser.add_argument('--runs', type=int, default=200)
+    args = parser.parse_args()
+
+    def noop():
+        return None
+
+    bare = per_call(noop, args.calls)
+    instrumented = per_call(timed('bench_noop')(noop), args.calls)
+    overhead = instrumented - bare
+    print(f"appel nu {bare * 1e9:.0f} ns, appel chronometre {instrumented * 1e9:.0f} ns : surcout {overhead * 1e9:.0f} ns")
+
+    exchange = ReplayExchange({('BTC/USDT', '15m'): to_ohlcv_rows(synthetic_ohlcv(args.candles))})
+    with tempfile.TemporaryDirectory() as root:
+        store = CandleStore(root)
+
+        def pipeline():
+            df = calculate_indicators(get_ohlcv_data(exchange, 'BTC/USDT', '15m', limit=args.candles, store=store))
+            check_trading_signal(df)
+            run_backtest(df, 30, 70, 1000.0)
+
+        elapsed = per_call(pipeline, args.runs)
+    # fetch, indicateurs, signal, run_backtest et le backtest qu'il appelle : 5 mesures par passage
+    print(f"pipeline {elapsed * 1000:.2f} ms par passage, instrumentation {5 * overhead / elapsed * 100:.4f} %")
+
+    server = start_http_server(0)
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+        body = response.read().decode()
+    server.shutdown()
+    print(f"/metrics : {len(body.splitlines())} lignes, {len(body)} octets")
+    for row in operation_summary():
+        print(f"{row['operation']:>14} : {row['calls']:>7} appels, moyenne {row['mean_ms']:8.3f} ms, "
+              f"p50 {row['p50_ms']:8.3f} ms, p95 {row['p95_ms']:8.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
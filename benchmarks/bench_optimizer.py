@@ -0,0 +1,36 @@
+"""Times a full RSI parameter sweep (31 x 31 thresholds x 5 periods).
+
+Usage : python benchmarks/bench_optimizer.py [--candles 500 10000] [--workers N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_backtest import synthetic_candles  # noqa: E402
+from core.optimizer import parameter_grid, sweep  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--candles', type=int, nargs='+', default=[500, 10_000])
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    n_combos = len(parameter_grid())
+    print(f"{n_combos} combinaisons par sweep")
+    for n_candles in args.candles:
+        df = synthetic_candles(n_candles)
+        start = time.perf_counter()
+        results = sweep(df, max_workers=args.workers)
+        elapsed = time.perf_counter() - start
+        best = results.iloc[0]
+        print(f"{n_candles:>8} bougies : {elapsed:6.2f} s "
+              f"({n_combos / elapsed:,.0f} backtests/s) - meilleur : RSI {int(best['RSI Période'])} "
+              f"{int(best['Survente'])}/{int(best['Surachat'])} -> {best['Profit %']:.2f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Stage-by-stage benchmark of the data -> indicators -> signal -> backtest -> charts pipeline.
+
+Usage : python benchmarks/bench_pipeline.py [--sizes 500 10000 1000000] [--fixture btc_15m.csv]
+                                            [--output results.json] [--compare previous.json]
+
+Runs fully offline on synthetic candles (and on recorded CSV fixtures, see
+record_fixture.py). Each stage is timed separately (best and median of
+--repeat runs), then run once more under tracemalloc for its memory peak.
+Results are saved as JSON under benchmarks/results/ so that runs from
+different commits can be compared with --compare.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import load_csv, synthetic_ohlcv  # noqa: E402
+from core.backtest import run_backtest  # noqa: E402
+from core.charts import analysis_chart, base_charts  # noqa: E402
+from core.indicators import calculate_indicators  # noqa: E402
+from core.signals import check_trading_signal  # noqa: E402
+from core.store import COLUMNS, CandleStore  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+
+def render_charts(df):
+    """Builds the dashboard's charts and serializes them to Vega-Lite JSON, as st.altair_chart does.
+
+    Includes the downsampling; the browser-side drawing is not measured.
+    """
+    base = base_charts(df, '15m')
+    json.dumps(analysis_chart(base, 30, 70).to_dict())
+
+
+def build_stages(df, store_root):
+    """Returns the (name, callable) stages; each callable gets the previous stage's output."""
+    store = CandleStore(store_root)
+    store.append('bench', 'BENCH/USDT', '15m', np.column_stack(
+        [df.index.as_unit('ms').asi8.astype(np.float64)] + [df[name].to_numpy() for name in COLUMNS[1:]]
+    ))
+
+    stages = [
+        ('data', lambda _: store.frame('bench', 'BENCH/USDT', '15m')),
+        ('indicators', calculate_indicators),
+        ('signal', lambda frame: (check_trading_signal(frame, 30, 70), frame)[1]),
+        ('backtest', lambda frame: (run_backtest(frame, 30, 70, 1000.0), frame)[1]),
+    ]
+    try:
+        import altair  # noqa: F401
+        stages.append(('charts', lambda frame: (render_charts(frame), frame)[1]))
+    except ImportError:
+        pass
+    return stages
+
+
+def run_fixture(name, df, repeat):
+    rows = []
+    with tempfile.TemporaryDirectory() as store_root:
+        value = None
+        for stage, func in build_stages(df, store_root):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                output = func(value)
+                timings.append(time.perf_counter() - start)
+
+            tracemalloc.start()
+            func(value)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            value = output
+            rows.append({
+                'fixture': name, 'candles': len(df), 'stage': stage,
+                'best_s': min(timings), 'median_s': statistics.median(timings), 'peak_mb': peak / 2**20,
+            })
+            print(f"{name:<24} {len(df):>9} {stage:<11} {min(timings) * 1000:10.2f} ms "
+                  f"{statistics.median(timings) * 1000:10.2f} ms {peak / 2**20:9.1f} Mo")
+    return rows
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'inconnu'
+
+
+def compare(rows, previous_path):
+    with open(previous_path) as handle:
+        previous = {(r['fixture'], r['candles'], r['stage']): r for r in json.load(handle)['results']}
+    print(f"\nComparaison avec {previous_path} (temps actuel / precedent) :")
+    for row in rows:
+        old = previous.get((row['fixture'], row['candles'], row['stage']))
+        if old:
+            ratio = row['best_s'] / old['best_s'] if old['best_s'] else float('nan')
+            flag = '  <-- regression' if ratio > 1.2 else ''
+            print(f"  {row['fixture']:<24} {row['candles']:>9} {row['stage']:<11} x{ratio:5.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 10_000, 1_000_000])
+    parser.add_argument('--fixture', nargs='*', default=[], help="fixtures CSV enregistrees")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="fichier JSON (par defaut benchmarks/results/pipeline-<commit>.json)")
+    parser.add_argument('--compare', help="resultats JSON precedents a comparer")
+    args = parser.parse_args()
+
+    fixtures = [("synthetique", synthetic_ohlcv(size)) for size in args.sizes]
+    fixtures += [(os.path.basename(path), load_csv(path)) for path in args.fixture]
+
+    print(f"{'fixture':<24} {'bougies':>9} {'etape':<11} {'meilleur':>13} {'median':>13} {'pic memoire':>12}")
+    rows = []
+    for name, df in fixtures:
+        rows += run_fixture(name, df, args.repeat)
+
+    commit = git_commit()
+    report = {
+        'meta': {
+            'commit': commit,
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+        },
+        'results': rows,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\nResultats enregistres dans {output}")
+
+    if args.compare:
+        compare(rows, args.compare)
+
+
+if __name__ == '__main__':
+    main()
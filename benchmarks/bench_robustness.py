@@ -0,0 +1,60 @@
+"""Times the walk-forward and Monte-Carlo runs and the data shipped to the workers.
+
+Usage : python benchmarks/bench_robustness.py [--candles 10000] [--simulations 2000] [--workers 1 4]
+
+For each worker count, prints the backtests per second of both modes and
+checks that the results do not depend on the number of workers. The
+pickled size of a task (window or seed) is compared with the pickled
+candles each task would otherwise carry.
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_backtest import synthetic_candles  # noqa: E402
+from core.robustness import BOOTSTRAP_MODES, monte_carlo, walk_forward, walk_forward_windows  # noqa: E402
+
+GRID = {'oversold_values': range(10, 41, 5), 'overbought_values': range(60, 91, 5), 'periods': (7, 14, 21)}
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--candles', type=int, default=10_000)
+    parser.add_argument('--simulations', type=int, default=2000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    df = synthetic_candles(args.candles)
+    df['open'] = df['close'].shift(fill_value=df['close'].iloc[0])
+    train, test = args.candles // 5, args.candles // 20
+    n_windows = len(walk_forward_windows(len(df), train, test))
+    n_combos = len(GRID['periods']) * len(GRID['oversold_values']) * len(GRID['overbought_values'])
+
+    print(f"{len(df)} bougies, {n_windows} fenetres x {n_combos} combinaisons, {args.simulations} simulations")
+    print(f"tache : {len(pickle.dumps((0, 50, 12345)))} octets (bougies picklees : {len(pickle.dumps(df[['close', 'open']])):,} octets)")
+    reference = {}
+    for workers in args.workers:
+        results, elapsed = timed(walk_forward, df, train, test, max_workers=workers, **GRID)
+        line = [f"{workers:>2} workers : walk-forward {elapsed:6.2f} s ({n_windows * n_combos / elapsed:,.0f} backtests/s)"]
+        runs = {'walk_forward': results}
+        for mode in BOOTSTRAP_MODES:
+            results, elapsed = timed(monte_carlo, df, 30, 70, args.simulations, mode=mode, seed=1, max_workers=workers)
+            line.append(f"{mode} {elapsed:6.2f} s ({args.simulations / elapsed:,.0f} simulations/s)")
+            runs[mode] = results
+        match = all(reference.get(name, results).equals(results) for name, results in runs.items())
+        reference = reference or runs
+        print(" | ".join(line) + f"  {'OK' if match else 'DIFF'}")
+
+
+if __name__ == '__main__':
+    main()
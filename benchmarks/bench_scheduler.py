@@ -0,0 +1,61 @@
+"""Simulated day: fixed 300 s polling vs candle-close aligned wake-ups.
+
+Usage : python benchmarks/bench_scheduler.py [--timeframes 15m 1h] [--symbols 4]
+
+Counts the fetches each approach issues and the delay between a candle
+close and the check that sees it, on a simulated clock (no network).
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.scheduler import CandleCloseScheduler, next_close  # noqa: E402
+from core.timeframes import timeframe_to_ms  # noqa: E402
+
+DAY_MS = 24 * 60 * 60 * 1000
+POLL_INTERVAL_MS = 300 * 1000
+
+
+def polling(watch, end_ms):
+    """Fixed-interval polling, averaged over the possible start phases of the bot."""
+    phases = range(0, POLL_INTERVAL_MS, 10 * 1000)
+    fetches, delays = 0, []
+    for phase in phases:
+        fetches += len(range(phase, end_ms + 1, POLL_INTERVAL_MS)) * len(watch)
+        for _, timeframe in watch:
+            step = timeframe_to_ms(timeframe)
+            for close in range(step, end_ms - POLL_INTERVAL_MS, step):
+                # Une cloture est vue par le premier tick qui la suit
+                ticks_before = -(-(close - phase) // POLL_INTERVAL_MS)
+                delays.append(phase + ticks_before * POLL_INTERVAL_MS - close)
+    return fetches // len(phases), delays
+
+
+def aligned(watch, end_ms):
+    scheduler = CandleCloseScheduler(watch)
+    fetches, delays = 0, []
+    for wake_ms, batch in scheduler.iter_wakeups(1, end_ms):
+        fetches += len(batch)
+        for _, timeframe in batch:
+            step = timeframe_to_ms(timeframe)
+            delays.append(wake_ms - (next_close(wake_ms, step) - step))
+    return fetches, delays
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--timeframes', nargs='+', default=['15m'])
+    parser.add_argument('--symbols', type=int, default=4)
+    args = parser.parse_args()
+
+    watch = [(f"SYM{i}/USDT", timeframe) for timeframe in args.timeframes for i in range(args.symbols)]
+    for name, simulate in (('polling 300 s', polling), ('cloture de bougie', aligned)):
+        fetches, delays = simulate(watch, DAY_MS)
+        print(f"{name:<18} {fetches:6d} fetches/jour  "
+              f"retard moyen {sum(delays) / len(delays) / 1000:6.1f} s  max {max(delays) / 1000:6.1f} s")
+
+
+if __name__ == '__main__':
+    main()
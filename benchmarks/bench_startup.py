@@ -0,0 +1,77 @@
+"""Cold-start import report, based on `python -X importtime`.
+
+Usage : python benchmarks/bench_startup.py [--top 15] [--json startup.json]
+
+Each target is imported in a fresh interpreter. The report gives its
+cumulative import time and the slowest modules it pulls in, so the cost of
+the eager imports of each entry point can be tracked across restarts. The
+heavy modules that are now deferred (ccxt, altair) are measured on
+their own to show what the lazy mode saves.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    'core': 'import core',
+    'app (imports au demarrage)': 'import streamlit, pandas, core, core.optimizer, core.timeframes',
+    'bot (imports au demarrage)': 'import telegram.ext, pandas, core, core.concurrency',
+    'ccxt (differe)': 'import ccxt',
+    'altair (differe)': 'import altair',
+}
+
+
+def import_profile(statement):
+    """Runs the statement under -X importtime; returns [(module, self_us, cumulative_us, depth)]."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        return None
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        # L'indentation du nom donne la profondeur (1 espace = import direct)
+        depth = len(module) - len(module.lstrip())
+        rows.append((module.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--json', help="fichier de sortie JSON")
+    args = parser.parse_args()
+
+    report = {}
+    for name, statement in TARGETS.items():
+        rows = import_profile(statement)
+        if rows is None:
+            print(f"{name:<32} non installe")
+            report[name] = None
+            continue
+        total_ms = sum(cumulative for _, _, cumulative, depth in rows if depth == 1) / 1000
+        slowest = sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]
+        report[name] = {
+            'total_ms': total_ms,
+            'modules': len(rows),
+            'slowest': [{'module': module, 'self_ms': self_us / 1000} for module, self_us, _, _ in slowest],
+        }
+        print(f"{name:<32} {total_ms:8.1f} ms  ({len(rows)} modules)")
+        for module, self_us, _, _ in slowest:
+            print(f"    {self_us / 1000:8.1f} ms  {module}")
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
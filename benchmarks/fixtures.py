@@ -0,0 +1,43 @@
+"""OHLCV fixtures for the benchmarks: synthetic series and recorded CSV files."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.store import COLUMNS, candles_to_frame  # noqa: E402
+from core.timeframes import timeframe_to_ms  # noqa: E402
+
+START_MS = 1577836800000  # 2020-01-01 00:00 UTC
+
+
+def synthetic_ohlcv(n_candles, timeframe='15m', seed=42, start_price=30000.0):
+    """Geometric random walk with consistent open/high/low/close/volume."""
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0.0, 0.004, n_candles)))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0.0, 0.002, n_candles)) * close
+    columns = {
+        'timestamp': START_MS + np.arange(n_candles, dtype=np.int64) * timeframe_to_ms(timeframe),
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.lognormal(3.0, 1.0, n_candles),
+    }
+    return candles_to_frame(columns)
+
+
+def load_csv(path):
+    """Loads a recorded fixture (header timestamp,open,high,low,close,volume; timestamp in ms)."""
+    raw = pd.read_csv(path)
+    return candles_to_frame({name: raw[name].to_numpy() for name in COLUMNS})
+
+
+def to_ohlcv_rows(df):
+    """DataFrame -> [[timestamp_ms, o, h, l, c, v], ...] as returned by fetch_ohlcv."""
+    timestamps = df.index.as_unit('ms').asi8
+    values = df[list(COLUMNS[1:])].to_numpy()
+    return [[int(ts), *row] for ts, row in zip(timestamps.tolist(), values.tolist())]
@@ -0,0 +1,42 @@
+"""Records real candles into a CSV fixture for the offline benchmarks.
+
+Usage : python benchmarks/record_fixture.py BTC/USDT 15m benchmarks/fixtures/btc_15m.csv [--exchange coinbase]
+                                           [--limit 500 | --days 365]
+
+This is the only benchmark script that needs network access.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.backfill import load_history  # noqa: E402
+from core.data import get_ohlcv_data  # noqa: E402
+from core.exchange import get_exchange  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('symbol')
+    parser.add_argument('timeframe')
+    parser.add_argument('output')
+    parser.add_argument('--exchange', default='coinbase')
+    parser.add_argument('--limit', type=int, default=500)
+    parser.add_argument('--days', type=int, help="historique complet sur ce nombre de jours (backfill)")
+    args = parser.parse_args()
+
+    exchange = get_exchange(args.exchange)
+    if args.days:
+        since_ms = exchange.milliseconds() - args.days * 24 * 60 * 60 * 1000
+        df = load_history(exchange, args.symbol, args.timeframe, since_ms)
+    else:
+        df = get_ohlcv_data(exchange, args.symbol, args.timeframe, limit=args.limit)
+    df.index = df.index.as_unit('ms').asi8
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    df.to_csv(args.output, index_label='timestamp')
+    print(f"{len(df)} bougies enregistrees dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Records the live trade stream of a pair into a CSV file, replayable with ReplayStream.
+
+Usage : python benchmarks/record_trades.py BTC/USDT benchmarks/fixtures/btc_trades.csv [--seconds 600] [--exchange coinbase]
+
+Needs network access and ccxt.pro (included in ccxt). The CSV can then be
+replayed offline:
+    ReplayStream.from_csv({'BTC/USDT': 'benchmarks/fixtures/btc_trades.csv'}, speed=60)
+"""
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.live import create_stream_client  # noqa: E402
+
+
+async def record(exchange_id, symbol, output, seconds):
+    client = create_stream_client(exchange_id)
+    count = 0
+    try:
+        with open(output, 'w', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(['timestamp', 'price', 'amount'])
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                for trade in await client.watch_trades(symbol):
+                    writer.writerow([trade['timestamp'], trade['price'], trade['amount']])
+                    count += 1
+    finally:
+        await client.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('symbol')
+    parser.add_argument('output')
+    parser.add_argument('--seconds', type=int, default=600)
+    parser.add_argument('--exchange', default='coinbase')
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    count = asyncio.run(record(args.exchange, args.symbol, args.output, args.seconds))
+    print(f"{count} trades enregistres dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""Paper trading of the alert signals, replayed offline on recorded candles.
+
+Usage : python botrade.py [--csv BTC/USDT:15m=btc_15m.csv ...] [--candles 20000] [--strategy rsi]
+                          [--capital 1000] [--fee 0.001] [--slippage-bps 0] [--fill close] [--state paper_state.json]
+
+Without --csv, a synthetic random walk of --candles candles is replayed per
+pair of --pairs. Candles and signals go through the PaperEngine queue like
+in the bot (see core.paper); the script prints the events per second, the
+open positions and the PnL. The parity of the engine with the vectorized
+backtest is checked by tests/test_paper.py.
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.backtest import ExecutionModel
+from core.indicators import calculate_indicators
+from core.paper import PaperEngine, replay_events
+from core.replay import ReplayExchange
+from core.store import candles_to_frame
+from core.strategy import PRESETS, build_strategy
+
+
+def load_frames(csv_specs):
+    """{(symbol, timeframe): frame} from 'SYMBOL:TIMEFRAME=path.csv' specs."""
+    paths = {}
+    for spec in csv_specs:
+        pair, path = spec.split('=', 1)
+        symbol, timeframe = pair.rsplit(':', 1)
+        paths[(symbol, timeframe)] = path
+    exchange = ReplayExchange.from_csv(paths)
+    frames = {}
+    for key, rows in exchange.candles.items():
+        columns = dict(zip(('timestamp', 'open', 'high', 'low', 'close', 'volume'), zip(*rows)))
+        frames[key] = candles_to_frame(columns)
+    return frames
+
+
+def synthetic_frame(n_candles, seed):
+    """Random-walk OHLCV candles on a 15m grid."""
+    rng = np.random.default_rng(seed)
+    close = 30000.0 * np.exp(np.cumsum(rng.normal(0.0, 0.004, n_candles)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = close * np.abs(rng.normal(0.0, 0.002, n_candles))
+    index = pd.date_range('2020-01-01', periods=n_candles, freq='15min', name='timestamp')
+    return pd.DataFrame({
+        'open': open_, 'high': np.maximum(open_, close) + spread, 'low': np.minimum(open_, close) - spread,
+        'close': close, 'volume': rng.lognormal(3.0, 0.5, n_candles),
+    }, index=index)
+
+
+async def replay(engine, events):
+    # Le moteur consomme la file pendant que les evenements y sont pousses, comme dans le bot
+    task = asyncio.create_task(engine.run())
+    for count, event in enumerate(events, 1):
+        engine.submit(event)
+        if count % 1000 == 0:
+            await asyncio.sleep(0)
+    engine.stop()
+    await task
+
+
+def print_report(engine):
+    pnl = engine.pnl()
+    positions = engine.open_positions()
+    if positions:
+        print("\nPositions ouvertes :")
+        print(pd.DataFrame(positions).drop(columns='opened_at').to_string(index=False, float_format='{:.4f}'.format))
+    print("\nPnL par paire :")
+    print(pd.DataFrame(pnl['pairs']).to_string(index=False, float_format='{:.2f}'.format))
+    win_rate = f"{pnl['win_rate']:.1f} %" if pnl['win_rate'] is not None else "-"
+    print(
+        f"\nCapital {pnl['start_balance']:.2f} -> {pnl['equity']:.2f} ({pnl['return_percent']:+.2f} %) | "
+        f"realise {pnl['realized']:.2f}, latent {pnl['unrealized']:.2f}, frais {pnl['fees']:.2f} | "
+        f"{pnl['round_trips']} aller-retours, {win_rate} gagnants"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--csv', nargs='*', default=[], help="SYMBOLE:INTERVALLE=fichier.csv")
+    parser.add_argument('--pairs', nargs='+', default=['BTC/USDT'])
+    parser.add_argument('--candles', type=int, default=20_000)
+    parser.add_argument('--strategy', default='rsi', choices=list(PRESETS))
+    parser.add_argument('--capital', type=float, default=1000.0)
+    parser.add_argument('--fee', type=float, default=0.001)
+    parser.add_argument('--slippage-bps', type=float, default=0.0)
+    parser.add_argument('--fill', default='close', choices=['close', 'next_open'])
+    parser.add_argument('--order-type', default='market', choices=['market', 'limit'])
+    parser.add_argument('--state', default=None, help="Fichier de snapshot (aucun par defaut)")
+    args = parser.parse_args()
+
+    if args.csv:
+        frames = load_frames(args.csv)
+    else:
+        frames = {(symbol, '15m'): synthetic_frame(args.candles, seed) for seed, symbol in enumerate(args.pairs)}
+    frames = {key: calculate_indicators(df) for key, df in frames.items()}
+    strategy = build_strategy(args.strategy)
+    model = ExecutionModel(
+        order_type=args.order_type, maker_fee=args.fee, taker_fee=args.fee,
+        slippage_bps=args.slippage_bps, fill=args.fill,
+    )
+    # Capital reparti entre les paires rejouees, comme dans le bot
+    engine = PaperEngine(model, args.capital, path=args.state, pairs=list(frames))
+
+    events = list(replay_events(frames, strategy))
+    start = time.perf_counter()
+    asyncio.run(replay(engine, events))
+    elapsed = time.perf_counter() - start
+    print(f"{sum(len(df) for df in frames.values())} bougies sur {len(frames)} paire(s), stratégie {strategy.name} : "
+          f"{len(events)} evenements en {elapsed:.3f} s ({len(events) / elapsed:,.0f} evenements/s)")
+    print_report(engine)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""Analysis core shared by the Streamlit dashboard and the Telegram bot.
+
+Data source, indicator pipeline, signal evaluation, strategies and
+backtest. Importing the core never pulls in streamlit, matplotlib or
+telegram.
+"""
+from core.backtest import run_backtest
+from core.data import get_ohlcv_data
+from core.exchange import create_exchange, get_exchange, register_exchange
+from core.indicators import RSI_PERIOD, RSIRegistry, StreamingRSI, calculate_indicators, rsi
+from core.signals import RSI_OVERBOUGHT, RSI_OVERSOLD, check_trading_signal
+from core.store import CandleStore
+from core.strategy import Strategy, build_strategy
+
+__all__ = [
+    'CandleStore',
+    'RSIRegistry',
+    'RSI_OVERBOUGHT',
+    'RSI_OVERSOLD',
+    'RSI_PERIOD',
+    'Strategy',
+    'StreamingRSI',
+    'build_strategy',
+    'calculate_indicators',
+    'check_trading_signal',
+    'create_exchange',
+    'get_exchange',
+    'get_ohlcv_data',
+    'register_exchange',
+    'rsi',
+    'run_backtest',
+]
@@ -0,0 +1,75 @@
+"""De-duplication state of the automatic alerts, persisted to data/last_signals.json.
+
+One entry per (chat, symbol, timeframe) remembers the last evaluated closed
+candle and the signal it produced. An alert is only emitted for a candle
+that has not been evaluated yet, or when the signal changes, so the same
+alert is never sent twice for one candle.
+"""
+import json
+import os
+import threading
+
+from core.signals import SIGNAL_BUY, SIGNAL_SELL
+
+DEFAULT_PATH = os.environ.get(
+    'LAST_SIGNALS_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'last_signals.json'),
+)
+ACTIONABLE_SIGNALS = (SIGNAL_BUY, SIGNAL_SELL)
+
+
+class AlertState:
+    """Last evaluated candle and signal per (chat, symbol, timeframe)."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def _key(chat_id, symbol, timeframe):
+        return f"{chat_id}|{symbol}|{timeframe}"
+
+    def load(self):
+        """Loads the state written by a previous run (a missing or invalid file means empty)."""
+        try:
+            with open(self.path, encoding='utf-8') as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            data = {}
+        # Les entrees de l'ancien format {symbole: signal} sont ignorees
+        self._entries = {
+            key: value for key, value in data.items()
+            if isinstance(value, dict) and 'candle' in value
+        } if isinstance(data, dict) else {}
+
+    def save(self):
+        """Writes the state atomically (temporary file + rename)."""
+        with self._lock:
+            data = dict(self._entries)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump(data, handle, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def last_candle(self, chat_id, symbol, timeframe):
+        entry = self._entries.get(self._key(chat_id, symbol, timeframe))
+        return entry['candle'] if entry else None
+
+    def is_due(self, chat_id, symbol, timeframe, now_ms, timeframe_ms):
+        """True when a candle newer than the last evaluated one has closed."""
+        last = self.last_candle(chat_id, symbol, timeframe)
+        # La bougie suivante ouvre a last + tf et cloture a last + 2 * tf
+        return last is None or now_ms >= last + 2 * timeframe_ms
+
+    def record(self, chat_id, symbol, timeframe, candle_ts, signal):
+        """Stores the evaluation of a closed candle; returns True if an alert must be sent."""
+        key = self._key(chat_id, symbol, timeframe)
+        with self._lock:
+            previous = self._entries.get(key)
+            self._entries[key] = {'candle': int(candle_ts), 'signal': signal}
+        if signal not in ACTIONABLE_SIGNALS:
+            return False
+        return previous is None or previous['candle'] != candle_ts or previous['signal'] != signal
@@ -0,0 +1,132 @@
+"""Deep history backfill: pages backwards through `since` windows into the store.
+
+Exchanges cap fetch_ohlcv at a few hundred candles, so years of history
+need many requests. backfill() walks backwards from the oldest stored candle
+(or from now) one page at a time and writes each page straight to a spool
+next to the series, so memory stays flat whatever the depth. The spool's
+meta.json keeps a cursor (the oldest timestamp reached): an interrupted
+backfill resumes where it stopped. Once the target date is reached, the
+spool is merged into the store in a single rewrite.
+"""
+import logging
+import shutil
+import time
+
+from core.data import default_store
+from core.store import read_columns, read_meta, rows_to_columns, write_columns, write_meta
+from core.timeframes import timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+PAGE_LIMIT = 300
+MAX_RETRIES = 5
+# Pages vides consecutives avant de conclure au debut de l'historique de la paire
+MAX_EMPTY_PAGES = 10
+RETRY_DELAY_S = 1.0
+
+
+def fetch_page(exchange, symbol, timeframe, since, limit, retries=MAX_RETRIES, sleep=time.sleep):
+    """fetch_ohlcv with exponential backoff; the last error is re-raised."""
+    for attempt in range(retries + 1):
+        try:
+            return exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = RETRY_DELAY_S * 2 ** attempt
+            logger.warning(f"{symbol} {timeframe} : echec de la page {since} ({e}), nouvel essai dans {delay:.0f} s")
+            sleep(delay)
+
+
+def pacing_delay(exchange):
+    """Pause between pages, unless ccxt already throttles the client itself."""
+    if getattr(exchange, 'enableRateLimit', False):
+        return 0.0
+    return getattr(exchange, 'rateLimit', 0) / 1000
+
+
+class Spool:
+    """Append-only columnar files holding the pages fetched so far (newest first)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.meta = read_meta(path)
+
+    @property
+    def cursor(self):
+        return self.meta.get('cursor')
+
+    def append(self, columns, cursor):
+        write_columns(self.path, self.meta['rows'], columns)
+        self.meta = {'rows': self.meta['rows'] + len(columns['timestamp']), 'cursor': cursor}
+        write_meta(self.path, self.meta)
+
+    def columns(self):
+        return read_columns(self.path, self.meta['rows'])
+
+    def discard(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def merge_spool(store, exchange_id, symbol, timeframe, spool):
+    """Rewrites the series with the spooled pages plus the stored candles."""
+    rows = store.merge(exchange_id, symbol, timeframe, spool.columns())
+    spool.discard()
+    return rows
+
+
+def backfill(exchange, symbol, timeframe, since_ms, store=None, page_limit=PAGE_LIMIT,
+             retries=MAX_RETRIES, max_empty_pages=MAX_EMPTY_PAGES, progress=None, sleep=time.sleep):
+    """Fetches every candle from since_ms up to the oldest stored one.
+
+    A page without candles (a gap in the venue's data) is stepped over; the
+    backfill only stops early after max_empty_pages empty pages in a row,
+    taken as the start of the pair's history.
+    progress, if given, is called as progress(fraction) after each page.
+    Returns the number of candles in the series once merged.
+    """
+    store = store or default_store()
+    exchange_id = getattr(exchange, 'id', type(exchange).__name__)
+    step = timeframe_to_ms(timeframe)
+    spool = Spool(store.path(exchange_id, symbol, timeframe) + '.backfill')
+
+    end = spool.cursor or store.first_timestamp(exchange_id, symbol, timeframe) or exchange.milliseconds()
+    start_end = end
+    delay = pacing_delay(exchange)
+    empty_pages = 0
+    while end > since_ms:
+        page_since = max(since_ms, end - page_limit * step)
+        batch = fetch_page(exchange, symbol, timeframe, page_since, page_limit, retries, sleep)
+        if batch:
+            columns = rows_to_columns(batch)
+            # Certaines places renvoient les bougies qui suivent un trou : seules celles de la page comptent
+            in_window = (columns['timestamp'] >= page_since) & (columns['timestamp'] < end)
+        if not batch or not in_window.any():
+            empty_pages += 1
+            if empty_pages >= max_empty_pages:
+                logger.info(f"{symbol} {timeframe} : {empty_pages} pages vides avant {end}, debut de l'historique")
+                break
+        else:
+            if empty_pages:
+                logger.warning(f"{symbol} {timeframe} : trou de {empty_pages} page(s) sans bougie saute apres {end}")
+                empty_pages = 0
+            spool.append({name: values[in_window] for name, values in columns.items()}, page_since)
+        end = page_since
+        if progress:
+            progress(min(1.0, (start_end - end) / max(1, start_end - since_ms)))
+        if delay and end > since_ms:
+            sleep(delay)
+
+    if not spool.meta['rows']:
+        spool.discard()
+        return len(store.load(exchange_id, symbol, timeframe)['timestamp'])
+    return merge_spool(store, exchange_id, symbol, timeframe, spool)
+
+
+def load_history(exchange, symbol, timeframe, since_ms, store=None, **kwargs):
+    """Backfills then tops up the series, and returns every candle since since_ms."""
+    store = store or default_store()
+    store.sync(exchange, symbol, timeframe)
+    backfill(exchange, symbol, timeframe, since_ms, store=store, **kwargs)
+    exchange_id = getattr(exchange, 'id', type(exchange).__name__)
+    return store.frame(exchange_id, symbol, timeframe, since=since_ms)
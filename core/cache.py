@@ -0,0 +1,137 @@
+"""Layered memoization of the analysis pipeline, with bounded LRU eviction.
+
+Layers, each keyed on the data version of a series (first and last candle
+timestamps, number of candles, values of the last candle) plus its own
+parameters:
+
+- indicators, per (symbol, timeframe, RSI period);
+- trades (with the equity curve), per RSI thresholds (or strategy, see
+  core.strategy) and execution model, simulated once with a unit capital;
+- performance metrics of those trades.
+
+With fixed-fraction sizing the backtest is scale-invariant in the starting
+capital (each buy spends a fraction of the balance), so the results for any
+capital are derived from the cached unit trades by a multiplication instead
+of a new run. Fixed-notional sizing is not, and its trades are keyed on the
+capital as well.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from core.backtest import DEFAULT_EXECUTION, backtest_signal, backtest_trades, performance_metrics
+from core.indicators import RSI_PERIOD, calculate_indicators
+from core.store import COLUMNS
+
+
+class LRUCache:
+    """Thread-safe mapping keeping the maxsize most recently used entries."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        # Calcul hors du verrou : deux appels concurrents peuvent calculer la meme valeur
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def discard(self, predicate):
+        """Removes the entries whose key matches predicate(key)."""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def data_version(df):
+    """Identifies a candle frame by its first/last timestamps, its length and its last candle.
+
+    The last candle may still be in progress: each top-up changes its values
+    but neither the timestamps nor the length.
+    """
+    if df.empty:
+        return (None, None, 0, b'')
+    # Octets plutot que flottants : une valeur NaN reste egale a elle-meme dans la cle
+    last = np.array([df[name].iat[-1] for name in COLUMNS[1:] if name in df], dtype=np.float64).tobytes()
+    return (df.index[0].value, df.index[-1].value, len(df), last)
+
+
+class AnalysisCache:
+    """Indicator frames and unit-capital trades of the series seen by the dashboard.
+
+    Cached frames are shared: callers must not modify them.
+    """
+
+    def __init__(self, max_indicators=32, max_trades=256):
+        self.indicators_cache = LRUCache(max_indicators)
+        self.trades_cache = LRUCache(max_trades)
+        self.metrics_cache = LRUCache(max_trades)
+
+    def indicators(self, symbol, timeframe, df, rsi_period=RSI_PERIOD, compute=None):
+        """Indicator frame of a candle frame; compute(df) defaults to calculate_indicators."""
+        key = (symbol, timeframe, data_version(df), rsi_period)
+        if compute is None:
+            compute = lambda frame: calculate_indicators(frame, rsi_period)  # noqa: E731
+        return self.indicators_cache.get_or_compute(key, lambda: compute(df))
+
+    @staticmethod
+    def _trades_key(symbol, timeframe, df, rsi_oversold, rsi_overbought, rsi_period, model, start_balance, strategy):
+        capital = 1.0 if model.scale_invariant else float(start_balance)
+        rules = (rsi_period, rsi_oversold, rsi_overbought) if strategy is None else (strategy,)
+        return (symbol, timeframe, data_version(df), *rules, model, capital), capital
+
+    def trades(self, symbol, timeframe, df, rsi_oversold, rsi_overbought, rsi_period=RSI_PERIOD,
+               model=DEFAULT_EXECUTION, start_balance=1.0, strategy=None):
+        """Trades (see backtest.backtest_signal) of an indicator frame.
+
+        A strategy (core.strategy.Strategy), when given, replaces the RSI
+        thresholds. Simulated with a unit capital when the model is
+        scale-invariant, with start_balance otherwise; scale them with
+        backtest.scaled_results.
+        """
+        key, capital = self._trades_key(symbol, timeframe, df, rsi_oversold, rsi_overbought,
+                                        rsi_period, model, start_balance, strategy)
+        if strategy is None:
+            return self.trades_cache.get_or_compute(
+                key, lambda: backtest_trades(df, rsi_oversold, rsi_overbought, model, capital)
+            )
+        return self.trades_cache.get_or_compute(
+            key, lambda: backtest_signal(df, strategy.compile(df), model, capital)
+        )
+
+    def metrics(self, symbol, timeframe, df, rsi_oversold, rsi_overbought, rsi_period=RSI_PERIOD,
+                model=DEFAULT_EXECUTION, start_balance=1.0, strategy=None):
+        """performance_metrics of the cached trades (ratios, independent of the scale)."""
+        key, _ = self._trades_key(symbol, timeframe, df, rsi_oversold, rsi_overbought,
+                                  rsi_period, model, start_balance, strategy)
+        return self.metrics_cache.get_or_compute(key, lambda: performance_metrics(
+            df.index, df['close'].to_numpy(),
+            self.trades(symbol, timeframe, df, rsi_oversold, rsi_overbought, rsi_period, model,
+                        start_balance, strategy),
+        ))
+
+    def invalidate(self, symbol, timeframe=None):
+        """Drops every cached entry of a symbol (optionally of one timeframe only)."""
+        def matches(key):
+            return key[0] == symbol and (timeframe is None or key[1] == timeframe)
+        self.indicators_cache.discard(matches)
+        self.trades_cache.discard(matches)
+        self.metrics_cache.discard(matches)
@@ -0,0 +1,155 @@
+"""Interactive dashboard charts (Altair / Vega-Lite) built from downsampled series.
+
+altair (installed with streamlit) is imported on first use only. The price,
+RSI and volume views share their time axis: zooming or panning the price
+view moves the other two. base_charts() does the expensive part (downsampling and
+the data-bearing layers) and can be cached per series; the RSI thresholds
+and the forecast are separate light layers added on top at each rerun.
+"""
+import pandas as pd
+
+from core.downsample import MAX_POINTS, downsample
+
+PRICE_COLOR = '#4CAF50'
+RSI_COLOR = 'cyan'
+VOLUME_COLOR = '#FFA500'
+OVERBOUGHT_COLOR = 'red'
+OVERSOLD_COLOR = 'green'
+
+
+def _altair():
+    import altair as alt
+    return alt
+
+
+def _points(df, column, max_points, method):
+    sampled = downsample(df, column, max_points, method)
+    return pd.DataFrame({'timestamp': sampled.index, column: sampled[column].to_numpy()})
+
+
+def base_charts(df, timeframe, max_points=MAX_POINTS):
+    """Price, RSI and volume views of df, each drawn from at most ~max_points points."""
+    alt = _altair()
+    zoom = alt.selection_interval(name='zoom', bind='scales', encodings=['x'])
+    x = alt.X('timestamp:T', title=None)
+
+    price = alt.Chart(_points(df, 'close', max_points, 'lttb'), title=f"Prix de Clôture ({timeframe})").mark_line(
+        color=PRICE_COLOR,
+    ).encode(
+        x=x,
+        y=alt.Y('close:Q', title="Prix (USDT)", scale=alt.Scale(zero=False)),
+        tooltip=[alt.Tooltip('timestamp:T', title="Date"), alt.Tooltip('close:Q', title="Clôture", format=',.2f')],
+    ).properties(height=300).add_params(zoom)
+
+    rsi = alt.Chart(_points(df, 'RSI', max_points, 'lttb'), title="Indice de Force Relative (RSI)").mark_line(
+        color=RSI_COLOR,
+    ).encode(
+        x=x,
+        y=alt.Y('RSI:Q', scale=alt.Scale(domain=[0, 100])),
+        tooltip=[alt.Tooltip('timestamp:T', title="Date"), alt.Tooltip('RSI:Q', format='.2f')],
+    ).properties(height=180)
+
+    volume = alt.Chart(_points(df, 'volume', max_points, 'minmax'), title="Volume de Trading").mark_bar(
+        color=VOLUME_COLOR, opacity=0.6,
+    ).encode(
+        x=x,
+        y=alt.Y('volume:Q', title="Volume"),
+        tooltip=[alt.Tooltip('timestamp:T', title="Date"), alt.Tooltip('volume:Q', format=',.2f')],
+    ).properties(height=180)
+
+    return {'price': price, 'rsi': rsi, 'volume': volume}
+
+
+def threshold_rules(oversold, overbought):
+    """Dashed horizontal lines of the RSI buy/sell thresholds."""
+    alt = _altair()
+    labels = [f"Surachat ({overbought})", f"Survente ({oversold})"]
+    thresholds = pd.DataFrame({'RSI': [overbought, oversold], 'Seuil': labels})
+    return alt.Chart(thresholds).mark_rule(strokeDash=[6, 4]).encode(
+        y='RSI:Q',
+        color=alt.Color('Seuil:N', scale=alt.Scale(domain=labels, range=[OVERBOUGHT_COLOR, OVERSOLD_COLOR]),
+                        legend=alt.Legend(title=None, orient='bottom-left')),
+    )
+
+
+def analysis_chart(base, oversold, overbought):
+    """Stacks the cached views with the current thresholds on a shared time axis."""
+    alt = _altair()
+    return alt.vconcat(
+        base['price'], base['rsi'] + threshold_rules(oversold, overbought), base['volume'],
+    ).resolve_scale(x='shared')
+
+
+def forecast_chart(base, forecast, color, label):
+    """Price history with the forecast path (forecast: DataFrame timestamp/close)."""
+    alt = _altair()
+    path = alt.Chart(forecast.assign(Pronostic=label)).mark_line(strokeDash=[6, 4], point=True).encode(
+        x='timestamp:T',
+        y='close:Q',
+        color=alt.Color('Pronostic:N', scale=alt.Scale(range=[color]), legend=alt.Legend(title=None, orient='top-left')),
+        tooltip=[alt.Tooltip('timestamp:T', title="Date"), alt.Tooltip('close:Q', title="Prix", format=',.2f')],
+    )
+    start = alt.Chart(forecast.iloc[:1]).mark_point(color='white', filled=True, size=60).encode(x='timestamp:T', y='close:Q')
+    return (base['price'] + path + start).properties(title="Pronostic du Prix basés sur le RSI")
+
+
+def equity_chart(index, equity, close, start_balance, max_points=MAX_POINTS):
+    """Strategy equity against buy-and-hold of the same capital."""
+    alt = _altair()
+    curves = pd.DataFrame({
+        'Stratégie': equity * start_balance,
+        'Achat & Conservation': close / close[0] * start_balance,
+    }, index=index)
+    points = pd.concat([
+        _points(curves.rename(columns={name: 'valeur'}), 'valeur', max_points, 'lttb').assign(Courbe=name)
+        for name in curves.columns
+    ])
+    return alt.Chart(points, title="Évolution du Capital").mark_line().encode(
+        x=alt.X('timestamp:T', title=None),
+        y=alt.Y('valeur:Q', title="Capital (USDT)", scale=alt.Scale(zero=False)),
+        color=alt.Color('Courbe:N', scale=alt.Scale(range=[PRICE_COLOR, 'gray']), legend=alt.Legend(title=None, orient='top-left')),
+        strokeDash=alt.condition(alt.datum.Courbe == 'Achat & Conservation', alt.value([4, 4]), alt.value([1, 0])),
+        tooltip=[alt.Tooltip('timestamp:T', title="Date"), 'Courbe:N', alt.Tooltip('valeur:Q', title="Capital", format=',.2f')],
+    ).properties(height=300).interactive(bind_y=False)
+
+
+def heatmap_chart(heatmap, title):
+    """Survente x Surachat grid of profit % (profit_heatmap output)."""
+    alt = _altair()
+    cells = heatmap.stack().rename('Profit %').reset_index()
+    return alt.Chart(cells, title=title).mark_rect().encode(
+        x=alt.X('Surachat:O', title="RSI Surachat (Vente)"),
+        y=alt.Y('Survente:O', title="RSI Survente (Achat)", sort='descending'),
+        color=alt.Color('Profit %:Q', scale=alt.Scale(scheme='redyellowgreen', domainMid=0)),
+        tooltip=['Survente:O', 'Surachat:O', alt.Tooltip('Profit %:Q', format='.2f')],
+    ).properties(height=400)
+
+
+def distribution_chart(results, column, title, color=RSI_COLOR):
+    """Histogram of one column of the robustness results, with its median."""
+    alt = _altair()
+    values = results[[column]]
+    bars = alt.Chart(values, title=title).mark_bar(color=color, opacity=0.7).encode(
+        x=alt.X(f'{column}:Q', bin=alt.Bin(maxbins=40), title=column),
+        y=alt.Y('count():Q', title="Simulations"),
+        tooltip=[alt.Tooltip(f'{column}:Q', bin=alt.Bin(maxbins=40), title=column), alt.Tooltip('count():Q', title="Simulations")],
+    )
+    median = alt.Chart(pd.DataFrame({column: [values[column].median()]})).mark_rule(
+        color='white', strokeDash=[6, 4],
+    ).encode(x=f'{column}:Q', tooltip=[alt.Tooltip(f'{column}:Q', title="Médiane", format='.2f')])
+    return (bars + median).properties(height=250)
+
+
+def walk_forward_chart(results):
+    """Out-of-sample return of each walk-forward test window."""
+    alt = _altair()
+    return alt.Chart(results, title="Rendement hors échantillon par fenêtre").mark_bar().encode(
+        x=alt.X('Début Test:T', title=None),
+        y=alt.Y('Rendement %:Q'),
+        color=alt.condition(alt.datum['Rendement %'] >= 0, alt.value(OVERSOLD_COLOR), alt.value(OVERBOUGHT_COLOR)),
+        tooltip=[
+            alt.Tooltip('Début Test:T', title="Début"), alt.Tooltip('Fin Test:T', title="Fin"),
+            'RSI Période:Q', 'Survente:Q', 'Surachat:Q',
+            alt.Tooltip('Rendement %:Q', format='.2f'), alt.Tooltip('Drawdown Max %:Q', format='.2f'),
+        ],
+    ).properties(height=250)
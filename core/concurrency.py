@@ -0,0 +1,105 @@
+"""Concurrent, rate-limit aware calls to blocking exchange clients from asyncio."""
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class RateLimiter:
+    """Spaces out request starts by a minimum interval (the exchange's rateLimit)."""
+
+    def __init__(self, interval_ms):
+        self.interval = interval_ms / 1000
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# Un limiteur par exchange, partage par tous les appels du processus
+_LIMITERS = {}
+
+
+def rate_limiter_for(exchange):
+    """Returns the process-wide limiter of an exchange, based on its rateLimit (ms)."""
+    exchange_id = getattr(exchange, 'id', type(exchange).__name__)
+    if exchange_id not in _LIMITERS:
+        _LIMITERS[exchange_id] = RateLimiter(getattr(exchange, 'rateLimit', 0) or 0)
+    return _LIMITERS[exchange_id]
+
+
+async def gather_bounded(func, calls, max_concurrency=8, limiter=None, executor=None):
+    """Runs the blocking func(*args) for every args tuple in a thread pool.
+
+    At most max_concurrency calls are in flight at once, and each start waits
+    for the limiter. Returns {args: result}; exceptions are returned as values
+    so one failing symbol does not cancel the others.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(args):
+        async with semaphore:
+            if limiter is not None:
+                await limiter.wait()
+            return await loop.run_in_executor(executor, func, *args)
+
+    results = await asyncio.gather(*(run(args) for args in calls), return_exceptions=True)
+    return dict(zip(calls, results))
+
+
+class CoalescingCache:
+    """Async memoization of blocking calls: a short TTL plus coalescing of identical in-flight calls.
+
+    get(key, func, *args) returns the result cached for key if it is younger
+    than ttl seconds; otherwise it joins the computation already running for
+    key, or starts func(*args) in the executor. Exceptions are propagated to
+    every waiter and not cached. A waiter being cancelled does not cancel the
+    shared computation. Meant for one event loop.
+    """
+
+    def __init__(self, ttl, executor=None, maxsize=256):
+        self.ttl = ttl
+        self.executor = executor
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    async def get(self, key, func, *args):
+        entry = self._results.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            future = asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(future)
+
+    def _finish(self, key, future):
+        self._inflight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._results[key] = (time.monotonic() + self.ttl, future.result())
+        self._results.move_to_end(key)
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Forgets the cached result of key (of every key by default)."""
+        if key is None:
+            self._results.clear()
+        else:
+            self._results.pop(key, None)
@@ -0,0 +1,30 @@
+"""Data source: OHLCV candles for a symbol/timeframe, backed by the candle store."""
+from core.metrics import timed
+from core.pool import ExchangePool
+from core.store import CandleStore
+
+DEFAULT_LIMIT = 500
+
+_DEFAULT_STORE = None
+
+
+def default_store():
+    """Process-wide candle store (created on first use)."""
+    global _DEFAULT_STORE
+    if _DEFAULT_STORE is None:
+        _DEFAULT_STORE = CandleStore()
+    return _DEFAULT_STORE
+
+
+@timed('fetch')
+def get_ohlcv_data(exchange, symbol, timeframe, limit=DEFAULT_LIMIT, store=None):
+    """Returns the `limit` latest candles as a DataFrame indexed by timestamp.
+
+    The local store is topped up first, so only candles newer than the last
+    stored one are fetched. Exchange errors are propagated to the caller.
+    With an ExchangePool, the series of the venue serving the symbol is used.
+    """
+    store = store or default_store()
+    if isinstance(exchange, ExchangePool):
+        return exchange.call(symbol, lambda client: store.sync(client, symbol, timeframe, limit=limit))
+    return store.sync(exchange, symbol, timeframe, limit=limit)
@@ -0,0 +1,75 @@
+"""Level-of-detail downsampling of long series for the charts.
+
+A chart a thousand pixels wide cannot show more than a couple of points per
+pixel column, so long series are reduced before plotting:
+
+- min/max keeps the first, lowest, highest and last point of each bucket
+  (fully vectorized; every spike stays visible, which suits volume bars);
+- LTTB (Largest-Triangle-Three-Buckets) keeps one point per bucket, the one
+  forming the largest triangle with its neighbours (preserves the shape of
+  price and RSI lines with fewer points).
+
+Both return sorted indices into the original series, so all the columns of a
+frame can be sampled consistently.
+"""
+import numpy as np
+
+MAX_POINTS = 2000
+
+
+def minmax_indices(values, n_buckets):
+    """Indices of the min and max of each of n_buckets equal buckets, plus both ends."""
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    rows = -(-n // size)
+    # Derniere tranche completee avec la derniere valeur (sans effet sur min/max)
+    padded = np.pad(values, (0, rows * size - n), mode='edge').reshape(rows, size)
+    offsets = np.arange(rows) * size
+    indices = np.concatenate((
+        [0, n - 1],
+        np.minimum(offsets + padded.argmin(axis=1), n - 1),
+        np.minimum(offsets + padded.argmax(axis=1), n - 1),
+    ))
+    return np.unique(indices)
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: n_out indices (first and last included)."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    selected = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Point moyen de la tranche suivante (le dernier point pour la derniere tranche)
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        mean_x, mean_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs(
+            (x[selected] - mean_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (mean_y - y[selected])
+        )
+        selected = start + int(area.argmax())
+        indices[i + 1] = selected
+    return indices
+
+
+def downsample(df, column, max_points=MAX_POINTS, method='minmax'):
+    """Rows of df kept to draw `column` with at most ~max_points points."""
+    if len(df) <= max_points:
+        return df
+    if method == 'lttb':
+        indices = lttb_indices(df.index.asi8, df[column].to_numpy(), max_points)
+    elif method == 'minmax':
+        indices = minmax_indices(df[column].to_numpy(), max_points // 2)
+    else:
+        raise ValueError(f"Methode de sous-echantillonnage inconnue : {method}")
+    return df.iloc[indices]
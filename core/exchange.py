@@ -0,0 +1,82 @@
+"""Pluggable exchange interface and process-wide exchange registry.
+
+The core only needs an object exposing the small subset of the ccxt API it
+uses:
+
+    id                                   -> str, used to key the candle store
+    fetch_ohlcv(symbol, timeframe, since=None, limit=None)
+                                         -> [[timestamp_ms, open, high, low, close, volume], ...]
+    milliseconds()                       -> current time in ms
+
+Any ccxt exchange qualifies, as does core.replay.ReplayExchange for offline
+runs. ccxt itself is only imported when a real exchange is first created.
+"""
+import json
+import os
+import threading
+import time
+
+DEFAULT_EXCHANGE = 'coinbase'
+MARKETS_DIR = os.environ.get(
+    'MARKETS_SNAPSHOT_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'markets'),
+)
+MARKETS_MAX_AGE = 24 * 60 * 60  # secondes
+
+_EXCHANGES = {}
+_EXCHANGES_LOCK = threading.Lock()
+
+
+def create_exchange(exchange_id=DEFAULT_EXCHANGE, **config):
+    """Instantiates a ccxt exchange by id (ccxt is only imported here)."""
+    import ccxt
+
+    return getattr(ccxt, exchange_id)({'enableRateLimit': True, **config})
+
+
+def load_markets(exchange, snapshot_dir=MARKETS_DIR, max_age=MARKETS_MAX_AGE):
+    """Loads the exchange markets, from the local snapshot when it is fresh enough.
+
+    A network load refreshes the snapshot, so the next process start skips
+    the markets round-trip.
+    """
+    if not hasattr(exchange, 'load_markets'):
+        return None
+    path = os.path.join(snapshot_dir, f"{exchange.id}.json")
+    try:
+        if time.time() - os.path.getmtime(path) < max_age:
+            with open(path) as handle:
+                snapshot = json.load(handle)
+            exchange.set_markets(snapshot['markets'], snapshot.get('currencies'))
+            return exchange.markets
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    markets = exchange.load_markets()
+    os.makedirs(snapshot_dir, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as handle:
+        json.dump({'markets': list(markets.values()), 'currencies': exchange.currencies}, handle)
+    os.replace(tmp_path, path)
+    return markets
+
+
+def get_exchange(exchange_id=DEFAULT_EXCHANGE):
+    """Returns the process-wide client of an exchange, creating it on first use.
+
+    Its markets are loaded once, and reusing the same instance keeps its HTTP
+    session (and connection pool) alive across calls.
+    """
+    with _EXCHANGES_LOCK:
+        if exchange_id not in _EXCHANGES:
+            exchange = create_exchange(exchange_id)
+            load_markets(exchange)
+            _EXCHANGES[exchange_id] = exchange
+        return _EXCHANGES[exchange_id]
+
+
+def register_exchange(exchange):
+    """Plugs an already built client (custom or fake exchange) into the registry."""
+    with _EXCHANGES_LOCK:
+        _EXCHANGES[exchange.id] = exchange
+    return exchange
@@ -0,0 +1,241 @@
+"""RSI computation: a vectorized version and an incremental O(1) one.
+
+Both reproduce pandas_ta.rsi (pandas implementation): gains and losses are
+smoothed with an exponential mean of alpha = 1 / length (adjust=True, at
+least `length` price changes), and RSI = 100 * gain / (gain + loss).
+
+The adjusted mean is a ratio of two decayed sums, and the normalising
+weight cancels out in the RSI, so the streaming state is just the two
+decayed sums, the number of price changes seen and the previous close.
+"""
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from core.metrics import timed
+
+RSI_PERIOD = 14
+
+
+def rsi(close, length=RSI_PERIOD):
+    """Vectorized RSI of a close series (Series in, Series out)."""
+    close = pd.Series(close, dtype=np.float64) if not isinstance(close, pd.Series) else close
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / length, min_periods=length).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / length, min_periods=length).mean()
+    return 100 * gain / (gain + loss)
+
+
+def ema(series, length):
+    """Exponential moving average (span = length, recursive form), NaN before `length` values."""
+    return pd.Series(series, dtype=np.float64).ewm(span=length, adjust=False, min_periods=length).mean()
+
+
+def sma(series, length):
+    """Simple moving average over `length` values."""
+    return pd.Series(series, dtype=np.float64).rolling(length).mean()
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """(MACD line, signal line): EMA(fast) - EMA(slow) and its EMA(signal)."""
+    line = ema(close, fast) - ema(close, slow)
+    return line, ema(line, signal)
+
+
+def bollinger(close, length=20, std=2.0):
+    """(lower, middle, upper) bands: SMA(length) -/+ std population standard deviations."""
+    close = pd.Series(close, dtype=np.float64)
+    middle = sma(close, length)
+    width = std * close.rolling(length).std(ddof=0)
+    return middle - width, middle, middle + width
+
+
+def rsi_matrix(closes, length=RSI_PERIOD):
+    """RSI of many series at once: closes is a 2-D (series x time) array.
+
+    Shorter series are left-padded with NaN. The decayed sums run along the
+    time axis, each step vectorized over all the series; values match rsi()
+    row by row.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    delta = np.diff(closes, axis=1)
+    valid = ~np.isnan(delta)
+    gains = np.where(valid, np.clip(delta, 0, None), 0.0)
+    losses = np.where(valid, np.clip(-delta, 0, None), 0.0)
+
+    decay = 1 - 1 / length
+    gain_sum = np.zeros(len(closes))
+    loss_sum = np.zeros(len(closes))
+    gain_out = np.empty_like(delta)
+    loss_out = np.empty_like(delta)
+    for t in range(delta.shape[1]):
+        gain_sum = decay * gain_sum + gains[:, t]
+        loss_sum = decay * loss_sum + losses[:, t]
+        gain_out[:, t] = gain_sum
+        loss_out[:, t] = loss_sum
+
+    total = gain_out + loss_out
+    with np.errstate(invalid='ignore', divide='ignore'):
+        values = 100 * gain_out / total
+    values[(np.cumsum(valid, axis=1) < length) | (total == 0)] = np.nan
+    return np.hstack((np.full((len(closes), 1), np.nan), values))
+
+
+@timed('indicators')
+def calculate_indicators(df, rsi_period=RSI_PERIOD):
+    """Calculates RSI and drops NaN values; df itself is left untouched."""
+    if not df.empty:
+        df = drop_incomplete(df.assign(RSI=rsi(df['close'], rsi_period)))
+    return df
+
+
+def drop_incomplete(df):
+    """df without the rows holding a NaN (like dropna), as a slice when possible."""
+    valid = df.notna().all(axis=1).to_numpy()
+    start = int(valid.argmax()) if valid.any() else len(valid)
+    # Cas courant : seules les premieres bougies (amorcage du RSI) sont incompletes,
+    # une tranche suffit et les colonnes restent des vues des donnees d'origine
+    return df.iloc[start:] if valid[start:].all() else df[valid]
+
+
+class StreamingRSI:
+    """RSI of one series, updated in O(1) as each candle closes.
+
+    update() commits a closed candle; peek() gives the RSI the in-progress
+    candle would produce without changing the state. With keep_history, the
+    committed values are kept (up to max_history) so series() can rebuild
+    the full RSI column of a frame.
+    """
+
+    def __init__(self, length=RSI_PERIOD, keep_history=False, max_history=10000):
+        self.length = length
+        self.decay = 1 - 1 / length
+        self.keep_history = keep_history
+        self.max_history = max_history
+        self.reset()
+
+    def reset(self):
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.count = 0
+        self.prev_close = None
+        self.last_timestamp = None
+        self._history_ts = []
+        self._history_values = []
+
+    def _advance(self, close):
+        if self.prev_close is None:
+            return self.gain_sum, self.loss_sum, self.count
+        delta = close - self.prev_close
+        gain_sum = max(delta, 0.0) + self.decay * self.gain_sum
+        loss_sum = max(-delta, 0.0) + self.decay * self.loss_sum
+        return gain_sum, loss_sum, self.count + 1
+
+    def _value(self, gain_sum, loss_sum, count):
+        total = gain_sum + loss_sum
+        if count < self.length or total == 0:
+            return math.nan
+        return 100 * gain_sum / total
+
+    @property
+    def value(self):
+        """RSI of the last committed candle."""
+        return self._value(self.gain_sum, self.loss_sum, self.count)
+
+    def peek(self, close):
+        return self._value(*self._advance(float(close)))
+
+    def update(self, close, timestamp=None):
+        close = float(close)
+        self.gain_sum, self.loss_sum, self.count = self._advance(close)
+        self.prev_close = close
+        self.last_timestamp = timestamp
+        value = self.value
+        if self.keep_history:
+            self._history_ts.append(timestamp)
+            self._history_values.append(value)
+            if len(self._history_ts) > 2 * self.max_history:
+                del self._history_ts[:-self.max_history], self._history_values[:-self.max_history]
+        return value
+
+    def seed(self, timestamps, closes):
+        """Initialises the state from closed candles in one vectorized pass."""
+        self.reset()
+        closes = np.asarray(closes, dtype=np.float64)
+        if not len(closes):
+            return
+        delta = np.diff(closes)
+        weights = self.decay ** np.arange(len(delta) - 1, -1, -1)
+        self.gain_sum = float(np.dot(weights, np.clip(delta, 0, None)))
+        self.loss_sum = float(np.dot(weights, np.clip(-delta, 0, None)))
+        self.count = len(delta)
+        self.prev_close = float(closes[-1])
+        self.last_timestamp = int(timestamps[-1])
+        if self.keep_history:
+            tail = slice(-self.max_history, None)
+            self._history_ts = [int(ts) for ts in timestamps[tail]]
+            self._history_values = rsi(closes, self.length).to_numpy()[tail].tolist()
+
+    def feed(self, timestamps, closes, in_progress=True):
+        """Brings the state up to date with a frame of candles.
+
+        Candles newer than the last committed one are committed (all but the
+        last one when it is still in progress); the state is reseeded when
+        the frame does not line up with it. Returns the RSI of the last
+        candle of the frame.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        closes = np.asarray(closes, dtype=np.float64)
+        if not len(closes):
+            return math.nan
+        n_closed = len(closes) - 1 if in_progress else len(closes)
+        closed_ts, closed = timestamps[:n_closed], closes[:n_closed]
+        if self.last_timestamp is None or not np.any(closed_ts == self.last_timestamp):
+            self.seed(closed_ts, closed)
+        else:
+            start = int(np.searchsorted(closed_ts, self.last_timestamp, side='right'))
+            for timestamp, close in zip(closed_ts[start:].tolist(), closed[start:].tolist()):
+                self.update(close, timestamp)
+        return self.peek(closes[-1]) if in_progress else self.value
+
+    def series(self, timestamps, closes):
+        """Full RSI column for a frame, reusing the committed history."""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        live = self.feed(timestamps, closes)
+        values = np.full(len(closes), np.nan)
+        if len(closes):
+            values[-1] = live
+        if len(self._history_ts):
+            history_ts = np.asarray(self._history_ts, dtype=np.int64)
+            position = np.searchsorted(history_ts, timestamps[:-1])
+            found = (position < len(history_ts)) & (history_ts[np.minimum(position, len(history_ts) - 1)] == timestamps[:-1])
+            values[:-1][found] = np.asarray(self._history_values)[position[found]]
+        return values
+
+
+class RSIRegistry:
+    """One StreamingRSI per (symbol, timeframe), shareable between threads."""
+
+    def __init__(self, length=RSI_PERIOD, keep_history=False):
+        self.length = length
+        self.keep_history = keep_history
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._streams:
+                self._streams[key] = StreamingRSI(self.length, self.keep_history)
+            return self._streams[key]
+
+    def feed(self, key, timestamps, closes, in_progress=True):
+        stream = self.get(key)
+        with self._lock:
+            return stream.feed(timestamps, closes, in_progress)
+
+    def series(self, key, timestamps, closes):
+        stream = self.get(key)
+        with self._lock:
+            return stream.series(timestamps, closes)
@@ -0,0 +1,193 @@
+"""Live mode: candles built in memory from a websocket trade stream.
+
+A LiveFeed subscribes to the trades of one (symbol, timeframe) through a
+ccxt.pro client (`watch_trades`) and aggregates them into the candle in
+progress. Each closed candle is committed to a StreamingRSI, so the latest
+price, the in-progress RSI and the signal are always available from
+snapshot() without any REST request. The feed is seeded once from the usual
+candle history.
+
+Anything with an async watch_trades(symbol) method can drive a feed: the
+ccxt.pro client in production, core.replay.ReplayStream offline.
+"""
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+from core.indicators import RSI_PERIOD, StreamingRSI
+from core.signals import RSI_OVERBOUGHT, RSI_OVERSOLD, SIGNAL_ERROR, rsi_to_signal
+from core.store import COLUMNS, candles_to_frame
+from core.timeframes import timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY_S = 1.0
+MAX_RECONNECT_DELAY_S = 60.0
+
+
+def create_stream_client(exchange_id, **config):
+    """Creates a ccxt.pro (websocket) client; call it inside the loop that will use it."""
+    import ccxt.pro as ccxtpro
+    return getattr(ccxtpro, exchange_id)({'enableRateLimit': True, **config})
+
+
+def _rows_to_frame(rows):
+    return candles_to_frame(dict(zip(COLUMNS, zip(*rows))) if rows else {name: [] for name in COLUMNS})
+
+
+class CandleBuilder:
+    """Aggregates trades into [timestamp, open, high, low, close, volume] candles."""
+
+    def __init__(self, timeframe):
+        self.step = timeframe_to_ms(timeframe)
+        self.candle = None
+
+    def add_trade(self, timestamp, price, amount):
+        """Adds a trade; returns the candle it closed, or None.
+
+        Trades older than the candle in progress (late deliveries) are ignored.
+        """
+        start = timestamp // self.step * self.step
+        if self.candle is None or start > self.candle[0]:
+            closed = self.candle
+            self.candle = [start, price, price, price, price, amount]
+            return closed
+        if start == self.candle[0]:
+            candle = self.candle
+            candle[2] = max(candle[2], price)
+            candle[3] = min(candle[3], price)
+            candle[4] = price
+            candle[5] += amount
+        return None
+
+
+class LiveFeed:
+    """Candle in progress, RSI and signal of one (symbol, timeframe), updated per trade.
+
+    on_close, if given, is awaited as on_close(feed, candle, rsi) for every
+    candle closed by the stream. With keep_candles, the last closed candles
+    are kept as well, for strategies that need more than the RSI
+    (closed_frame(), live_frame()).
+    """
+
+    def __init__(self, symbol, timeframe, rsi_period=RSI_PERIOD, on_close=None, keep_candles=0):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.builder = CandleBuilder(timeframe)
+        self.rsi = StreamingRSI(rsi_period)
+        self.on_close = on_close
+        self.candles = deque(maxlen=keep_candles) if keep_candles else None
+        self.trade_count = 0
+        self.updated_at = None
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def seed(self, df):
+        """Starts from a candle frame (DatetimeIndex, close column); its last row is in progress."""
+        if df.empty:
+            return
+        timestamps = df.index.as_unit('ms').asi8
+        with self._lock:
+            self.rsi.seed(timestamps[:-1], df['close'].to_numpy()[:-1])
+            if self.candles is not None:
+                self.candles.clear()
+                closed = df.iloc[-self.candles.maxlen - 1:-1]
+                self.candles.extend(zip(timestamps[-len(closed) - 1:-1].tolist(),
+                                        *(closed[name].tolist() for name in COLUMNS[1:])))
+            last = df.iloc[-1]
+            self.builder.candle = [int(timestamps[-1]), float(last['open']), float(last['high']),
+                                   float(last['low']), float(last['close']), float(last['volume'])]
+
+    async def add_trades(self, trades):
+        """Applies a batch of ccxt trades ({'timestamp', 'price', 'amount'})."""
+        closed_candles = []
+        with self._lock:
+            for trade in trades:
+                closed = self.builder.add_trade(int(trade['timestamp']), float(trade['price']), float(trade['amount']))
+                if closed is not None:
+                    closed_candles.append((closed, self.rsi.update(closed[4], closed[0])))
+                    if self.candles is not None:
+                        self.candles.append(tuple(closed))
+            self.trade_count += len(trades)
+            self.updated_at = time.time()
+        if self.on_close:
+            for closed, value in closed_candles:
+                await self.on_close(self, closed, value)
+
+    def snapshot(self, oversold=RSI_OVERSOLD, overbought=RSI_OVERBOUGHT):
+        """Latest price, in-progress RSI and signal, as a dict."""
+        with self._lock:
+            candle = list(self.builder.candle) if self.builder.candle else None
+            value = self.rsi.peek(candle[4]) if candle else math.nan
+            trade_count, updated_at = self.trade_count, self.updated_at
+        signal = SIGNAL_ERROR if math.isnan(value) else rsi_to_signal(value, oversold, overbought)
+        return {
+            'symbol': self.symbol, 'timeframe': self.timeframe, 'candle': candle,
+            'price': candle[4] if candle else math.nan, 'rsi': value, 'signal': signal,
+            'trades': trade_count, 'updated_at': updated_at,
+        }
+
+    def closed_rsi(self):
+        """(timestamp, RSI) of the last closed candle."""
+        with self._lock:
+            return self.rsi.last_timestamp, self.rsi.value
+
+    def closed_frame(self):
+        """OHLCV frame of the kept closed candles (keep_candles), oldest first."""
+        with self._lock:
+            rows = list(self.candles or ())
+        return _rows_to_frame(rows)
+
+    def live_frame(self):
+        """closed_frame() followed by the candle in progress."""
+        with self._lock:
+            rows = list(self.candles or ())
+            if self.builder.candle:
+                rows.append(tuple(self.builder.candle))
+        return _rows_to_frame(rows)
+
+    def stop(self):
+        self._stopped = True
+
+    async def run(self, client):
+        """Consumes client.watch_trades until stop() or the end of the stream (EOFError).
+
+        Connection errors are logged and retried with exponential backoff.
+        """
+        delay = RECONNECT_DELAY_S
+        while not self._stopped:
+            try:
+                trades = await client.watch_trades(self.symbol)
+            except EOFError:
+                break
+            except Exception as e:
+                logger.warning(f"{self.symbol} {self.timeframe} : flux interrompu ({e}), reconnexion dans {delay:.0f} s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY_S)
+                continue
+            delay = RECONNECT_DELAY_S
+            await self.add_trades(trades)
+
+
+def start_feed_thread(feed, client_factory):
+    """Runs feed in a daemon thread with its own event loop (for non-async callers such as Streamlit).
+
+    client_factory is called inside that loop; the client is closed when the feed ends.
+    """
+    async def main():
+        client = client_factory()
+        try:
+            await feed.run(client)
+        finally:
+            close = getattr(client, 'close', None)
+            if close is not None:
+                await close()
+
+    thread = threading.Thread(target=asyncio.run, args=(main(),), daemon=True,
+                              name=f"live-{feed.symbol}-{feed.timeframe}")
+    thread.start()
+    return thread
+
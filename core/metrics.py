@@ -0,0 +1,335 @@
+"""Lightweight in-process instrumentation: counters, histograms and timers.
+
+Metrics live in a Registry (REGISTRY by default) and are rendered in the
+Prometheus text format, served by start_http_server() on a local port
+(GET /metrics). A timed call costs two clock reads, a bisect on the bucket
+bounds and one lock, a couple of microseconds against operations of a
+millisecond or more: the timers stay on in production.
+
+The analysis steps (fetch, indicators, signal, backtest, ...) are timed in
+a single histogram, OPERATION_SECONDS, labelled by operation; failures are
+counted in OPERATION_ERRORS. Values owned by other objects (cache hits,
+exchange pool statistics) are read only when the metrics are rendered,
+through collectors, and cost nothing on the hot path.
+"""
+import bisect
+import functools
+import logging
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Bornes (secondes) des histogrammes de durees, de 100 microsecondes a la demi-minute
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+class Counter:
+    """Monotonic count per label values."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0.0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in values.items():
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed values, per label values."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Comptes par intervalle (non cumules), dernier = au-dela de la plus grande borne
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labels):
+        """Context manager observing the duration of its block."""
+        return Timer(self, labels)
+
+    def snapshot(self):
+        """{label values: (cumulative bucket counts, sum, count)}."""
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        snapshot = {}
+        for labels, (counts, total, count) in series.items():
+            cumulative, running = [], 0
+            for value in counts:
+                running += value
+                cumulative.append(running)
+            snapshot[labels] = (cumulative, total, count)
+        return snapshot
+
+    def quantile(self, q, *labels):
+        """Estimate of the q quantile, interpolated inside its bucket (like PromQL histogram_quantile)."""
+        series = self.snapshot().get(labels)
+        if series is None or not series[2]:
+            return None
+        cumulative, _, count = series
+        rank = q * count
+        index = bisect.bisect_left(cumulative, rank)
+        if index >= len(self.buckets):
+            return self.buckets[-1]
+        lower = self.buckets[index - 1] if index else 0.0
+        below = cumulative[index - 1] if index else 0
+        in_bucket = cumulative[index] - below
+        return lower + (self.buckets[index] - lower) * ((rank - below) / in_bucket if in_bucket else 1.0)
+
+    def samples(self):
+        for labels, (cumulative, total, count) in self.snapshot().items():
+            base = dict(zip(self.labelnames, labels))
+            for bound, value in zip(self.buckets + (math.inf,), cumulative):
+                yield f'{self.name}_bucket', {**base, 'le': _format_value(bound)}, value
+            yield f'{self.name}_sum', base, total
+            yield f'{self.name}_count', base, count
+
+
+class Timer:
+    """Observes the duration of a with block in a histogram, errors included (and counted in errors)."""
+
+    __slots__ = ('histogram', 'labels', 'errors', 'start')
+
+    def __init__(self, histogram, labels, errors=None):
+        self.histogram = histogram
+        self.labels = labels
+        self.errors = errors
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        if exc_type is not None and self.errors is not None:
+            self.errors.inc(*self.labels)
+        return False
+
+
+class Registry:
+    """Metrics and collectors rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metrique deja enregistree : {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collect):
+        """collect() yields (name, kind, help, [(labels dict, value), ...]) at each rendering."""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        # Les familles de meme nom (un cache par collecteur, ...) sont fusionnees : un seul en-tete par famille
+        families = {}
+        for collect in collectors:
+            try:
+                collected = list(collect())
+            except Exception as e:
+                logger.warning(f"Collecteur de metriques en echec : {e}")
+                continue
+            for name, kind, help, samples in collected:
+                families.setdefault(name, (kind, help, []))[2].extend(samples)
+        for name, (kind, help, samples) in families.items():
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                if value is not None:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+OPERATION_SECONDS = REGISTRY.histogram(
+    'crypto_operation_seconds', "Duree des etapes d'analyse (secondes)", ('operation',),
+)
+OPERATION_ERRORS = REGISTRY.counter(
+    'crypto_operation_errors_total', "Etapes d'analyse terminees par une exception", ('operation',),
+)
+
+
+def timer(operation):
+    """Context manager timing a block as `operation` in OPERATION_SECONDS."""
+    return Timer(OPERATION_SECONDS, (operation,), OPERATION_ERRORS)
+
+
+def timed(operation):
+    """Decorator timing every call of the function as `operation`."""
+    def decorator(func):
+        # Chemin chaud : pas d'objet Timer, seulement deux lectures d'horloge et une observation
+        observe, clock = OPERATION_SECONDS.observe, time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                OPERATION_ERRORS.inc(operation)
+                raise
+            finally:
+                observe(clock() - start, operation)
+        return wrapper
+    return decorator
+
+
+def timed_async(operation):
+    """timed() for coroutine functions."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with timer(operation):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def operation_summary():
+    """One dict per timed operation: calls, errors, mean / p50 / p95 duration (ms)."""
+    rows = []
+    for (operation,), (_, total, count) in sorted(OPERATION_SECONDS.snapshot().items()):
+        rows.append({
+            'operation': operation,
+            'calls': count,
+            'errors': int(OPERATION_ERRORS.value(operation)),
+            'mean_ms': total / count * 1000 if count else None,
+            'p50_ms': OPERATION_SECONDS.quantile(0.5, operation) * 1000,
+            'p95_ms': OPERATION_SECONDS.quantile(0.95, operation) * 1000,
+        })
+    return rows
+
+
+# --- Collecteurs ---
+
+def register_cache(name, cache, registry=REGISTRY):
+    """Exports the hits / misses (/ coalesced) counters of a cache object at each rendering."""
+    def collect():
+        for attribute in ('hits', 'misses', 'coalesced'):
+            if hasattr(cache, attribute):
+                yield (f'crypto_cache_{attribute}_total', 'counter', f"Cache : {attribute}",
+                       [({'cache': name}, getattr(cache, attribute))])
+    registry.add_collector(collect)
+
+
+def cache_summary(caches):
+    """One dict per {name: cache}: hits, misses, coalesced and hit rate (%)."""
+    rows = []
+    for name, cache in caches.items():
+        hits, misses, coalesced = cache.hits, cache.misses, getattr(cache, 'coalesced', 0)
+        total = hits + misses + coalesced
+        rows.append({
+            'cache': name, 'hits': hits, 'misses': misses, 'coalesced': coalesced,
+            'hit_rate': (hits + coalesced) / total * 100 if total else None,
+        })
+    return rows
+
+
+def register_pool(pool, registry=REGISTRY):
+    """Exports the per-venue statistics of an ExchangePool at each rendering."""
+    def collect():
+        stats = pool.stats()
+        yield ('crypto_venue_up', 'gauge', "Place disponible (1) ou mise de cote (0)",
+               [({'venue': row['venue']}, int(row['healthy'])) for row in stats])
+        yield ('crypto_venue_requests_total', 'counter', "Requetes envoyees a la place",
+               [({'venue': row['venue']}, row['requests']) for row in stats])
+        yield ('crypto_venue_errors_total', 'counter', "Requetes en echec",
+               [({'venue': row['venue']}, row['errors']) for row in stats])
+        yield ('crypto_venue_latency_seconds', 'gauge', "Latence moyenne mobile de la place",
+               [({'venue': row['venue']}, row['latency_ms'] / 1000 if row['latency_ms'] is not None else None)
+                for row in stats])
+    registry.add_collector(collect)
+
+
+# --- Export HTTP ---
+
+def start_http_server(port, host='127.0.0.1', registry=REGISTRY):
+    """Serves registry.render() on http://host:port/metrics from a daemon thread; returns the server."""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Pas de ligne de log par collecte Prometheus
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    logger.info(f"Metriques exposees sur http://{host}:{server.server_port}/metrics")
+    return server
@@ -0,0 +1,121 @@
+"""Parameter sweep over the RSI thresholds and period.
+
+The RSI is computed once per period in the parent process and shipped to
+each worker once (pool initializer); tasks then only carry the threshold
+pairs to evaluate with the array-level backtest, under the execution model
+(fees, slippage, sizing) of the sweep.
+"""
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core.backtest import DEFAULT_EXECUTION, backtest_arrays
+from core.indicators import rsi
+
+OVERSOLD_RANGE = range(10, 41)
+OVERBOUGHT_RANGE = range(60, 91)
+PERIODS = (7, 10, 14, 21, 28)
+RESULT_COLUMNS = ['RSI Période', 'Survente', 'Surachat', 'Profit %', 'Valeur Finale', 'Trades']
+
+# Etat des workers, rempli une seule fois par _init_worker
+_WORKER_CLOSE = None
+_WORKER_OPEN = None
+_WORKER_RSI = None
+
+
+def _init_worker(close, open_, rsi_by_period):
+    global _WORKER_CLOSE, _WORKER_OPEN, _WORKER_RSI
+    _WORKER_CLOSE = close
+    _WORKER_OPEN = open_
+    _WORKER_RSI = rsi_by_period
+
+
+def evaluate_grid(close, open_, rsi_by_period, combos, start_balance, model=DEFAULT_EXECUTION):
+    """Result rows (see RESULT_COLUMNS) of the given (period, oversold, overbought) combinations."""
+    rows = []
+    trimmed = {}
+    for period, rsi_oversold, rsi_overbought in combos:
+        if period not in trimmed:
+            rsi_values = rsi_by_period[period]
+            valid = ~np.isnan(rsi_values)
+            trimmed[period] = close[valid], rsi_values[valid], open_[valid] if open_ is not None else None
+        close_values, rsi_values, open_values = trimmed[period]
+        final_value, trade_count, _, _ = backtest_arrays(
+            close_values, rsi_values, rsi_oversold, rsi_overbought, start_balance, model, open_values
+        )
+        profit_percent = (final_value - start_balance) / start_balance * 100 if start_balance > 0 else 0.0
+        rows.append((period, rsi_oversold, rsi_overbought, profit_percent, final_value, trade_count))
+    return rows
+
+
+def _evaluate_in_worker(combos, start_balance, model):
+    return evaluate_grid(_WORKER_CLOSE, _WORKER_OPEN, _WORKER_RSI, combos, start_balance, model)
+
+
+def parameter_grid(oversold_values=OVERSOLD_RANGE, overbought_values=OVERBOUGHT_RANGE, periods=PERIODS,
+                   n_samples=None, seed=None):
+    """Returns the (period, oversold, overbought) combinations to evaluate.
+
+    With n_samples set, a random subset of the grid is drawn instead (random
+    search).
+    """
+    combos = [
+        (period, rsi_oversold, rsi_overbought)
+        for period, rsi_oversold, rsi_overbought in itertools.product(periods, oversold_values, overbought_values)
+        if rsi_oversold < rsi_overbought
+    ]
+    if n_samples is not None and n_samples < len(combos):
+        combos = sorted(random.Random(seed).sample(combos, n_samples))
+    return combos
+
+
+def sweep(df, start_balance=1000.0, oversold_values=OVERSOLD_RANGE, overbought_values=OVERBOUGHT_RANGE,
+          periods=PERIODS, n_samples=None, seed=None, max_workers=None, model=DEFAULT_EXECUTION):
+    """Backtests every threshold/period combination on the 'close' column.
+
+    The 'open' column is also used with next-open fills. Returns the results
+    ranked by profit, best first. max_workers=1 runs everything in the
+    current process.
+    """
+    combos = parameter_grid(oversold_values, overbought_values, periods, n_samples, seed)
+    if df.empty or not combos:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    close = df['close'].to_numpy(dtype=np.float64)
+    open_ = df['open'].to_numpy(dtype=np.float64) if model.fill == 'next_open' else None
+    rsi_by_period = {
+        period: rsi(df['close'], period).to_numpy(dtype=np.float64)
+        for period in sorted({combo[0] for combo in combos})
+    }
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1:
+        rows = evaluate_grid(close, open_, rsi_by_period, combos, start_balance, model)
+    else:
+        chunk_size = max(1, len(combos) // (max_workers * 4))
+        chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(close, open_, rsi_by_period)) as pool:
+            rows = list(itertools.chain.from_iterable(
+                pool.map(_evaluate_in_worker, chunks, itertools.repeat(start_balance), itertools.repeat(model))
+            ))
+
+    results = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    return results.sort_values(['Profit %', 'Trades'], ascending=[False, True], ignore_index=True)
+
+
+def profit_heatmap(results, period=None):
+    """Pivots the sweep results into a Survente x Surachat grid of profit %.
+
+    Defaults to the period of the best-ranked combination.
+    """
+    if results.empty:
+        return pd.DataFrame()
+    if period is None:
+        period = results['RSI Période'].iloc[0]
+    subset = results[results['RSI Période'] == period]
+    return subset.pivot(index='Survente', columns='Surachat', values='Profit %').sort_index()
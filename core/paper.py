@@ -0,0 +1,394 @@
+"""Event-driven paper trading of the strategy signals.
+
+A PaperEngine consumes events from an asyncio queue:
+
+- CandleEvent, a closed candle: fills the orders waiting in the book for
+  that (symbol, timeframe) and marks the position to market;
+- SignalEvent, the signal evaluated on that candle: buys when flat, sells
+  the whole position when long (long-only, like the backtest).
+
+Orders follow the backtest's ExecutionModel: fees (maker or taker),
+slippage, fraction or notional sizing, and a fill at the signal close or
+at the next open. With next-open fills, market orders wait in the book for
+the next candle of their pair; limit orders rest at the signal price until
+a candle trades through it. Fed with the same candles and signals, market
+orders reproduce backtest.backtest_signal.
+
+Every (symbol, timeframe) trades its own position. With pairs, the capital
+is allocated up front: each listed pair gets an equal share of
+start_balance as its own cash, its orders are sized on that cash only, and
+its results can be compared with the backtest of that pair alone. Without
+pairs, every pair draws on one shared cash account (fine for a single
+pair; with several, the first pair to buy takes most of the cash). The
+state (cash, allocations, positions, book, latest fills) lives in memory
+and is snapshotted atomically to JSON every snapshot_every seconds and
+when the engine stops; it is reloaded at start.
+"""
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from collections import deque, namedtuple
+
+from core.backtest import DEFAULT_EXECUTION
+from core.signals import SIGNAL_BUY, SIGNAL_SELL
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.environ.get(
+    'PAPER_STATE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'paper_state.json'),
+)
+SNAPSHOT_EVERY_S = 60.0
+MAX_FILLS = 1000
+
+CandleEvent = namedtuple('CandleEvent', ['symbol', 'timeframe', 'timestamp', 'open', 'high', 'low', 'close'])
+SignalEvent = namedtuple('SignalEvent', ['symbol', 'timeframe', 'timestamp', 'signal', 'price'])
+
+
+class Order:
+    """Paper order; status goes from 'open' to 'filled' or 'cancelled'."""
+
+    __slots__ = ('id', 'symbol', 'timeframe', 'side', 'order_type', 'price', 'created', 'status',
+                 'fill_price', 'filled_at', 'quantity', 'fee')
+
+    def __init__(self, id, symbol, timeframe, side, order_type, price, created, status='open',
+                 fill_price=None, filled_at=None, quantity=0.0, fee=0.0):
+        self.id = id
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.side = side
+        self.order_type = order_type
+        self.price = price
+        self.created = created
+        self.status = status
+        self.fill_price = fill_price
+        self.filled_at = filled_at
+        self.quantity = quantity
+        self.fee = fee
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Position:
+    """Open quantity and cost (fees included) of a pair, with its realized results."""
+
+    __slots__ = ('quantity', 'cost', 'opened_at', 'realized', 'fees', 'round_trips', 'wins')
+
+    def __init__(self, quantity=0.0, cost=0.0, opened_at=None, realized=0.0, fees=0.0, round_trips=0, wins=0):
+        self.quantity = quantity
+        self.cost = cost
+        self.opened_at = opened_at
+        self.realized = realized
+        self.fees = fees
+        self.round_trips = round_trips
+        self.wins = wins
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _pair_key(symbol, timeframe):
+    return f"{symbol}|{timeframe}"
+
+
+def _split_key(key):
+    symbol, timeframe = key.split('|')
+    return symbol, timeframe
+
+
+class PaperEngine:
+    """Paper account fed by CandleEvent / SignalEvent (see module docstring)."""
+
+    def __init__(self, model=DEFAULT_EXECUTION, start_balance=1000.0, path=DEFAULT_PATH,
+                 snapshot_every=SNAPSHOT_EVERY_S, max_fills=MAX_FILLS, pairs=None):
+        self.model = model
+        self.start_balance = float(start_balance)
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.cash = self.start_balance
+        # Capital alloue et cash disponible par paire (vides : un seul compte partage)
+        keys = list(dict.fromkeys(_pair_key(symbol, timeframe) for symbol, timeframe in pairs or ()))
+        self.allocations = {key: self.start_balance / len(keys) for key in keys}
+        self.pair_cash = dict(self.allocations)
+        self._unallocated = set()
+        self.positions = {}
+        self.book = {}
+        self.fills = deque(maxlen=max_fills)
+        self.last_prices = {}
+        self.event_count = 0
+        self.queue = asyncio.Queue()
+        self._next_order_id = 1
+        self._stopping = False
+
+    # --- Evenements ---
+
+    def submit(self, event):
+        """Queues an event for run() (non-blocking, callable from the event loop)."""
+        self.queue.put_nowait(event)
+
+    def process(self, event):
+        """Applies one event synchronously."""
+        self.event_count += 1
+        if isinstance(event, CandleEvent):
+            self._on_candle(event)
+        elif isinstance(event, SignalEvent):
+            self._on_signal(event)
+        else:
+            raise TypeError(f"Evenement inconnu : {event!r}")
+
+    async def run(self):
+        """Consumes the queue until stop(); snapshots periodically and on exit."""
+        next_snapshot = time.monotonic() + self.snapshot_every
+        try:
+            while True:
+                event = await self.queue.get()
+                # Les evenements deja en file sont traites sans repasser par la boucle asyncio
+                while event is not None:
+                    self.process(event)
+                    try:
+                        event = self.queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                if event is None:
+                    break
+                if self.path and time.monotonic() >= next_snapshot:
+                    self.snapshot()
+                    next_snapshot = time.monotonic() + self.snapshot_every
+        finally:
+            if self.path:
+                self.snapshot()
+
+    def stop(self):
+        """Ends run() once the events already queued are processed."""
+        self.submit(None)
+
+    def _on_candle(self, event):
+        key = _pair_key(event.symbol, event.timeframe)
+        order = self.book.get(key)
+        if order is not None and event.timestamp > order.created:
+            price = self._trigger_price(order, event)
+            if price is not None:
+                self._fill(key, order, price, event.timestamp)
+        self.last_prices[key] = event.close
+
+    def _trigger_price(self, order, candle):
+        if order.order_type == 'market':
+            # Ordre au marche en attente : execute a l'ouverture, slippage compris
+            slippage = self.model.slippage
+            return candle.open * (1 + slippage if order.side == 'buy' else 1 - slippage)
+        # Ordre limite : execute si la bougie traverse le prix, au prix limite ou mieux (ecart a l'ouverture)
+        if order.side == 'buy' and candle.low <= order.price:
+            return min(candle.open, order.price)
+        if order.side == 'sell' and candle.high >= order.price:
+            return max(candle.open, order.price)
+        return None
+
+    def _on_signal(self, event):
+        side = 'buy' if event.signal == SIGNAL_BUY else 'sell' if event.signal == SIGNAL_SELL else None
+        key = _pair_key(event.symbol, event.timeframe)
+        self.last_prices[key] = event.price
+        if side is None:
+            return
+        if self.allocations and key not in self.allocations:
+            if key not in self._unallocated:
+                self._unallocated.add(key)
+                logger.warning(f"Paper trading : aucun capital alloue a {event.symbol} ({event.timeframe}), signaux ignores")
+            return
+        pending = self.book.get(key)
+        if pending is not None:
+            if pending.side == side:
+                return
+            # Signal contraire avant execution : l'ordre en attente est annule
+            pending.status = 'cancelled'
+            del self.book[key]
+        position = self.positions.get(key)
+        is_long = position is not None and position.quantity > 0
+        if (side == 'buy') == is_long:
+            return
+
+        order = Order(self._next_order_id, event.symbol, event.timeframe, side, self.model.order_type,
+                      event.price, event.timestamp)
+        self._next_order_id += 1
+        if self.model.fill == 'close':
+            slippage = self.model.slippage
+            self._fill(key, order, event.price * (1 + slippage if side == 'buy' else 1 - slippage), event.timestamp)
+        else:
+            self.book[key] = order
+
+    def _fill(self, key, order, price, timestamp):
+        self.book.pop(key, None)
+        fee_rate = self.model.fee
+        position = self.positions.get(key)
+        if position is None:
+            position = self.positions[key] = Position()
+        if order.side == 'buy':
+            cash = self.pair_cash.get(key, self.cash)
+            if self.model.sizing == 'fraction':
+                spent = self.model.fraction * cash
+            else:
+                spent = min(self.model.notional, cash)
+            if spent <= 0:
+                order.status = 'cancelled'
+                return
+            order.quantity = spent * (1 - fee_rate) / price
+            order.fee = spent * fee_rate
+            self.cash -= spent
+            if key in self.pair_cash:
+                self.pair_cash[key] -= spent
+            position.quantity += order.quantity
+            position.cost += spent
+            position.opened_at = timestamp
+        else:
+            order.quantity = position.quantity
+            gross = order.quantity * price
+            order.fee = gross * fee_rate
+            proceeds = gross - order.fee
+            self.cash += proceeds
+            if key in self.pair_cash:
+                self.pair_cash[key] += proceeds
+            pnl = proceeds - position.cost
+            position.realized += pnl
+            position.round_trips += 1
+            position.wins += pnl > 0
+            position.quantity = 0.0
+            position.cost = 0.0
+            position.opened_at = None
+        position.fees += order.fee
+        order.status = 'filled'
+        order.fill_price = price
+        order.filled_at = timestamp
+        self.fills.append(order)
+
+    # --- Etat et rapports ---
+
+    def equity(self):
+        """Cash plus the open positions valued at their last price."""
+        return self.cash + sum(
+            position.quantity * self.last_prices.get(key, 0.0) for key, position in self.positions.items()
+        )
+
+    def open_positions(self):
+        """One dict per open position, with its unrealized PnL."""
+        rows = []
+        for key, position in self.positions.items():
+            if position.quantity <= 0:
+                continue
+            symbol, timeframe = _split_key(key)
+            price = self.last_prices.get(key, 0.0)
+            value = position.quantity * price
+            rows.append({
+                'symbol': symbol, 'timeframe': timeframe, 'quantity': position.quantity,
+                'entry_price': position.cost / position.quantity, 'price': price, 'value': value,
+                'unrealized': value - position.cost, 'unrealized_percent': (value / position.cost - 1) * 100,
+                'opened_at': position.opened_at,
+            })
+        return rows
+
+    def pnl(self):
+        """Account totals and per-pair results, as a dict.
+
+        With allocated capital, each pair also reports its allocation, its
+        equity (cash plus position) and its return on that allocation.
+        """
+        pairs = []
+        for key in sorted(set(self.positions) | set(self.allocations)):
+            position = self.positions.get(key) or Position()
+            symbol, timeframe = _split_key(key)
+            value = position.quantity * self.last_prices.get(key, 0.0) if position.quantity > 0 else 0.0
+            unrealized = value - position.cost if position.quantity > 0 else 0.0
+            row = {
+                'symbol': symbol, 'timeframe': timeframe, 'realized': position.realized, 'unrealized': unrealized,
+                'fees': position.fees, 'round_trips': position.round_trips, 'wins': position.wins,
+            }
+            if key in self.allocations:
+                allocated = self.allocations[key]
+                equity = self.pair_cash[key] + value
+                row.update(allocated=allocated, equity=equity,
+                           return_percent=(equity / allocated - 1) * 100 if allocated else 0.0)
+            pairs.append(row)
+        equity = self.equity()
+        round_trips = sum(pair['round_trips'] for pair in pairs)
+        return {
+            'start_balance': self.start_balance, 'cash': self.cash, 'equity': equity,
+            'return_percent': (equity / self.start_balance - 1) * 100 if self.start_balance else 0.0,
+            'realized': sum(pair['realized'] for pair in pairs),
+            'unrealized': sum(pair['unrealized'] for pair in pairs),
+            'fees': sum(pair['fees'] for pair in pairs),
+            'round_trips': round_trips,
+            'win_rate': sum(pair['wins'] for pair in pairs) / round_trips * 100 if round_trips else None,
+            'open_orders': len(self.book), 'events': self.event_count, 'pairs': pairs,
+        }
+
+    def snapshot(self, path=None):
+        """Writes the state atomically (temporary file + rename)."""
+        path = path or self.path
+        data = {
+            'saved_at': int(time.time() * 1000),
+            'start_balance': self.start_balance,
+            'cash': self.cash,
+            'allocations': self.allocations,
+            'pair_cash': self.pair_cash,
+            'events': self.event_count,
+            'next_order_id': self._next_order_id,
+            'positions': {key: position.to_dict() for key, position in self.positions.items()},
+            'book': {key: order.to_dict() for key, order in self.book.items()},
+            'fills': [order.to_dict() for order in self.fills],
+            'last_prices': self.last_prices,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump(data, handle, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path=None):
+        """Restores a snapshot; returns False (state untouched) if there is none or it is invalid."""
+        path = path or self.path
+        try:
+            with open(path, encoding='utf-8') as handle:
+                data = json.load(handle)
+            positions = {key: Position(**value) for key, value in data['positions'].items()}
+            book = {key: Order(**value) for key, value in data['book'].items()}
+            fills = [Order(**value) for value in data['fills']]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            if os.path.exists(path):
+                logger.warning(f"Etat de paper trading illisible ({path}) : {e}")
+            return False
+        self.start_balance = float(data['start_balance'])
+        self.cash = float(data['cash'])
+        # Les allocations font partie de l'etat : celles de l'engine ne s'appliquent qu'a un nouveau compte
+        self.allocations = {key: float(value) for key, value in data.get('allocations', {}).items()}
+        self.pair_cash = {key: float(value) for key, value in data.get('pair_cash', {}).items()}
+        self.event_count = int(data.get('events', 0))
+        self._next_order_id = int(data.get('next_order_id', 1))
+        self.positions = positions
+        self.book = book
+        self.fills.clear()
+        self.fills.extend(fills)
+        self.last_prices = dict(data.get('last_prices', {}))
+        return True
+
+
+def replay_events(frames, strategy):
+    """CandleEvent / SignalEvent stream of recorded candles, all pairs merged by time.
+
+    frames maps (symbol, timeframe) to OHLCV frames. The strategy is
+    compiled once per frame: its indicators only look backwards, so each
+    signal is the one the alerts would have computed when the candle closed.
+    Only buy and sell signals are emitted.
+    """
+    def pair_events(symbol, timeframe, df):
+        signal = strategy.compile(df)
+        timestamps = df.index.as_unit('ms').asi8.tolist()
+        columns = [df[name].to_numpy().tolist() for name in ('open', 'high', 'low', 'close')]
+        for row, (timestamp, open_, high, low, close) in enumerate(zip(timestamps, *columns)):
+            yield CandleEvent(symbol, timeframe, timestamp, open_, high, low, close)
+            if signal[row]:
+                yield SignalEvent(symbol, timeframe, timestamp, SIGNAL_BUY if signal[row] == 1 else SIGNAL_SELL, close)
+
+    streams = [pair_events(symbol, timeframe, df) for (symbol, timeframe), df in frames.items()]
+    return heapq.merge(*streams, key=lambda event: event.timestamp)
@@ -0,0 +1,258 @@
+"""Pool of exchange clients: latency routing, retries with backoff, failover.
+
+ExchangePool holds several venues (ccxt ids or already built clients) and
+exposes the exchange interface of core.exchange, so it can be passed
+wherever an exchange is expected. Each call for a symbol goes to the
+fastest healthy venue listing it, as measured by an exponential moving
+average of its response times; venues never measured yet are tried first.
+
+A failed call is retried on the same venue with exponential backoff, then
+the next venue takes over. A venue failing FAILURE_THRESHOLD times in a
+row, or rate-limiting us, is set aside for COOLDOWN_S seconds; it is only
+tried again after that, or as a last resort when every other venue fails.
+Errors about the request itself (unknown symbol, ...) move on to the next
+venue without counting against the venue's health.
+
+With core.data.get_ohlcv_data, every venue keeps its own series in the
+candle store: candles of different venues are never mixed in a series.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from core.exchange import get_exchange
+
+logger = logging.getLogger(__name__)
+
+# Places interrogees par ordre de preference initial (variable d'environnement EXCHANGES)
+DEFAULT_VENUES = [venue.strip() for venue in os.environ.get('EXCHANGES', 'coinbase,kraken').split(',') if venue.strip()]
+RETRIES = 2
+BACKOFF_S = 0.5
+MAX_BACKOFF_S = 8.0
+FAILURE_THRESHOLD = 3
+COOLDOWN_S = 60.0
+EWMA_ALPHA = 0.2
+LATENCY_SAMPLES = 200
+
+# Noms des classes d'erreurs ccxt (ccxt n'est pas importe ici)
+REQUEST_ERRORS = ('BadSymbol', 'BadRequest', 'NotSupported', 'ArgumentsRequired')
+RATE_LIMIT_ERRORS = ('RateLimitExceeded', 'DDoSProtection')
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _error_kind(error):
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names.intersection(REQUEST_ERRORS):
+        return 'request'
+    if names.intersection(RATE_LIMIT_ERRORS):
+        return 'rate_limit'
+    return 'venue'
+
+
+class VenueStats:
+    """Response times and errors of one venue."""
+
+    __slots__ = ('requests', 'errors', 'consecutive_errors', 'latency', 'samples', 'down_until', 'last_error')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.latency = None
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+        self.down_until = 0.0
+        self.last_error = None
+
+
+class ExchangePool:
+    """Routes the calls of each symbol to the fastest healthy venue (see module docstring).
+
+    venues are ccxt ids (clients created on first use through get_exchange)
+    or client objects. sleep and clock can be replaced for offline runs.
+    """
+
+    id = 'pool'
+
+    def __init__(self, venues=None, retries=RETRIES, backoff=BACKOFF_S, max_backoff=MAX_BACKOFF_S,
+                 failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN_S, sleep=time.sleep, clock=time.monotonic):
+        venues = DEFAULT_VENUES if venues is None else venues
+        if not venues:
+            raise ValueError("Le pool doit contenir au moins une place de marche")
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.sleep = sleep
+        self.clock = clock
+        self._clients = {}
+        self._venues = []
+        for venue in venues:
+            venue_id = venue if isinstance(venue, str) else venue.id
+            if not isinstance(venue, str):
+                self._clients[venue_id] = venue
+            self._venues.append(venue_id)
+        self._stats = {venue_id: VenueStats() for venue_id in self._venues}
+        self.routes = {}
+        self._lock = threading.Lock()
+
+    @property
+    def venues(self):
+        return list(self._venues)
+
+    def client(self, venue_id):
+        """Client of a venue, created (markets loaded) on first use."""
+        if venue_id not in self._clients:
+            client = get_exchange(venue_id)
+            with self._lock:
+                self._clients.setdefault(venue_id, client)
+        return self._clients[venue_id]
+
+    def route(self, symbol):
+        """Client of the venue preferred for symbol: the last one that served it, else the best candidate."""
+        return self.client(self.routes.get(symbol) or self.candidates(symbol)[0])
+
+    def _lists(self, venue_id, symbol):
+        markets = getattr(self._clients.get(venue_id), 'markets', None)
+        return not markets or symbol in markets
+
+    def candidates(self, symbol):
+        """Venues to try for symbol, best first: healthy ones by latency, then those set aside."""
+        now = self.clock()
+        with self._lock:
+            stats = dict(self._stats)
+        healthy, resting = [], []
+        for rank, venue_id in enumerate(self._venues):
+            if not self._lists(venue_id, symbol):
+                continue
+            venue = stats[venue_id]
+            # Jamais mesuree : essayee en premier pour connaitre sa latence
+            key = (venue.latency is not None, venue.latency or 0.0, rank)
+            (healthy if venue.down_until <= now else resting).append((key, venue_id))
+        return [venue_id for _, venue_id in sorted(healthy)] + [venue_id for _, venue_id in sorted(resting)]
+
+    def call(self, symbol, func):
+        """func(client) on the best venue for symbol, with retries and failover.
+
+        Returns func's result; the last error is re-raised when every venue fails.
+        """
+        last_error = None
+        candidates = self.candidates(symbol)
+        if not candidates:
+            raise ValueError(f"{symbol} : paire cotee sur aucune place du pool ({', '.join(self._venues)})")
+        for venue_id in candidates:
+            for attempt in range(self.retries + 1):
+                start = self.clock()
+                try:
+                    result = func(self.client(venue_id))
+                except Exception as e:
+                    last_error = e
+                    kind = _error_kind(e)
+                    # Place mise de cote (seuil d'echecs ou limite de debit) : inutile d'insister
+                    if not self._record_error(venue_id, e, kind) or kind != 'venue' or attempt == self.retries:
+                        break
+                    delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+                    logger.warning(f"{venue_id} : echec pour {symbol} ({e}), nouvel essai dans {delay:.1f} s")
+                    self.sleep(delay)
+                    continue
+                self._record_success(venue_id, self.clock() - start)
+                self.routes[symbol] = venue_id
+                return result
+            if len(candidates) > 1:
+                logger.warning(f"{venue_id} indisponible pour {symbol} ({last_error}), bascule sur la place suivante")
+        raise last_error
+
+    def _record_success(self, venue_id, elapsed):
+        with self._lock:
+            venue = self._stats[venue_id]
+            venue.requests += 1
+            venue.consecutive_errors = 0
+            venue.down_until = 0.0
+            venue.samples.append(elapsed)
+            venue.latency = elapsed if venue.latency is None else venue.latency + EWMA_ALPHA * (elapsed - venue.latency)
+
+    def _record_error(self, venue_id, error, kind):
+        """Counts a failed call; returns False when the venue is now set aside."""
+        with self._lock:
+            venue = self._stats[venue_id]
+            venue.requests += 1
+            venue.last_error = f"{type(error).__name__}: {error}"
+            if kind == 'request':
+                return True
+            venue.errors += 1
+            venue.consecutive_errors += 1
+            # Apres une mise a l'ecart, un seul nouvel echec suffit a la prolonger
+            if kind == 'rate_limit' or venue.consecutive_errors >= self.failure_threshold:
+                venue.down_until = self.clock() + self.cooldown
+                return False
+            return True
+
+    def stats(self):
+        """One dict per venue: requests, errors, latency (EWMA, p50, p95, in ms) and health."""
+        now = self.clock()
+        rows = []
+        with self._lock:
+            for venue_id in self._venues:
+                venue = self._stats[venue_id]
+                samples = sorted(venue.samples)
+
+                def percentile(q):
+                    return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000 if samples else None
+
+                rows.append({
+                    'venue': venue_id,
+                    'healthy': venue.down_until <= now,
+                    'requests': venue.requests,
+                    'errors': venue.errors,
+                    'error_rate': venue.errors / venue.requests * 100 if venue.requests else 0.0,
+                    'latency_ms': venue.latency * 1000 if venue.latency is not None else None,
+                    'p50_ms': percentile(0.5),
+                    'p95_ms': percentile(0.95),
+                    'symbols': sum(1 for routed in self.routes.values() if routed == venue_id),
+                    'last_error': venue.last_error,
+                })
+        return rows
+
+    # --- Interface exchange (core.exchange) ---
+
+    def connect(self):
+        """Creates every venue client now (markets loaded); unreachable venues are logged and skipped."""
+        for venue_id in self._venues:
+            try:
+                self.client(venue_id)
+            except Exception as e:
+                logger.warning(f"{venue_id} : connexion impossible ({e})")
+                self._record_error(venue_id, e, 'venue')
+        return self
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        return self.call(symbol, lambda client: client.fetch_ohlcv(symbol, timeframe, since=since, limit=limit))
+
+    def milliseconds(self):
+        return int(time.time() * 1000)
+
+    @property
+    def rateLimit(self):
+        # Chaque client ccxt se limite lui-meme : le pool suit le rythme de la place la plus permissive
+        return min((getattr(client, 'rateLimit', 0) or 0 for client in self._clients.values()), default=0)
+
+    @property
+    def markets(self):
+        """Markets of the venues created so far (the first venue listing a symbol wins)."""
+        markets = {}
+        for venue_id in reversed(self._venues):
+            markets.update(getattr(self._clients.get(venue_id), 'markets', None) or {})
+        return markets
+
+
+def get_pool(venues=None):
+    """Process-wide pool of the given venues (DEFAULT_VENUES by default)."""
+    key = tuple(DEFAULT_VENUES if venues is None else venues)
+    with _POOLS_LOCK:
+        if key not in _POOLS:
+            _POOLS[key] = ExchangePool(list(key))
+        return _POOLS[key]
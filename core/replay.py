@@ -0,0 +1,170 @@
+"""Offline stand-ins for the exchange clients, replaying recorded data.
+
+ReplayExchange answers REST candle requests (ccxt), ReplayStream pushes
+trades like a websocket client (ccxt.pro). FaultyExchange adds latency and
+errors to any of them.
+"""
+import asyncio
+import csv
+import random
+import time
+
+
+class ReplayExchange:
+    """Answers fetch_ohlcv from recorded candles instead of the network.
+
+    candles maps (symbol, timeframe) to lists of [timestamp, open, high, low,
+    close, volume] rows. Only candles opened before the replay clock (`now`,
+    in ms) are visible, so advancing the clock replays the feed. Every call
+    is recorded in `calls` to count exchange round-trips.
+    """
+
+    id = 'replay'
+
+    def __init__(self, candles, now=None, max_limit=300):
+        self.candles = {key: sorted(rows) for key, rows in candles.items()}
+        self.max_limit = max_limit
+        self.calls = []
+        if now is None:
+            now = max((rows[-1][0] for rows in self.candles.values() if rows), default=0) + 1
+        self.now = now
+
+    @classmethod
+    def from_csv(cls, paths, **kwargs):
+        """Loads recorded candles from {(symbol, timeframe): csv_path}.
+
+        The CSV files have a header and the columns timestamp (ms), open,
+        high, low, close, volume.
+        """
+        candles = {}
+        for key, path in paths.items():
+            with open(path, newline='') as handle:
+                reader = csv.reader(handle)
+                next(reader)
+                candles[key] = [[int(row[0])] + [float(value) for value in row[1:6]] for row in reader]
+        return cls(candles, **kwargs)
+
+    def milliseconds(self):
+        return self.now
+
+    def advance(self, ms):
+        self.now += ms
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        self.calls.append((symbol, timeframe, since, limit))
+        if (symbol, timeframe) not in self.candles:
+            raise ValueError(f"{symbol} {timeframe} : paire inconnue")
+        limit = min(limit or self.max_limit, self.max_limit)
+        rows = [row for row in self.candles[(symbol, timeframe)] if row[0] < self.now]
+        if since is not None:
+            rows = [row for row in rows if row[0] >= since][:limit]
+        else:
+            rows = rows[-limit:]
+        return [list(row) for row in rows]
+
+
+def candles_to_trades(rows, trades_per_candle=4):
+    """Synthetic trades walking each candle open -> low/high -> close.
+
+    Lets the live mode be replayed from candle fixtures when no trade
+    recording is available.
+    """
+    step = rows[1][0] - rows[0][0] if len(rows) > 1 else 60 * 1000
+    trades = []
+    for timestamp, open_, high, low, close, volume in rows:
+        path = [open_, low, high, close] if close >= open_ else [open_, high, low, close]
+        for i in range(trades_per_candle):
+            price = path[min(3, round(3 * i / max(1, trades_per_candle - 1)))]
+            trades.append([int(timestamp + i * step // trades_per_candle), price, volume / trades_per_candle])
+    return trades
+
+
+class ReplayStream:
+    """Answers watch_trades from recorded trades instead of a websocket.
+
+    trades maps symbol to lists of [timestamp, price, amount] rows. Each
+    watch_trades call resolves with the trades of the next batch_ms window.
+    With speed (e.g. 60 for one recorded minute per second), calls wait like
+    a live socket would; without it the feed is replayed as fast as
+    possible. At the end of the recording watch_trades raises EOFError.
+    """
+
+    id = 'replay'
+
+    def __init__(self, trades, speed=None, batch_ms=1000):
+        self.trades = {symbol: sorted(rows) for symbol, rows in trades.items()}
+        self.speed = speed
+        self.batch_ms = batch_ms
+        self._cursors = {symbol: 0 for symbol in self.trades}
+
+    @classmethod
+    def from_csv(cls, paths, **kwargs):
+        """Loads recorded trades from {symbol: csv_path} (header, then timestamp (ms), price, amount)."""
+        trades = {}
+        for symbol, path in paths.items():
+            with open(path, newline='') as handle:
+                reader = csv.reader(handle)
+                next(reader)
+                trades[symbol] = [[int(row[0]), float(row[1]), float(row[2])] for row in reader]
+        return cls(trades, **kwargs)
+
+    async def watch_trades(self, symbol, since=None, limit=None, params=None):
+        if symbol not in self.trades:
+            raise ValueError(f"{symbol} : paire inconnue")
+        rows, start = self.trades[symbol], self._cursors[symbol]
+        if start >= len(rows):
+            raise EOFError(f"{symbol} : fin du flux enregistre")
+        end = start
+        window_end = rows[start][0] + self.batch_ms
+        while end < len(rows) and rows[end][0] < window_end:
+            end += 1
+        self._cursors[symbol] = end
+        if self.speed:
+            await asyncio.sleep(self.batch_ms / 1000 / self.speed)
+        else:
+            await asyncio.sleep(0)
+        return [
+            {'symbol': symbol, 'timestamp': timestamp, 'price': price, 'amount': amount}
+            for timestamp, price, amount in rows[start:end]
+        ]
+
+    async def close(self):
+        pass
+
+
+class FaultyExchange:
+    """Wraps an exchange with injected latency and errors, to exercise an ExchangePool offline.
+
+    delay is the added response time in seconds (a number, or a callable
+    returning one per call). fail_rate is the probability of a call failing
+    with error (an exception instance or class); fail_next makes the next n
+    calls fail whatever the rate. Calls and failures are counted.
+    """
+
+    def __init__(self, exchange, id, delay=0.0, fail_rate=0.0, fail_next=0, error=ConnectionError, seed=None,
+                 sleep=time.sleep):
+        self.exchange = exchange
+        self.id = id
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.fail_next = fail_next
+        self.error = error
+        self.sleep = sleep
+        self.calls = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+
+    def milliseconds(self):
+        return self.exchange.milliseconds()
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        self.calls += 1
+        delay = self.delay() if callable(self.delay) else self.delay
+        if delay:
+            self.sleep(delay)
+        if self.fail_next or self._random.random() < self.fail_rate:
+            self.fail_next = max(0, self.fail_next - 1)
+            self.failures += 1
+            error = self.error
+            raise error(f"{self.id} : erreur injectee") if isinstance(error, type) else error
+        return self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
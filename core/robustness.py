@@ -0,0 +1,237 @@
+"""Robustness runs of the RSI strategy: walk-forward and Monte-Carlo.
+
+- Walk-forward: the thresholds are optimized on a rolling training window
+  and traded, unchanged, on the window that follows; only the out-of-sample
+  results count.
+- Monte-Carlo: the strategy is replayed on resampled histories, either
+  synthetic price paths built from blocks of the real candle returns, or
+  random draws (with replacement) of the real round trips.
+
+Both run thousands of backtests on a process pool. The candles, the RSI of
+each period and the round trips are copied once into shared memory
+(core.shared.SharedArrays); workers attach to it in their initializer and
+tasks only carry window bounds or random seeds.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core.backtest import DEFAULT_EXECUTION, backtest_equity, backtest_trades, max_drawdown
+from core.indicators import RSI_PERIOD, rsi, rsi_matrix
+from core.optimizer import OVERBOUGHT_RANGE, OVERSOLD_RANGE, PERIODS, evaluate_grid, parameter_grid
+from core.shared import SharedArrays
+
+WALK_FORWARD_COLUMNS = ['Début Test', 'Fin Test', 'RSI Période', 'Survente', 'Surachat',
+                        'Profit Entraînement %', 'Rendement %', 'Drawdown Max %', 'Trades']
+MONTE_CARLO_COLUMNS = ['Simulation', 'Rendement %', 'Drawdown Max %', 'Trades']
+BOOTSTRAP_MODES = ('returns', 'trades')
+BLOCK_SIZE = 24
+SIMULATIONS_PER_TASK = 50
+SUMMARY_QUANTILES = {'P5': 0.05, 'P25': 0.25, 'Médiane': 0.5, 'P75': 0.75, 'P95': 0.95}
+
+# Etat des workers, rempli une seule fois par _init_worker
+_WORKER_SHM = None
+_WORKER_ARRAYS = None
+
+
+def _init_worker(spec):
+    global _WORKER_SHM, _WORKER_ARRAYS
+    _WORKER_SHM, _WORKER_ARRAYS = SharedArrays.attach(spec)
+
+
+def _run_in_worker(task, chunk, args):
+    return task(_WORKER_ARRAYS, chunk, *args)
+
+
+def _run_tasks(task, arrays, chunks, args, max_workers=None):
+    """Concatenated task(arrays, chunk, *args) rows of every chunk.
+
+    With several workers, arrays are placed in shared memory once for the
+    whole pool. max_workers=1 runs everything in the current process.
+    """
+    max_workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+    if max_workers <= 1:
+        return list(itertools.chain.from_iterable(task(arrays, chunk, *args) for chunk in chunks))
+    # Le pool est arrete avant la liberation du bloc partage (sortie des with en ordre inverse)
+    with SharedArrays(arrays) as shared, ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker, initargs=(shared.spec,),
+    ) as pool:
+        return list(itertools.chain.from_iterable(
+            pool.map(_run_in_worker, itertools.repeat(task), chunks, itertools.repeat(args))
+        ))
+
+
+# --- Walk-forward ---
+
+def walk_forward_windows(n_candles, train_size, test_size, step=None):
+    """(train_start, test_start, test_end) row bounds of the rolling windows.
+
+    step (default: test_size, i.e. contiguous test windows) is the shift
+    between two consecutive windows.
+    """
+    step = step or test_size
+    last_start = n_candles - train_size - test_size
+    return [(start, start + train_size, start + train_size + test_size) for start in range(0, last_start + 1, step)]
+
+
+def _walk_forward_task(arrays, windows, combos, start_balance, model):
+    close, open_ = arrays['close'], arrays.get('open')
+    periods = sorted({combo[0] for combo in combos})
+    rows = []
+    for train_start, test_start, test_end in windows:
+        train = slice(train_start, test_start)
+        results = evaluate_grid(
+            close[train], open_[train] if open_ is not None else None,
+            {period: arrays[f'rsi_{period}'][train] for period in periods}, combos, start_balance, model,
+        )
+        # Meilleur profit, a egalite le moins de trades (meme classement que sweep)
+        period, rsi_oversold, rsi_overbought, train_profit, _, _ = max(results, key=lambda row: (row[3], -row[5]))
+
+        test = slice(test_start, test_end)
+        rsi_values = arrays[f'rsi_{period}'][test]
+        valid = ~np.isnan(rsi_values)
+        equity, trade_count = backtest_equity(
+            close[test][valid], rsi_values[valid], rsi_oversold, rsi_overbought, start_balance, model,
+            open_[test][valid] if open_ is not None else None,
+        )
+        rows.append((test_start, test_end, period, rsi_oversold, rsi_overbought, train_profit,
+                     (equity[-1] / start_balance - 1) * 100, max_drawdown(equity) * 100, trade_count))
+    return rows
+
+
+def walk_forward(df, train_size, test_size, step=None, start_balance=1000.0, oversold_values=OVERSOLD_RANGE,
+                 overbought_values=OVERBOUGHT_RANGE, periods=PERIODS, model=DEFAULT_EXECUTION, max_workers=None):
+    """Optimizes the thresholds on each training window and tests them on the next one.
+
+    df needs 'close' ('open' for next-open fills). Windows are in candles;
+    the RSI is computed once on the whole series (it only looks backwards).
+    Returns one row per window (WALK_FORWARD_COLUMNS), with the test window
+    dates.
+    """
+    combos = parameter_grid(oversold_values, overbought_values, periods)
+    if combos and train_size <= max(combo[0] for combo in combos):
+        raise ValueError(f"Fenetre d'entrainement trop courte ({train_size} bougies) pour les periodes RSI choisies")
+    windows = walk_forward_windows(len(df), train_size, test_size, step)
+    if not combos or not windows:
+        return pd.DataFrame(columns=WALK_FORWARD_COLUMNS)
+
+    arrays = {'close': df['close'].to_numpy(dtype=np.float64)}
+    if model.fill == 'next_open':
+        arrays['open'] = df['open'].to_numpy(dtype=np.float64)
+    for period in sorted({combo[0] for combo in combos}):
+        arrays[f'rsi_{period}'] = rsi(df['close'], period).to_numpy(dtype=np.float64)
+
+    # Une fenetre par tache : chacune evalue toute la grille
+    chunks = [[window] for window in windows]
+    rows = _run_tasks(_walk_forward_task, arrays, chunks, (combos, start_balance, model), max_workers)
+
+    results = pd.DataFrame(rows, columns=WALK_FORWARD_COLUMNS)
+    results['Début Test'] = df.index[results['Début Test'].to_numpy()]
+    results['Fin Test'] = df.index[results['Fin Test'].to_numpy() - 1]
+    return results
+
+
+# --- Monte-Carlo ---
+
+def block_bootstrap_indices(rng, n_values, n_samples, block_size=BLOCK_SIZE):
+    """(n_samples x n_values) indices drawn as random contiguous blocks of block_size."""
+    block_size = max(1, min(block_size, n_values))
+    n_blocks = -(-n_values // block_size)
+    starts = rng.integers(0, n_values - block_size + 1, size=(n_samples, n_blocks))
+    return (starts[:, :, None] + np.arange(block_size)).reshape(n_samples, -1)[:, :n_values]
+
+
+def _bootstrap_returns_task(arrays, chunk, rsi_oversold, rsi_overbought, rsi_period, start_balance, model, block_size):
+    first, n_paths, seed = chunk
+    close = arrays['close']
+    log_returns = np.diff(np.log(close))
+    rng = np.random.default_rng(seed)
+    picks = block_bootstrap_indices(rng, len(log_returns), n_paths, block_size)
+
+    # Chemins synthetiques : memes blocs de rendements (et d'ecarts ouverture / cloture precedente)
+    paths = np.empty((n_paths, len(close)))
+    paths[:, 0] = close[0]
+    paths[:, 1:] = close[0] * np.exp(np.cumsum(log_returns[picks], axis=1))
+    opens = None
+    if 'open' in arrays:
+        gaps = np.log(arrays['open'][1:] / close[:-1])
+        opens = np.empty_like(paths)
+        opens[:, 0] = arrays['open'][0]
+        opens[:, 1:] = paths[:, :-1] * np.exp(gaps[picks])
+    rsi_paths = rsi_matrix(paths, rsi_period)
+
+    rows = []
+    for k in range(n_paths):
+        valid = ~np.isnan(rsi_paths[k])
+        equity, trade_count = backtest_equity(
+            paths[k][valid], rsi_paths[k][valid], rsi_oversold, rsi_overbought, start_balance, model,
+            opens[k][valid] if opens is not None else None,
+        )
+        rows.append((first + k, (equity[-1] / start_balance - 1) * 100, max_drawdown(equity) * 100, trade_count))
+    return rows
+
+
+def _bootstrap_trades_task(arrays, chunk):
+    first, n_paths, seed = chunk
+    multipliers = arrays['multipliers']
+    rng = np.random.default_rng(seed)
+    draws = multipliers[rng.integers(0, len(multipliers), size=(n_paths, len(multipliers)))]
+    equity = np.hstack((np.ones((n_paths, 1)), np.cumprod(draws, axis=1)))
+    drawdowns = (equity / np.maximum.accumulate(equity, axis=1) - 1).min(axis=1)
+    return [(first + k, (equity[k, -1] - 1) * 100, drawdowns[k] * 100, 2 * len(multipliers)) for k in range(n_paths)]
+
+
+def round_trip_multipliers(trades):
+    """Cash after each closed round trip divided by the cash before its buy."""
+    sell_balances = trades.balances[1::2]
+    cash_before = np.concatenate(([trades.capital], sell_balances))[:len(sell_balances)]
+    return sell_balances / cash_before
+
+
+def monte_carlo(df, rsi_oversold, rsi_overbought, n_simulations=1000, mode='returns', block_size=BLOCK_SIZE,
+                rsi_period=RSI_PERIOD, start_balance=1000.0, model=DEFAULT_EXECUTION, seed=None, max_workers=None):
+    """Return and drawdown distribution of the strategy over resampled histories.
+
+    mode 'returns' backtests synthetic price paths made of random blocks of
+    block_size candle returns (block bootstrap, keeping the short-term
+    autocorrelation the RSI feeds on). mode 'trades' draws the real round
+    trips with replacement and compounds them; its drawdown is measured
+    between round trips only. Results are reproducible for a given seed,
+    whatever the number of workers.
+    """
+    if mode not in BOOTSTRAP_MODES:
+        raise ValueError(f"Mode inconnu : {mode} (attendu : {', '.join(BOOTSTRAP_MODES)})")
+    if df.empty or n_simulations <= 0:
+        return pd.DataFrame(columns=MONTE_CARLO_COLUMNS)
+
+    if mode == 'returns':
+        arrays = {'close': df['close'].to_numpy(dtype=np.float64)}
+        if model.fill == 'next_open':
+            arrays['open'] = df['open'].to_numpy(dtype=np.float64)
+        task, args = _bootstrap_returns_task, (rsi_oversold, rsi_overbought, rsi_period, start_balance, model, block_size)
+    else:
+        frame = df.assign(RSI=rsi(df['close'], rsi_period)).dropna(subset=['RSI'])
+        trades = backtest_trades(frame, rsi_oversold, rsi_overbought, model,
+                                 1.0 if model.scale_invariant else start_balance)
+        arrays = {'multipliers': round_trip_multipliers(trades)}
+        if not len(arrays['multipliers']):
+            return pd.DataFrame(columns=MONTE_CARLO_COLUMNS)
+        task, args = _bootstrap_trades_task, ()
+
+    # Un flux aleatoire independant par tache (SeedSequence.spawn)
+    starts = range(0, n_simulations, SIMULATIONS_PER_TASK)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    chunks = [(first, min(SIMULATIONS_PER_TASK, n_simulations - first), child) for first, child in zip(starts, seeds)]
+    rows = _run_tasks(task, arrays, chunks, args, max_workers)
+    return pd.DataFrame(rows, columns=MONTE_CARLO_COLUMNS)
+
+
+def distribution_summary(results, columns=('Rendement %', 'Drawdown Max %')):
+    """Mean and quantiles of each column, one row per column."""
+    summary = pd.DataFrame({'Moyenne': results[list(columns)].mean()})
+    for label, q in SUMMARY_QUANTILES.items():
+        summary[label] = results[list(columns)].quantile(q)
+    return summary
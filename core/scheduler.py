@@ -0,0 +1,66 @@
+"""Candle-close aligned scheduling of the alert checks.
+
+Instead of polling on a fixed interval, the scheduler computes the next
+close of every watched (symbol, timeframe) and wakes up just after it
+(grace_ms later, to let the exchange finalise the candle). All pairs whose
+candle closes on the same boundary - e.g. 15m and 1h at the top of the
+hour - are returned together as one batch.
+
+Candles are aligned on the Unix epoch, as ccxt exchanges do for intraday
+and daily timeframes.
+"""
+import time
+
+from core.timeframes import timeframe_to_ms
+
+CLOSE_GRACE_MS = 5 * 1000
+
+
+def system_clock_ms():
+    return int(time.time() * 1000)
+
+
+def next_close(now_ms, timeframe_ms):
+    """Close time (ms) of the candle in progress at now_ms."""
+    return (now_ms // timeframe_ms + 1) * timeframe_ms
+
+
+class CandleCloseScheduler:
+    """Plans the wake-ups of the alert job for a set of (symbol, timeframe) pairs.
+
+    clock returns the current time in ms; pass a fake one to simulate time.
+    """
+
+    def __init__(self, watch, grace_ms=CLOSE_GRACE_MS, clock=system_clock_ms):
+        self.watch = list(watch)
+        self.grace_ms = grace_ms
+        self.clock = clock
+        self._timeframe_ms = {timeframe: timeframe_to_ms(timeframe) for _, timeframe in self.watch}
+
+    def next_wakeup(self, now_ms=None):
+        """Returns (wake_ms, batch): the next wake-up time and the pairs to check then."""
+        if now_ms is None:
+            now_ms = self.clock()
+        # Une bougie cloturee il y a moins de grace_ms n'a pas encore ete traitee
+        reference = now_ms - self.grace_ms
+        closes = {timeframe: next_close(reference, step) for timeframe, step in self._timeframe_ms.items()}
+        boundary = min(closes.values())
+        batch = [(symbol, timeframe) for symbol, timeframe in self.watch if closes[timeframe] == boundary]
+        return boundary + self.grace_ms, batch
+
+    def delay_seconds(self, now_ms=None):
+        """Returns (seconds until the next wake-up, batch)."""
+        if now_ms is None:
+            now_ms = self.clock()
+        wake_ms, batch = self.next_wakeup(now_ms)
+        return max(0.0, (wake_ms - now_ms) / 1000), batch
+
+    def iter_wakeups(self, start_ms, end_ms):
+        """Yields every (wake_ms, batch) between start_ms and end_ms (simulated time)."""
+        now_ms = start_ms
+        while True:
+            wake_ms, batch = self.next_wakeup(now_ms)
+            if wake_ms > end_ms:
+                return
+            yield wake_ms, batch
+            now_ms = wake_ms + 1
@@ -0,0 +1,72 @@
+"""Multi-symbol screener: price, RSI, signal and backtest return of a whole universe.
+
+The candles of every (symbol, timeframe) are fetched concurrently (bounded,
+rate-limited), the closes are stacked into one 2-D (pairs x time) array and
+the RSI of the whole universe is computed in a single batched pass.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core.backtest import backtest_arrays
+from core.concurrency import gather_bounded, rate_limiter_for
+from core.data import DEFAULT_LIMIT, get_ohlcv_data
+from core.indicators import RSI_PERIOD, rsi_matrix
+from core.signals import SIGNAL_ERROR, rsi_to_signal
+
+SCREENER_COLUMNS = ['Paire', 'Intervalle', 'Prix', 'RSI', 'Signal', 'Rendement Backtest %', 'Trades']
+FETCH_CONCURRENCY = 8
+
+
+def fetch_universe(exchange, pairs, limit=DEFAULT_LIMIT, max_concurrency=FETCH_CONCURRENCY, store=None):
+    """Fetches the candles of every (symbol, timeframe) pair concurrently.
+
+    Returns {pair: DataFrame or Exception}; a failing pair does not stop the others.
+    """
+    def fetch(symbol, timeframe):
+        return get_ohlcv_data(exchange, symbol, timeframe, limit=limit, store=store)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="screener") as executor:
+        return asyncio.run(gather_bounded(
+            fetch, list(pairs), max_concurrency=max_concurrency,
+            limiter=rate_limiter_for(exchange), executor=executor,
+        ))
+
+
+def stack_closes(frames, length=None):
+    """Right-aligns the close series into a (pairs x time) array, left-padded with NaN."""
+    if length is None:
+        length = max((len(df) for df in frames), default=0)
+    closes = np.full((len(frames), length), np.nan)
+    for row, df in enumerate(frames):
+        values = df['close'].to_numpy()[-length:]
+        if len(values):
+            closes[row, length - len(values):] = values
+    return closes
+
+
+def screen(frames, rsi_oversold, rsi_overbought, start_balance=1000.0, rsi_period=RSI_PERIOD):
+    """Builds the screener table from {(symbol, timeframe): DataFrame or Exception}."""
+    pairs = [pair for pair, df in frames.items() if isinstance(df, pd.DataFrame) and not df.empty]
+    if not pairs:
+        return pd.DataFrame(columns=SCREENER_COLUMNS)
+    closes = stack_closes([frames[pair] for pair in pairs])
+    rsi = rsi_matrix(closes, rsi_period)
+
+    rows = []
+    for (symbol, timeframe), close_row, rsi_row in zip(pairs, closes, rsi):
+        last_rsi = rsi_row[-1]
+        signal = SIGNAL_ERROR if np.isnan(last_rsi) else rsi_to_signal(last_rsi, rsi_oversold, rsi_overbought)
+        # Backtest sur les bougies ou le RSI est defini, comme run_backtest apres dropna
+        valid = ~np.isnan(rsi_row)
+        if valid.any():
+            final_value, trade_count, _, _ = backtest_arrays(
+                close_row[valid], rsi_row[valid], rsi_oversold, rsi_overbought, start_balance
+            )
+            profit = (final_value - start_balance) / start_balance * 100
+        else:
+            profit, trade_count = np.nan, 0
+        rows.append((symbol, timeframe, close_row[-1], last_rsi, signal, profit, trade_count))
+    return pd.DataFrame(rows, columns=SCREENER_COLUMNS)
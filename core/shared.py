@@ -0,0 +1,63 @@
+"""Numpy arrays shared with worker processes through one shared memory block.
+
+The parent copies the arrays once into a multiprocessing.shared_memory block;
+workers attach to it by name (typically in a pool initializer) and get
+read-only views, so nothing but the block name and the layout is pickled.
+"""
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+
+ALIGNMENT = 64
+
+
+class SharedArrays:
+    """Named arrays packed into one shared memory block, owned by the creating process.
+
+    Use as a context manager (or call close()): the block is released and
+    unlinked on exit. spec is the picklable handle passed to attach().
+    """
+
+    def __init__(self, arrays):
+        layout = []
+        offset = 0
+        arrays = {name: np.ascontiguousarray(values) for name, values in arrays.items()}
+        for name, values in arrays.items():
+            layout.append((name, offset, values.dtype.str, values.shape))
+            offset += -(-values.nbytes // ALIGNMENT) * ALIGNMENT
+        self.shm = shared_memory.SharedMemory(create=True, size=offset + ALIGNMENT)
+        for (name, start, _, _), values in zip(layout, arrays.values()):
+            np.ndarray(values.shape, values.dtype, buffer=self.shm.buf, offset=start)[...] = values
+        self.spec = (self.shm.name, tuple(layout))
+
+    @staticmethod
+    def attach(spec):
+        """(SharedMemory, {name: read-only array}) of a block created elsewhere.
+
+        Keep the SharedMemory object alive as long as the arrays are used.
+        """
+        name, layout = spec
+        # Python >= 3.13 : le processus qui s'attache ne doit pas supprimer le bloc a sa sortie
+        kwargs = {'track': False} if sys.version_info >= (3, 13) else {}
+        shm = shared_memory.SharedMemory(name=name, **kwargs)
+        arrays = {}
+        for key, offset, dtype, shape in layout:
+            view = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf, offset=offset)
+            view.flags.writeable = False
+            arrays[key] = view
+        return shm, arrays
+
+    @property
+    def nbytes(self):
+        return self.shm.size
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,34 @@
+"""Signal evaluation on the last candle of an indicator frame."""
+from core.metrics import timed
+
+RSI_OVERSOLD = 30
+RSI_OVERBOUGHT = 70
+
+SIGNAL_BUY = 'ACHAT FORT'
+SIGNAL_SELL = 'VENTE/CLÔTURE'
+SIGNAL_NEUTRAL = 'NEUTRE'
+SIGNAL_ERROR = 'ERREUR'
+
+
+def rsi_to_signal(rsi, rsi_oversold=RSI_OVERSOLD, rsi_overbought=RSI_OVERBOUGHT):
+    if rsi < rsi_oversold:
+        return SIGNAL_BUY
+    if rsi > rsi_overbought:
+        return SIGNAL_SELL
+    return SIGNAL_NEUTRAL
+
+
+@timed('signal')
+def check_trading_signal(df, rsi_oversold=RSI_OVERSOLD, rsi_overbought=RSI_OVERBOUGHT):
+    """Analyzes the last row of the DataFrame to generate a real-time signal.
+
+    Returns (signal, close_price, last_rsi).
+    """
+    if df.empty:
+        return SIGNAL_ERROR, 0.0, 0.0
+
+    last_row = df.iloc[-1]
+    last_rsi = last_row['RSI']
+    close_price = last_row['close']
+
+    return rsi_to_signal(last_rsi, rsi_oversold, rsi_overbought), close_price, last_rsi
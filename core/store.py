@@ -0,0 +1,306 @@
+"""Local on-disk candle store with incremental top-up fetches.
+
+Each (exchange, symbol, timeframe) series is kept as one raw little-endian
+file per column, read back with numpy memory maps. meta.json holds the
+committed row count and is replaced atomically after the columns are
+written, so an interrupted write never exposes a partial row. Rows are
+only ever appended or overwritten in place (no truncation), which keeps the
+files usable while another reader has them mapped. Rewriting a whole series
+(see backfill) writes a new generation of column files and switches meta.json
+to it.
+
+The maps double as the process-wide candle cache: a CandleStore keeps the
+read-only maps of each series version open (ColumnMaps) and frame() builds
+its DataFrames directly on them, the datetime64[ms] index included. Every
+reader of a series (dashboard sessions, the bot, worker processes opening
+the same files) then shares the same pages of the OS page cache: 48 bytes
+per candle in memory whatever the number of readers, instead of one private
+copy each. With pandas copy-on-write, adding a column or writing to such a
+frame copies only what changes.
+
+The last row of a series (the candle in progress when it was stored) is the
+only one a top-up overwrites in place. It is mapped copy-on-write and
+copied privately when mapped (one page per column), so a view never changes
+once taken and stays consistent with whatever was derived from it. Every
+write bumps the version in meta.json, and the next load maps the new values.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from core.timeframes import timeframe_to_ms
+
+COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+DTYPES = {'timestamp': np.dtype('<i8'), 'open': np.dtype('<f8'), 'high': np.dtype('<f8'),
+          'low': np.dtype('<f8'), 'close': np.dtype('<f8'), 'volume': np.dtype('<f8')}
+DEFAULT_ROOT = os.environ.get(
+    'CANDLE_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'candles'),
+)
+MAX_TOP_UP_PAGES = 50
+
+
+def candles_to_frame(columns, copy=True):
+    """Builds the usual OHLCV DataFrame (DatetimeIndex 'timestamp') from column arrays.
+
+    With copy=False the frame is a view of the arrays (which must have the
+    store dtypes): nothing is copied, the index viewing the int64
+    millisecond timestamps as datetime64[ms].
+    """
+    if not copy:
+        timestamps = np.asarray(columns['timestamp'], dtype=DTYPES['timestamp']).view('datetime64[ms]')
+        return pd.DataFrame(
+            {name: np.asarray(columns[name], dtype=DTYPES[name]) for name in COLUMNS[1:]},
+            index=pd.DatetimeIndex(timestamps, name='timestamp', copy=False), copy=False,
+        )
+    df = pd.DataFrame({name: np.array(columns[name]) for name in COLUMNS[1:]})
+    df.index = pd.DatetimeIndex(pd.to_datetime(np.array(columns['timestamp']), unit='ms'), name='timestamp')
+    return df
+
+
+def column_file(path, name, generation=0):
+    return os.path.join(path, name if generation == 0 else f"{name}.{generation}")
+
+
+def read_meta(path):
+    try:
+        with open(os.path.join(path, 'meta.json')) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return {'rows': 0}
+
+
+def write_meta(path, meta):
+    """Replaces meta.json atomically: this is the commit point of every write."""
+    tmp_path = os.path.join(path, 'meta.json.tmp')
+    with open(tmp_path, 'w') as handle:
+        json.dump(meta, handle)
+    os.replace(tmp_path, os.path.join(path, 'meta.json'))
+
+
+def write_columns(path, start, columns, generation=0):
+    """Writes column arrays at row offset `start` of the column files (created if needed)."""
+    os.makedirs(path, exist_ok=True)
+    for name in COLUMNS:
+        column_path = column_file(path, name, generation)
+        with open(column_path, 'r+b' if os.path.exists(column_path) else 'wb') as handle:
+            handle.seek(start * DTYPES[name].itemsize)
+            handle.write(np.ascontiguousarray(columns[name], dtype=DTYPES[name]).tobytes())
+
+
+def read_columns(path, rows, generation=0):
+    """Memory-maps the first `rows` rows of every column, read-only.
+
+    The page holding the last row, which later top-ups may overwrite in
+    place, is copied privately: the arrays never change once mapped.
+    """
+    if rows == 0:
+        return {name: np.empty(0, dtype=DTYPES[name]) for name in COLUMNS}
+    columns = {}
+    for name in COLUMNS:
+        values = np.memmap(column_file(path, name, generation), dtype=DTYPES[name], mode='c', shape=(rows,))
+        # Ecriture sur place : le noyau copie la page de la derniere ligne, les autres restent partagees
+        values[-1] = values[-1]
+        values.flags.writeable = False
+        columns[name] = values
+    return columns
+
+
+def rows_to_columns(ohlcv):
+    """[[timestamp, o, h, l, c, v], ...] -> column arrays, sorted, one row per timestamp (last wins)."""
+    new = np.array(ohlcv, dtype=np.float64)
+    timestamps = new[:, 0].astype(np.int64)
+    _, unique = np.unique(timestamps[::-1], return_index=True)
+    keep = np.sort(len(timestamps) - 1 - unique)
+    keep = keep[np.argsort(timestamps[keep], kind='stable')]
+    columns = {name: new[keep, i] for i, name in enumerate(COLUMNS)}
+    columns['timestamp'] = timestamps[keep]
+    return columns
+
+
+class ColumnMaps:
+    """Read-only column maps of the latest version (rows, generation, write version) of each series, LRU-bounded.
+
+    A series that grows gets new maps of the longer files; the maps of the
+    older version are dropped here and released once no frame uses them.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._maps = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, rows, generation=0, version=0):
+        key = (path, rows, generation, version)
+        with self._lock:
+            if key in self._maps:
+                self._maps.move_to_end(key)
+                return self._maps[key]
+        columns = read_columns(path, rows, generation)
+        with self._lock:
+            for old in [old for old in self._maps if old[0] == path]:
+                del self._maps[old]
+            self._maps[key] = columns
+            while len(self._maps) > self.maxsize:
+                self._maps.popitem(last=False)
+        return columns
+
+    @property
+    def nbytes(self):
+        """Bytes of stored candles currently mapped (each series version counted once)."""
+        with self._lock:
+            return sum(values.nbytes for columns in self._maps.values() for values in columns.values())
+
+    def __len__(self):
+        return len(self._maps)
+
+
+class CandleStore:
+    """Columnar candle files under root/<exchange>/<symbol>/<timeframe>/."""
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self.maps = ColumnMaps()
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, key):
+        # Reentrant : append() relit la serie (load) sous son propre verrou
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.RLock())
+
+    def path(self, exchange_id, symbol, timeframe):
+        return os.path.join(self.root, exchange_id, symbol.replace('/', '-'), timeframe)
+
+    def load(self, exchange_id, symbol, timeframe):
+        """Returns read-only memory-mapped column arrays (empty if nothing is stored)."""
+        # Sous le verrou de la serie : la derniere ligne n'est pas copiee pendant sa reecriture
+        with self._lock(self.path(exchange_id, symbol, timeframe)):
+            return self.maps.get(*self.spec(exchange_id, symbol, timeframe))
+
+    def spec(self, exchange_id, symbol, timeframe):
+        """Picklable (path, rows, generation, version) of the current series version (see attach)."""
+        path = self.path(exchange_id, symbol, timeframe)
+        meta = read_meta(path)
+        return path, meta['rows'], meta.get('generation', 0), meta.get('version', 0)
+
+    @staticmethod
+    def attach(spec):
+        """Read-only column maps of a series version, e.g. from a worker process."""
+        return read_columns(*spec[:3])
+
+    def last_timestamp(self, exchange_id, symbol, timeframe):
+        timestamps = self.load(exchange_id, symbol, timeframe)['timestamp']
+        return int(timestamps[-1]) if len(timestamps) else None
+
+    def first_timestamp(self, exchange_id, symbol, timeframe):
+        timestamps = self.load(exchange_id, symbol, timeframe)['timestamp']
+        return int(timestamps[0]) if len(timestamps) else None
+
+    def frame(self, exchange_id, symbol, timeframe, limit=None, since=None, copy=False):
+        """Returns the stored candles as a DataFrame, by default a read-only view of the maps.
+
+        since (ms) keeps the candles opened at or after it; limit keeps the
+        last `limit` ones. copy=True returns a private copy instead.
+        """
+        columns = self.load(exchange_id, symbol, timeframe)
+        if since is not None:
+            start = int(np.searchsorted(columns['timestamp'], since))
+            columns = {name: values[start:] for name, values in columns.items()}
+        if limit is not None:
+            columns = {name: values[-limit:] for name, values in columns.items()}
+        return candles_to_frame(columns, copy=copy)
+
+    def append(self, exchange_id, symbol, timeframe, ohlcv):
+        """Merges fetched [timestamp, o, h, l, c, v] rows into the store.
+
+        Rows older than the last stored candle are ignored; a row with the
+        same timestamp as the last stored candle replaces it (that candle was
+        still in progress when it was stored). Returns the number of new rows.
+        """
+        if len(ohlcv) == 0:
+            return 0
+        path = self.path(exchange_id, symbol, timeframe)
+        with self._lock(path):
+            meta = read_meta(path)
+            rows, generation, version = meta['rows'], meta.get('generation', 0), meta.get('version', 0)
+            last = self.last_timestamp(exchange_id, symbol, timeframe)
+
+            columns = rows_to_columns(ohlcv)
+            if last is not None:
+                recent = columns['timestamp'] >= last
+                columns = {name: values[recent] for name, values in columns.items()}
+            if not len(columns['timestamp']):
+                return 0
+
+            start = rows - 1 if last is not None and columns['timestamp'][0] == last else rows
+            write_columns(path, start, columns, generation)
+            total = start + len(columns['timestamp'])
+            write_meta(path, {'rows': total, 'generation': generation, 'version': version + 1})
+            return total - rows
+
+    def replace(self, exchange_id, symbol, timeframe, columns):
+        """Replaces the whole series with new column arrays (sorted by timestamp).
+
+        The new rows go to a new generation of column files and meta.json is
+        switched to it last, so readers see either the old or the new series.
+        """
+        path = self.path(exchange_id, symbol, timeframe)
+        with self._lock(path):
+            meta = read_meta(path)
+            old_generation = meta.get('generation', 0)
+            generation = old_generation + 1
+            write_columns(path, 0, columns, generation)
+            write_meta(path, {'rows': len(columns['timestamp']), 'generation': generation,
+                              'version': meta.get('version', 0) + 1})
+            for name in COLUMNS:
+                try:
+                    os.remove(column_file(path, name, old_generation))
+                except OSError:
+                    # Fichier absent, ou encore mappe par un lecteur (Windows) : il sera ecrase plus tard
+                    pass
+
+    def merge(self, exchange_id, symbol, timeframe, columns):
+        """Merges older column arrays under the stored series in one rewrite.
+
+        Stored candles win over merged ones with the same timestamp (they are
+        the most recent). The read and the rewrite hold the series lock, so a
+        concurrent top-up is never lost. Returns the number of rows.
+        """
+        with self._lock(self.path(exchange_id, symbol, timeframe)):
+            stored = self.load(exchange_id, symbol, timeframe)
+            merged = {name: np.concatenate((columns[name], stored[name])) for name in COLUMNS}
+            # Les bougies deja stockees priment : ce sont les plus recentes
+            _, unique = np.unique(merged['timestamp'][::-1], return_index=True)
+            keep = len(merged['timestamp']) - 1 - unique
+            columns = {name: values[keep] for name, values in merged.items()}
+            del merged, stored
+            self.replace(exchange_id, symbol, timeframe, columns)
+            return len(columns['timestamp'])
+
+    def sync(self, exchange, symbol, timeframe, limit=500):
+        """Tops up the store from the exchange and returns the last `limit` candles.
+
+        Only candles newer than the last stored timestamp are requested; an
+        empty store is seeded with the usual `limit` most recent candles.
+        """
+        exchange_id = getattr(exchange, 'id', type(exchange).__name__)
+        last = self.last_timestamp(exchange_id, symbol, timeframe)
+        if last is None:
+            self.append(exchange_id, symbol, timeframe, exchange.fetch_ohlcv(symbol, timeframe, limit=limit))
+        else:
+            step = timeframe_to_ms(timeframe)
+            for _ in range(MAX_TOP_UP_PAGES):
+                batch = exchange.fetch_ohlcv(symbol, timeframe, since=last, limit=limit)
+                self.append(exchange_id, symbol, timeframe, batch)
+                if not batch or batch[-1][0] <= last:
+                    break
+                last = batch[-1][0]
+                # La derniere bougie recue est celle en cours : rien de plus a recuperer
+                if last + step > exchange.milliseconds():
+                    break
+        return self.frame(exchange_id, symbol, timeframe, limit)
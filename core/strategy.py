@@ -0,0 +1,337 @@
+"""Multi-indicator strategies compiled to one vectorized signal array.
+
+A Strategy is an entry rule and an exit rule. Rules compare indicators
+(RSI, MACD, Bollinger bands, EMA crosses, average volume) on whole arrays
+and combine with & (ET) and | (OU). Rules and strategies are immutable and
+hashable, so a strategy can be used as a cache key and shared between the
+dashboard, the /analyse command and the alerts.
+
+compile() resolves every indicator the rules need into one dict keyed by
+indicator spec (('ema', 12), ('macd', 12, 26, 9), ...), so an indicator used
+by several rules, or by another indicator (the MACD reuses the EMAs, the
+Bollinger bands the SMA), is computed once. The result is the signal array
+of backtest.rsi_signal: 1 (achat), -1 (vente, prioritaire) or 0.
+"""
+import functools
+import operator
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from core.indicators import RSI_PERIOD, ema, rsi, sma
+from core.metrics import timed
+from core.signals import RSI_OVERBOUGHT, RSI_OVERSOLD, SIGNAL_BUY, SIGNAL_ERROR, SIGNAL_NEUTRAL, SIGNAL_SELL
+
+# --- Indicateurs ---
+
+def _rsi(df, values, length):
+    # La colonne RSI des frames d'indicateurs est calculee avec RSI_PERIOD : reutilisee telle quelle
+    if length == RSI_PERIOD and 'RSI' in df:
+        return df['RSI'].to_numpy(dtype=np.float64)
+    return rsi(df['close'], length).to_numpy()
+
+
+def _ema(df, values, length):
+    return ema(df['close'].to_numpy(), length).to_numpy()
+
+
+def _sma(df, values, length):
+    return sma(df['close'].to_numpy(), length).to_numpy()
+
+
+def _macd(df, values, fast, slow, signal):
+    line = indicator(df, ('ema', fast), values) - indicator(df, ('ema', slow), values)
+    return line, ema(line, signal).to_numpy()
+
+
+def _bbands(df, values, length, std):
+    middle = indicator(df, ('sma', length), values)
+    width = std * pd.Series(df['close'].to_numpy(dtype=np.float64)).rolling(length).std(ddof=0).to_numpy()
+    return middle - width, middle + width
+
+
+def _volume_sma(df, values, length):
+    return sma(df['volume'].to_numpy(), length).to_numpy()
+
+
+INDICATORS = {
+    'rsi': _rsi,
+    'ema': _ema,
+    'sma': _sma,
+    'macd': _macd,
+    'bbands': _bbands,
+    'volume_sma': _volume_sma,
+}
+
+
+def indicator(df, key, values):
+    """Value of the indicator spec key on df, computed once and kept in values."""
+    if key not in values:
+        values[key] = INDICATORS[key[0]](df, values, *key[1:])
+    return values[key]
+
+
+def _crossed(fast, slow, direction):
+    above = fast > slow
+    previous = np.concatenate(([False], above[:-1]))
+    valid = ~np.isnan(fast) & ~np.isnan(slow)
+    was_valid = np.concatenate(([False], valid[:-1]))
+    crossed = above & ~previous if direction == 'up' else ~above & previous
+    return crossed & valid & was_valid
+
+
+# --- Regles ---
+
+class Rule:
+    """Condition on whole arrays; rules combine with & (ET) and | (OU).
+
+    Subclasses are namedtuples: equality and hashing include the rule type.
+    """
+
+    __slots__ = ()
+
+    def __and__(self, other):
+        return All(self, other)
+
+    def __or__(self, other):
+        return Any(self, other)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((type(self).__name__, tuple.__hash__(self)))
+
+    def indicators(self):
+        """Indicator specs the rule reads."""
+        raise NotImplementedError
+
+    def evaluate(self, df, values):
+        """Boolean array, True on the candles where the condition holds."""
+        raise NotImplementedError
+
+    def describe(self):
+        raise NotImplementedError
+
+
+class RSIBelow(Rule, namedtuple('RSIBelow', ['threshold', 'length'], defaults=(RSI_PERIOD,))):
+    __slots__ = ()
+
+    def indicators(self):
+        return (('rsi', self.length),)
+
+    def evaluate(self, df, values):
+        return indicator(df, ('rsi', self.length), values) < self.threshold
+
+    def describe(self):
+        return f"RSI({self.length}) < {self.threshold}"
+
+
+class RSIAbove(Rule, namedtuple('RSIAbove', ['threshold', 'length'], defaults=(RSI_PERIOD,))):
+    __slots__ = ()
+
+    def indicators(self):
+        return (('rsi', self.length),)
+
+    def evaluate(self, df, values):
+        return indicator(df, ('rsi', self.length), values) > self.threshold
+
+    def describe(self):
+        return f"RSI({self.length}) > {self.threshold}"
+
+
+class MACDCross(Rule, namedtuple('MACDCross', ['direction', 'fast', 'slow', 'signal'], defaults=('up', 12, 26, 9))):
+    """MACD line crossing its signal line upwards ('up') or downwards ('down')."""
+
+    __slots__ = ()
+
+    def indicators(self):
+        return (('macd', self.fast, self.slow, self.signal),)
+
+    def evaluate(self, df, values):
+        line, signal = indicator(df, ('macd', self.fast, self.slow, self.signal), values)
+        return _crossed(line, signal, self.direction)
+
+    def describe(self):
+        sens = "hausse" if self.direction == 'up' else "baisse"
+        return f"MACD({self.fast},{self.slow},{self.signal}) croise son signal à la {sens}"
+
+
+class BollingerBreak(Rule, namedtuple('BollingerBreak', ['band', 'length', 'std'], defaults=('lower', 20, 2.0))):
+    """Close below the lower band ('lower') or above the upper band ('upper')."""
+
+    __slots__ = ()
+
+    def indicators(self):
+        return (('bbands', self.length, self.std),)
+
+    def evaluate(self, df, values):
+        lower, upper = indicator(df, ('bbands', self.length, self.std), values)
+        close = df['close'].to_numpy(dtype=np.float64)
+        return close < lower if self.band == 'lower' else close > upper
+
+    def describe(self):
+        side = "< bande basse" if self.band == 'lower' else "> bande haute"
+        return f"Clôture {side} de Bollinger({self.length}, {self.std:g})"
+
+
+class EMACross(Rule, namedtuple('EMACross', ['direction', 'fast', 'slow'], defaults=('up', 9, 21))):
+    """EMA(fast) crossing EMA(slow) upwards ('up') or downwards ('down')."""
+
+    __slots__ = ()
+
+    def indicators(self):
+        return (('ema', self.fast), ('ema', self.slow))
+
+    def evaluate(self, df, values):
+        return _crossed(indicator(df, ('ema', self.fast), values), indicator(df, ('ema', self.slow), values),
+                        self.direction)
+
+    def describe(self):
+        sens = "hausse" if self.direction == 'up' else "baisse"
+        return f"EMA({self.fast}) croise EMA({self.slow}) à la {sens}"
+
+
+class VolumeAbove(Rule, namedtuple('VolumeAbove', ['multiple', 'length'], defaults=(1.5, 20))):
+    """Volume above multiple x its average over length candles."""
+
+    __slots__ = ()
+
+    def indicators(self):
+        return (('volume_sma', self.length),)
+
+    def evaluate(self, df, values):
+        return df['volume'].to_numpy(dtype=np.float64) > self.multiple * indicator(df, ('volume_sma', self.length), values)
+
+    def describe(self):
+        return f"Volume > {self.multiple:g} × moyenne({self.length})"
+
+
+class All(Rule, namedtuple('All', ['rules'])):
+    """Every rule holds (ET)."""
+
+    __slots__ = ()
+    combine = operator.and_
+    word = "ET"
+
+    def __new__(cls, *rules):
+        # (a & b) & c est aplati en All(a, b, c)
+        flat = []
+        for rule in rules:
+            flat.extend(rule.rules if type(rule) is cls else (rule,))
+        return super().__new__(cls, tuple(flat))
+
+    def __getnewargs__(self):
+        return tuple(self.rules)
+
+    def indicators(self):
+        return tuple(dict.fromkeys(key for rule in self.rules for key in rule.indicators()))
+
+    def evaluate(self, df, values):
+        return functools.reduce(self.combine, (rule.evaluate(df, values) for rule in self.rules))
+
+    def describe(self):
+        return f" {self.word} ".join(
+            f"({rule.describe()})" if isinstance(rule, All) else rule.describe() for rule in self.rules
+        )
+
+
+class Any(All):
+    """At least one rule holds (OU)."""
+
+    __slots__ = ()
+    combine = operator.or_
+    word = "OU"
+
+
+# --- Strategie ---
+
+class Strategy(namedtuple('Strategy', ['entry', 'exit', 'name'], defaults=('',))):
+    """Entry and exit rules of a long-only strategy."""
+
+    __slots__ = ()
+
+    def indicators(self):
+        return tuple(dict.fromkeys(self.entry.indicators() + self.exit.indicators()))
+
+    def uses_only_rsi(self, length=RSI_PERIOD):
+        """True when the rules read nothing but the RSI of `length` (the streaming alert fast path)."""
+        return set(self.indicators()) <= {('rsi', length)}
+
+    def compile(self, df, values=None):
+        """Signal array (1 achat, -1 vente, 0 neutre) of a frame with close (and volume) columns.
+
+        values, if given, is the indicator dict to reuse and fill.
+        """
+        if values is None:
+            values = {}
+        if df.empty:
+            return np.zeros(0, dtype=np.int8)
+        entries = self.entry.evaluate(df, values)
+        exits = self.exit.evaluate(df, values)
+        return np.where(exits, -1, np.where(entries, 1, 0)).astype(np.int8)
+
+    @timed('signal')
+    def last_signal(self, df, values=None):
+        """(signal, close_price, values) of the last candle of df."""
+        if values is None:
+            values = {}
+        if df.empty:
+            return SIGNAL_ERROR, 0.0, values
+        signal = self.compile(df, values)[-1]
+        label = SIGNAL_BUY if signal == 1 else SIGNAL_SELL if signal == -1 else SIGNAL_NEUTRAL
+        return label, float(df['close'].iloc[-1]), values
+
+    def describe(self):
+        return f"Achat : {self.entry.describe()}\nVente : {self.exit.describe()}"
+
+
+def rsi_strategy(rsi_oversold=RSI_OVERSOLD, rsi_overbought=RSI_OVERBOUGHT, rsi_period=RSI_PERIOD):
+    """The original strategy: buy when RSI < oversold, sell when RSI > overbought."""
+    return Strategy(RSIBelow(rsi_oversold, rsi_period), RSIAbove(rsi_overbought, rsi_period), 'rsi')
+
+
+def _rsi_macd(rsi_oversold, rsi_overbought, rsi_period):
+    return Strategy(
+        RSIBelow(rsi_oversold, rsi_period) | (MACDCross('up') & RSIBelow(50, rsi_period)),
+        RSIAbove(rsi_overbought, rsi_period) | MACDCross('down'),
+        'rsi_macd',
+    )
+
+
+def _bollinger_rsi(rsi_oversold, rsi_overbought, rsi_period):
+    return Strategy(
+        BollingerBreak('lower') & RSIBelow(rsi_oversold + 10, rsi_period),
+        BollingerBreak('upper') | RSIAbove(rsi_overbought, rsi_period),
+        'bollinger_rsi',
+    )
+
+
+def _ema_cross(rsi_oversold, rsi_overbought, rsi_period):
+    return Strategy(EMACross('up') & VolumeAbove(1.0), EMACross('down') | RSIAbove(rsi_overbought, rsi_period), 'ema_cross')
+
+
+# Strategies predefinies, parametrees par les seuils RSI de l'utilisateur
+PRESETS = {
+    'rsi': rsi_strategy,
+    'rsi_macd': _rsi_macd,
+    'bollinger_rsi': _bollinger_rsi,
+    'ema_cross': _ema_cross,
+}
+PRESET_LABELS = {
+    'rsi': "RSI seul",
+    'rsi_macd': "RSI + MACD",
+    'bollinger_rsi': "Bollinger + RSI",
+    'ema_cross': "Croisement EMA + Volume",
+}
+
+
+def build_strategy(name, rsi_oversold=RSI_OVERSOLD, rsi_overbought=RSI_OVERBOUGHT, rsi_period=RSI_PERIOD):
+    """Preset strategy by name (see PRESETS)."""
+    if name not in PRESETS:
+        raise ValueError(f"Stratégie inconnue : {name} (disponibles : {', '.join(PRESETS)})")
+    return PRESETS[name](rsi_oversold, rsi_overbought, rsi_period)
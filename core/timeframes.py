@@ -0,0 +1,22 @@
+"""Timeframe helpers ('15m', '4h', '1d', ...)."""
+import datetime
+
+_UNIT_MS = {
+    's': 1000,
+    'm': 60 * 1000,
+    'h': 60 * 60 * 1000,
+    'd': 24 * 60 * 60 * 1000,
+    'w': 7 * 24 * 60 * 60 * 1000,
+}
+
+
+def timeframe_to_ms(timeframe):
+    """Converts a ccxt timeframe string to milliseconds."""
+    amount, unit = timeframe[:-1], timeframe[-1]
+    if unit not in _UNIT_MS or not amount.isdigit():
+        raise ValueError(f"Intervalle non supporté : {timeframe}")
+    return int(amount) * _UNIT_MS[unit]
+
+
+def timeframe_to_timedelta(timeframe):
+    return datetime.timedelta(milliseconds=timeframe_to_ms(timeframe))
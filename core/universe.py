@@ -0,0 +1,14 @@
+"""Trading universe shared by the dashboard pages: configured pairs and timeframes."""
+AVAILABLE_SYMBOLS = [
+    'BTC/USDT', 'ETH/USDT', 'SOL/USDT', 'BNB/USDT',
+    'XRP/USDT', 'ADA/USDT', 'DOGE/USDT', 'LINK/USDT'
+]
+AVAILABLE_TIMEFRAMES = ['15m', '30m', '1h', '4h', '1d']
+
+
+def exchange_symbols(exchange, quote='USDT'):
+    """Active spot pairs of a (markets-loaded) exchange quoted in `quote`."""
+    return sorted(
+        symbol for symbol, market in exchange.markets.items()
+        if market.get('quote') == quote and market.get('spot', True) and market.get('active') is not False
+    )
@@ -1,13 +1,29 @@
 # -*- coding: utf-8 -*-
-import ccxt
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
 import asyncio
 import logging
 import os # Importation du module OS pour les variables d'environnement
+from concurrent.futures import ThreadPoolExecutor
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
 
+import core
+from core import (
+    RSI_OVERBOUGHT, RSI_OVERSOLD, RSI_PERIOD, RSIRegistry,
+)
+from core.alert_state import AlertState
+from core.concurrency import CoalescingCache, gather_bounded, rate_limiter_for
+from core.backtest import ExecutionModel
+from core.live import LiveFeed, create_stream_client
+from core.metrics import register_cache, register_pool, start_http_server, timed_async, timer
+from core.paper import CandleEvent, PaperEngine, SignalEvent
+from core.pool import get_pool
+from core.scheduler import CandleCloseScheduler
+from core.signals import SIGNAL_ERROR
+from core.strategy import PRESETS, build_strategy, indicator
+from core.timeframes import timeframe_to_ms
+
 # --- Configuration du Bot Telegram ---
 # Les tokens et IDs sont maintenant charges depuis les variables d'environnement (plus securise)
 BOT_TOKEN = os.environ.get("BOT_TOKEN", "VOTRE_TOKEN_TELEGRAM_ICI") 
@@ -22,91 +38,237 @@ logging.getLogger("httpx").setLevel(logging.WARNING)
 # L'ID est charge depuis les variables d'environnement
 TARGET_CHAT_ID = os.environ.get("TARGET_CHAT_ID", "VOTRE_CHAT_ID_ICI") # <-- N'oubliez pas de mettre votre ID de Chat ici !
 WATCH_SYMBOLS = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT', 'ADA/USDT']
-ALERT_TIMEFRAME = '15m' # Verification toutes les 15 minutes
+# Intervalles surveilles, separes par des virgules (ex : "15m,1h,4h")
+ALERT_TIMEFRAMES = [timeframe.strip() for timeframe in os.environ.get("ALERT_TIMEFRAMES", "15m").split(",") if timeframe.strip()]
+WATCH_PAIRS = [(symbol, timeframe) for timeframe in ALERT_TIMEFRAMES for symbol in WATCH_SYMBOLS]
+FETCH_CONCURRENCY = int(os.environ.get("FETCH_CONCURRENCY", "8")) # Requetes simultanees vers l'exchange
+# LIVE_ALERTS=1 : bougies construites depuis le flux websocket des trades, alerte des la cloture (sans requete REST)
+LIVE_ALERTS = os.environ.get("LIVE_ALERTS", "0") == "1"
+# Strategie des alertes et de /analyse (voir core.strategy.PRESETS : rsi, rsi_macd, bollinger_rsi, ema_cross)
+STRATEGY = build_strategy(os.environ.get("STRATEGY", "rsi"), RSI_OVERSOLD, RSI_OVERBOUGHT, RSI_PERIOD)
+# Bougies cloturees gardees par flux temps reel quand la strategie ne se limite pas au RSI
+LIVE_HISTORY = 500
 
 # --- Configuration et Constantes Crypto ---
-EXCHANGE = ccxt.coinbase() 
-RSI_PERIOD = 14
-RSI_OVERSOLD = 30
-RSI_OVERBOUGHT = 70
+EXCHANGE_ID = 'coinbase' # Flux temps reel (LIVE_ALERTS=1)
+# Bougies REST : pool de places (variable EXCHANGES, ex : "coinbase,kraken"), chaque paire servie par la
+# plus rapide des places disponibles, avec reprises et bascule automatique
+DATA_POOL = get_pool()
+# Metriques Prometheus (durees, erreurs, caches, places) sur http://127.0.0.1:METRICS_PORT/metrics (0 : desactive)
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9108"))
+# Les appels ccxt bloquants tournent dans ce pool, hors de la boucle asyncio
+FETCH_EXECUTOR = ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY, thread_name_prefix="fetch")
+# /analyse : calcul hors de la boucle asyncio, requetes identiques simultanees fusionnees,
+# resultat reutilise pendant ANALYSE_CACHE_TTL secondes
+ANALYSE_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.environ.get("ANALYSE_WORKERS", "4")), thread_name_prefix="analyse")
+ANALYSE_CACHE = CoalescingCache(float(os.environ.get("ANALYSE_CACHE_TTL", "10")), executor=ANALYSE_EXECUTOR)
+register_cache('analyse', ANALYSE_CACHE)
+register_pool(DATA_POOL)
+# Paper trading des signaux (PAPER_TRADING=0 pour le desactiver) : ordres simules au prix de cloture,
+# frais PAPER_FEE et slippage PAPER_SLIPPAGE_BPS, etat sauvegarde dans data/paper_state.json.
+# PAPER_CAPITAL est reparti a parts egales entre les paires surveillees, chacune tradant sur sa part
+PAPER = PaperEngine(
+    ExecutionModel(
+        taker_fee=float(os.environ.get("PAPER_FEE", "0.001")),
+        slippage_bps=float(os.environ.get("PAPER_SLIPPAGE_BPS", "0")),
+    ),
+    start_balance=float(os.environ.get("PAPER_CAPITAL", "1000")),
+    pairs=WATCH_PAIRS,
+) if os.environ.get("PAPER_TRADING", "1") == "1" else None
+# Etat RSI incremental par (symbole, intervalle) : O(1) par nouvelle bougie
+RSI_STREAMS = RSIRegistry(RSI_PERIOD)
+# Derniere bougie evaluee et dernier signal par (chat, symbole, intervalle), charges depuis data/last_signals.json
+ALERT_STATE = AlertState()
+# Reveil juste apres chaque cloture de bougie, les paires d'une meme cloture groupees en un lot
+ALERT_SCHEDULER = CandleCloseScheduler(WATCH_PAIRS)
 
-# --- Fonctions d'Analyse (Adaptees du Streamlit App) ---
+# --- Fonctions d'Analyse (module core partage avec le Streamlit App) ---
 
 def get_ohlcv_data(symbol, timeframe):
     """Fetches OHLCV data from the exchange (max 500 candles)."""
     try:
-        # Fetch 500 latest candles
-        ohlcv = EXCHANGE.fetch_ohlcv(symbol, timeframe, limit=500)
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df = df.set_index('timestamp')
-        return df
+        # Tops up the local candle store, then returns the 500 latest candles
+        return core.get_ohlcv_data(DATA_POOL, symbol, timeframe, limit=500)
     except Exception as e:
         logging.error(f"Error fetching data for {symbol}: {e}")
         return pd.DataFrame()
 
-def calculate_indicators(df):
-    """Calculates RSI and drops NaN values."""
-    if not df.empty:
-        df['RSI'] = ta.rsi(df['close'], length=RSI_PERIOD)
-        df = df.dropna()
-    return df
-
-def check_trading_signal(df):
-    """Analyzes the last row of the DataFrame to generate a real-time signal."""
-    if df.empty:
-        return 'ERREUR', 0.0, 0.0
-        
-    last_row = df.iloc[-1]
-    last_rsi = last_row['RSI']
-    close_price = last_row['close']
-    
-    signal = 'NEUTRE'
-
-    if last_rsi < RSI_OVERSOLD:
-        signal = 'ACHAT FORT'
-    elif last_rsi > RSI_OVERBOUGHT:
-        signal = 'VENTE/CLÔTURE'
-    
-    return signal, close_price, last_rsi
+def get_stream_history(symbol, timeframe):
+    """Candles of the streaming venue (EXCHANGE_ID) to seed a live feed, whatever venue the pool routes to."""
+    try:
+        return core.get_ohlcv_data(core.get_exchange(EXCHANGE_ID), symbol, timeframe, limit=500)
+    except Exception as e:
+        logging.error(f"Error fetching {EXCHANGE_ID} history for {symbol}: {e}")
+        return pd.DataFrame()
 
 # --- Job d'Alerte Automatique ---
 
+def schedule_next_alerts(job_queue) -> None:
+    """Planifie la prochaine verification juste apres la prochaine cloture de bougie."""
+    delay, batch = ALERT_SCHEDULER.delay_seconds()
+    job_queue.run_once(send_alerts_job, when=delay, data=batch, name="alertes")
+    logging.info(f"Prochaine verification dans {delay:.0f} s pour {len(batch)} paire(s).")
+
+@timed_async('alerts_job')
 async def send_alerts_job(context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Vérifie périodiquement les signaux de trading et envoie une alerte si nécessaire."""
+    """Vérifie les signaux des paires dont une bougie vient de clôturer et envoie une alerte si nécessaire."""
+    try:
+        await check_alerts(context, context.job.data)
+    finally:
+        # La tache se replanifie elle-meme sur la prochaine cloture, meme en cas d'erreur
+        schedule_next_alerts(context.job_queue)
+
+async def check_alerts(context: ContextTypes.DEFAULT_TYPE, batch) -> None:
     # Correction pour s'assurer que TARGET_CHAT_ID est un entier ou une string valide avant l'envoi
     if TARGET_CHAT_ID == "VOTRE_CHAT_ID_ICI" or not TARGET_CHAT_ID:
         logging.warning("Alerte non envoyee: TARGET_CHAT_ID n'est pas configure.")
         return
 
-    logging.info(f"Execution de la tâche d'alerte automatique ({ALERT_TIMEFRAME})...")
-    
-    for symbol in WATCH_SYMBOLS:
-        df = get_ohlcv_data(symbol, ALERT_TIMEFRAME)
-        if df.empty:
+    logging.info(f"Execution de la tâche d'alerte automatique ({len(batch)} paire(s))...")
+
+    now_ms = DATA_POOL.milliseconds()
+
+    # Seules les paires dont une nouvelle bougie a cloture sont recuperees et recalculees
+    due_pairs = [
+        (symbol, timeframe) for symbol, timeframe in batch
+        if ALERT_STATE.is_due(TARGET_CHAT_ID, symbol, timeframe, now_ms, timeframe_to_ms(timeframe))
+    ]
+    if not due_pairs:
+        return
+
+    # Recuperation simultanee de toutes les paires (bornee et respectant le rateLimit de l'exchange)
+    frames = await gather_bounded(
+        get_ohlcv_data,
+        due_pairs,
+        max_concurrency=FETCH_CONCURRENCY,
+        limiter=rate_limiter_for(DATA_POOL),
+        executor=FETCH_EXECUTOR,
+    )
+
+    for symbol, timeframe in due_pairs:
+        df = frames[(symbol, timeframe)]
+        if isinstance(df, Exception) or df.empty:
             continue
-            
-        df = calculate_indicators(df)
-        signal, price, last_rsi = check_trading_signal(df)
-
-        if signal in ['ACHAT FORT', 'VENTE/CLÔTURE']:
-            
-            # Preparation du message
-            emoji = '🟢' if signal == 'ACHAT FORT' else '🔴'
-            
-            alert_message = (
-                f"{emoji} **ALERTE {signal}** sur {symbol} ({ALERT_TIMEFRAME})"
-                f"\n\n**Prix :** ${price:.2f}"
-                f"\n**RSI ({RSI_PERIOD}) :** {last_rsi:.2f}"
-            )
-            
-            # Envoi du message au chat cible
-            await context.bot.send_message(
+
+        # Le signal est evalue sur la derniere bougie cloturee
+        timestamps = df.index.as_unit('ms').asi8
+        n_closed = len(closed_candles(df, timeframe, now_ms))
+        if n_closed == 0:
+            continue
+        candle_ts = int(timestamps[n_closed - 1])
+        if candle_ts == ALERT_STATE.last_candle(TARGET_CHAT_ID, symbol, timeframe):
+            continue
+
+        if STRATEGY.uses_only_rsi(RSI_PERIOD):
+            # Only the candles closed since the previous run are added to the RSI state
+            with timer('indicators'):
+                closed_rsi = RSI_STREAMS.feed(
+                    (symbol, timeframe), timestamps[:n_closed], df['close'].to_numpy()[:n_closed], in_progress=False
+                )
+            if pd.isna(closed_rsi):
+                continue
+            frame = df.iloc[n_closed - 1:n_closed].assign(RSI=closed_rsi)
+        else:
+            # Strategie multi-indicateurs : evaluee sur toutes les bougies cloturees
+            frame = df.iloc[:n_closed]
+        signal, price, values = STRATEGY.last_signal(frame)
+        candle = df[['open', 'high', 'low', 'close']].iloc[n_closed - 1]
+        submit_paper_events(symbol, timeframe, candle_ts, *candle, signal)
+        await send_signal_alert(context.bot, symbol, timeframe, candle_ts, signal, price, last_rsi(values))
+
+    # Persistance de l'etat pour ne pas renvoyer les memes alertes apres un redemarrage
+    ALERT_STATE.save()
+
+def closed_candles(df, timeframe, now_ms):
+    """Candles of df closed at now_ms (the one in progress is left out)."""
+    timestamps = df.index.as_unit('ms').asi8
+    return df.iloc[:int(np.searchsorted(timestamps, now_ms - timeframe_to_ms(timeframe), side='right'))]
+
+def last_rsi(values):
+    """RSI (RSI_PERIOD) of the last candle, if the strategy computed it."""
+    rsi_values = values.get(('rsi', RSI_PERIOD))
+    return float(rsi_values[-1]) if rsi_values is not None and len(rsi_values) else None
+
+def submit_paper_events(symbol, timeframe, candle_ts, open_, high, low, close, signal) -> None:
+    """Transmet la bougie cloturee puis son signal au moteur de paper trading."""
+    if PAPER is None:
+        return
+    PAPER.submit(CandleEvent(symbol, timeframe, int(candle_ts), float(open_), float(high), float(low), float(close)))
+    PAPER.submit(SignalEvent(symbol, timeframe, int(candle_ts), signal, float(close)))
+
+async def send_signal_alert(bot, symbol, timeframe, candle_ts, signal, price, rsi_value) -> None:
+    """Envoie l'alerte d'une bougie cloturee, sauf si elle a deja ete signalee."""
+    if not ALERT_STATE.record(TARGET_CHAT_ID, symbol, timeframe, candle_ts, signal):
+        return
+
+    if signal in ['ACHAT FORT', 'VENTE/CLÔTURE']:
+        
+        # Preparation du message
+        emoji = '🟢' if signal == 'ACHAT FORT' else '🔴'
+        
+        alert_message = (
+            f"{emoji} **ALERTE {signal}** sur {symbol} ({timeframe})"
+            f"\n\n**Prix :** ${price:.2f}"
+        )
+        if rsi_value is not None:
+            alert_message += f"\n**RSI ({RSI_PERIOD}) :** {rsi_value:.2f}"
+        if STRATEGY.name != 'rsi':
+            alert_message += f"\n\n_{STRATEGY.describe()}_"
+        
+        # Envoi du message au chat cible
+        with timer('telegram_send'):
+            await bot.send_message(
                 chat_id=TARGET_CHAT_ID, 
                 text=alert_message, 
                 parse_mode='Markdown'
             )
-            logging.info(f"Alerte envoyee pour {symbol}: {signal}")
+        logging.info(f"Alerte envoyee pour {symbol} ({timeframe}): {signal}")
+
+# --- Alertes sur flux temps reel (LIVE_ALERTS=1) ---
+
+async def on_live_candle_close(bot, feed, candle, closed_rsi) -> None:
+    """Evalue le signal d'une bougie construite depuis le flux des trades, des sa cloture."""
+    if TARGET_CHAT_ID == "VOTRE_CHAT_ID_ICI" or not TARGET_CHAT_ID:
+        return
+    if STRATEGY.uses_only_rsi(RSI_PERIOD):
+        if pd.isna(closed_rsi):
+            return
+        # Le RSI de la bougie vient d'etre calcule par le flux : une ligne suffit
+        frame = pd.DataFrame({'close': [candle[4]], 'RSI': [closed_rsi]})
+    else:
+        frame = feed.closed_frame()
+    signal, price, values = STRATEGY.last_signal(frame)
+    submit_paper_events(feed.symbol, feed.timeframe, *candle[:5], signal)
+    await send_signal_alert(bot, feed.symbol, feed.timeframe, candle[0], signal, price, last_rsi(values))
+    ALERT_STATE.save()
+
+async def start_live_feeds(application: Application) -> None:
+    """Demarre un flux websocket par paire surveillee, initialise avec l'historique REST de la meme place."""
+    client = create_stream_client(EXCHANGE_ID)
+    loop = asyncio.get_running_loop()
+    for symbol, timeframe in ALERT_SCHEDULER.watch:
+        feed = LiveFeed(
+            symbol, timeframe,
+            on_close=lambda feed, candle, value: on_live_candle_close(application.bot, feed, candle, value),
+            keep_candles=0 if STRATEGY.uses_only_rsi(RSI_PERIOD) else LIVE_HISTORY,
+        )
+        feed.seed(await loop.run_in_executor(FETCH_EXECUTOR, get_stream_history, symbol, timeframe))
+        application.create_task(feed.run(client))
+    logging.info(f"Flux temps reel demarres pour {len(ALERT_SCHEDULER.watch)} paire(s).")
+
+async def on_startup(application: Application) -> None:
+    """Reprend l'etat du paper trading, demarre son moteur et les flux temps reel."""
+    if PAPER is not None:
+        if PAPER.load():
+            logging.info(f"Paper trading repris : {len(PAPER.positions)} paire(s), capital {PAPER.equity():.2f}.")
+        application.create_task(PAPER.run())
+    if LIVE_ALERTS:
+        await start_live_feeds(application)
+
+async def on_shutdown(application: Application) -> None:
+    """Sauvegarde l'etat du paper trading a l'arret du bot."""
+    if PAPER is not None:
+        PAPER.snapshot()
 
 # --- Gestionnaires de Commandes Telegram ---
 
@@ -114,37 +276,52 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     """Handles the /start command."""
     await update.message.reply_text(
         'Bienvenue sur le Bot Analyste Crypto !'
-        '\n\nUtilisez la commande /analyse <symbole> <intervalle> pour obtenir un signal RSI.'
-        '\nExemple : `/analyse BTC/USDT 4h`'
+        '\n\nUtilisez la commande /analyse <symbole> <intervalle> [stratégie] pour obtenir un signal.'
+        '\nExemple : `/analyse BTC/USDT 4h` ou `/analyse BTC/USDT 4h rsi_macd`'
         '\nIntervalles : 15m, 30m, 1h, 4h, 1d.'
+        f'\nStratégies : {", ".join(PRESETS)}.'
+        '\n\nPaper trading des alertes : /positions et /pnl.'
         '\n\nPour configurer les alertes automatiques, utilisez `/getid`.'
     )
 
+def analyse_pair(symbol, timeframe, strategy):
+    """Blocking part of /analyse: returns (signal, price, rsi) or None when no data is available."""
+    df = get_ohlcv_data(symbol, timeframe)
+    if df.empty:
+        return None
+    # Memes regles et memes bougies que les alertes : derniere bougie cloturee, indicateurs
+    # calcules sur toutes les bougies cloturees (EMA, MACD et Bollinger dependent du debut de la serie)
+    closed = closed_candles(df, timeframe, DATA_POOL.milliseconds())
+    signal, _, values = strategy.last_signal(closed)
+    rsi_value = float(indicator(closed, ('rsi', RSI_PERIOD), values)[-1]) if not closed.empty else np.nan
+    if np.isnan(rsi_value):
+        return SIGNAL_ERROR, float(df['close'].iloc[-1]), None
+    return signal, float(df['close'].iloc[-1]), rsi_value
+
 async def analyse_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handles the /analyse command and performs the crypto analysis."""
     args = context.args
     
-    if len(args) != 2:
+    if len(args) not in (2, 3) or (len(args) == 3 and args[2].lower() not in PRESETS):
         await update.message.reply_text(
-            "Format incorrect. Utilisez : `/analyse <symbole> <intervalle>`\nExemple : `/analyse BTC/USDT 4h`"
+            "Format incorrect. Utilisez : `/analyse <symbole> <intervalle> [stratégie]`\nExemple : `/analyse BTC/USDT 4h`"
+            f"\nStratégies : {', '.join(PRESETS)}"
         )
         return
 
     symbol = args[0].upper()
     timeframe = args[1].lower()
+    strategy = build_strategy(args[2].lower(), RSI_OVERSOLD, RSI_OVERBOUGHT, RSI_PERIOD) if len(args) == 3 else STRATEGY
 
     await update.message.reply_text(f"Analyse en cours pour **{symbol}** sur **{timeframe}**...", parse_mode='Markdown')
 
-    # 1. Recuperation des donnees
-    df = get_ohlcv_data(symbol, timeframe)
+    # 1. et 2. Recuperation, indicateurs et signal dans le pool ANALYSE_EXECUTOR (la boucle reste libre)
+    result = await ANALYSE_CACHE.get((symbol, timeframe, strategy), analyse_pair, symbol, timeframe, strategy)
 
-    if df.empty:
+    if result is None:
         await update.message.reply_text(f"❌ Impossible de charger les données pour {symbol} sur {timeframe}. Vérifiez la paire.")
         return
-    
-    # 2. Calcul et Signal
-    df = calculate_indicators(df)
-    signal, price, last_rsi = check_trading_signal(df)
+    signal, price, rsi_value = result
 
     # 3. Formatage de la reponse
     if signal == 'ERREUR':
@@ -161,14 +338,60 @@ async def analyse_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         response_text = (
             f"--- **ANALYSE {symbol} ({timeframe})** ---"
             f"\n\n**Prix Actuel :** ${price:.2f}"
-            f"\n**RSI ({RSI_PERIOD}) :** {last_rsi:.2f}"
-            f"\n\n**Signal de Trading :** {emoji} **{signal}**"
-            f"\n\n*Seuil d'Achat (Survente) :* RSI < {RSI_OVERSOLD}"
-            f"\n*Seuil de Vente (Surachat) :* RSI > {RSI_OVERBOUGHT}"
+            f"\n**RSI ({RSI_PERIOD}) :** {rsi_value:.2f}"
+            f"\n\n**Signal de Trading (dernière bougie clôturée) :** {emoji} **{signal}**"
         )
+        if strategy.name == 'rsi':
+            response_text += (
+                f"\n\n*Seuil d'Achat (Survente) :* RSI < {RSI_OVERSOLD}"
+                f"\n*Seuil de Vente (Surachat) :* RSI > {RSI_OVERBOUGHT}"
+            )
+        else:
+            response_text += f"\n\n*{strategy.describe()}*"
 
     await update.message.reply_text(response_text, parse_mode='Markdown')
 
+async def positions_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Affiche les positions ouvertes du paper trading."""
+    if PAPER is None:
+        await update.message.reply_text("Le paper trading est désactivé (PAPER_TRADING=0).")
+        return
+    positions = PAPER.open_positions()
+    if not positions:
+        await update.message.reply_text("Aucune position ouverte.")
+        return
+    lines = ["--- **POSITIONS (paper trading)** ---"]
+    for position in positions:
+        emoji = '🟢' if position['unrealized'] >= 0 else '🔴'
+        lines.append(
+            f"\n{emoji} **{position['symbol']}** ({position['timeframe']}) : {position['quantity']:.6f}"
+            f"\nEntrée ${position['entry_price']:.2f} → ${position['price']:.2f}"
+            f"\nLatent : ${position['unrealized']:+.2f} ({position['unrealized_percent']:+.2f} %)"
+        )
+    await update.message.reply_text("\n".join(lines), parse_mode='Markdown')
+
+async def pnl_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Affiche le PnL du paper trading, au total et par paire."""
+    if PAPER is None:
+        await update.message.reply_text("Le paper trading est désactivé (PAPER_TRADING=0).")
+        return
+    pnl = PAPER.pnl()
+    win_rate = f"{pnl['win_rate']:.1f} %" if pnl['win_rate'] is not None else "-"
+    lines = [
+        "--- **PnL (paper trading)** ---",
+        f"\n**Capital :** ${pnl['start_balance']:.2f} → ${pnl['equity']:.2f} ({pnl['return_percent']:+.2f} %)",
+        f"**Réalisé :** ${pnl['realized']:+.2f} | **Latent :** ${pnl['unrealized']:+.2f}",
+        f"**Frais :** ${pnl['fees']:.2f} | **Trades :** {pnl['round_trips']} ({win_rate} gagnants)",
+    ]
+    if pnl['pairs']:
+        lines.append("")
+    for pair in pnl['pairs']:
+        line = f"{pair['symbol']} ({pair['timeframe']}) : ${pair['realized'] + pair['unrealized']:+.2f}"
+        if 'allocated' in pair:
+            line += f" sur ${pair['allocated']:.2f} ({pair['return_percent']:+.2f} %)"
+        lines.append(f"{line}, {pair['round_trips']} trade(s)")
+    await update.message.reply_text("\n".join(lines), parse_mode='Markdown')
+
 async def get_chat_id(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Aide l'utilisateur a trouver l'ID du chat pour les alertes automatiques."""
     chat_id = update.message.chat_id
@@ -186,18 +409,33 @@ def main() -> None:
         logging.error("Le jeton de bot n'est pas configuré. Veuillez définir la variable d'environnement BOT_TOKEN.")
         return
 
+    # 0. Clients des places du pool et marches charges une seule fois, avant la premiere requete
+    DATA_POOL.connect()
+    if METRICS_PORT:
+        try:
+            start_http_server(METRICS_PORT)
+        except OSError as e:
+            # Port deja pris (par exemple par le tableau de bord) : le bot tourne sans export des metriques
+            logging.warning(f"Export des metriques impossible sur le port {METRICS_PORT} : {e}")
+
     # 1. Creation de l'Application et passage du token
-    application = Application.builder().token(BOT_TOKEN).build()
+    # Au demarrage : moteur de paper trading et flux temps reel ; a l'arret : sauvegarde du paper trading
+    application = Application.builder().token(BOT_TOKEN).post_init(on_startup).post_shutdown(on_shutdown).build()
     job_queue = application.job_queue # Recuperation de la file d'attente
 
     # 2. Ajout des gestionnaires de commandes
     application.add_handler(CommandHandler("start", start_command))
-    application.add_handler(CommandHandler("analyse", analyse_command))
+    # block=False : chaque /analyse tourne dans sa propre tache, les autres mises a jour ne l'attendent pas
+    application.add_handler(CommandHandler("analyse", analyse_command, block=False))
+    application.add_handler(CommandHandler("positions", positions_command))
+    application.add_handler(CommandHandler("pnl", pnl_command))
     application.add_handler(CommandHandler("getid", get_chat_id))
 
     # 3. Planification de la tâche d'alerte automatique
-    # Execute la fonction send_alerts_job toutes les 300 secondes (5 minutes)
-    job_queue.run_repeating(send_alerts_job, interval=300, first=0)
+    # Premiere verification immediate de toutes les paires, puis une a chaque cloture de bougie
+    # (en mode temps reel, les alertes partent du flux websocket, voir start_live_feeds)
+    if not LIVE_ALERTS:
+        job_queue.run_once(send_alerts_job, when=0, data=ALERT_SCHEDULER.watch, name="alertes")
     
     # 4. Demarrer le bot (mode polling pour une execution simple)
     logging.info("Le Bot Telegram est en cours d'execution (Polling) avec Alertes Automatiques...")
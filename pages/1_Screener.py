@@ -0,0 +1,78 @@
+import streamlit as st
+
+from core import RSI_OVERBOUGHT, RSI_OVERSOLD
+from core.pool import get_pool
+from core.screener import fetch_universe, screen
+from core.universe import AVAILABLE_SYMBOLS, AVAILABLE_TIMEFRAMES, exchange_symbols
+
+# --- Fonctions de donnees ---
+
+@st.cache_resource
+def get_data_pool():
+    # Pool de places partage avec le dashboard (variable EXCHANGES)
+    return get_pool().connect()
+
+@st.cache_data(ttl=60*5, show_spinner=False)
+def load_universe(pairs):
+    # Toutes les paires sont telechargees en parallele (borne et rateLimit respectes)
+    frames = fetch_universe(get_data_pool(), pairs)
+    return {pair: df if not isinstance(df, Exception) else str(df) for pair, df in frames.items()}
+
+@st.cache_data(ttl=60*60*24, show_spinner=False)
+def get_exchange_symbols(quote):
+    # Paires cotees sur au moins une place du pool
+    return exchange_symbols(get_data_pool(), quote)
+
+# --- Interface Streamlit ---
+
+st.set_page_config(layout="wide", page_title="Screener Crypto", initial_sidebar_state="expanded")
+st.title("📊 Screener Multi-Paires (RSI)")
+
+st.sidebar.header("⚙️ Univers")
+universe = st.sidebar.radio("Paires", ["Paires configurées", "Toutes les paires USDT des places du pool"])
+timeframes = st.sidebar.multiselect("Intervalles", AVAILABLE_TIMEFRAMES, default=['1h'])
+
+st.sidebar.markdown("---")
+st.sidebar.subheader("Stratégie RSI")
+rsi_oversold = st.sidebar.slider("RSI Survente (Achat)", 10, 40, RSI_OVERSOLD)
+rsi_overbought = st.sidebar.slider("RSI Surachat (Vente)", 60, 90, RSI_OVERBOUGHT)
+user_capital = st.sidebar.number_input("Capital de départ (USDT)", min_value=10.0, value=1000.0, step=50.0)
+
+symbols = AVAILABLE_SYMBOLS if universe == "Paires configurées" else get_exchange_symbols('USDT')
+pairs = tuple((symbol, timeframe) for timeframe in timeframes for symbol in symbols)
+
+if not pairs:
+    st.warning("Sélectionnez au moins un intervalle.")
+    st.stop()
+
+with st.spinner(f"Chargement de {len(pairs)} paire(s)..."):
+    frames = load_universe(pairs)
+
+# RSI de tout l'univers en une seule passe sur un tableau (paires x temps)
+results = screen(frames, rsi_oversold, rsi_overbought, user_capital)
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Paires analysées", len(results))
+col2.metric("Signaux d'achat", int((results['Signal'] == 'ACHAT FORT').sum()))
+col3.metric("Signaux de vente", int((results['Signal'] == 'VENTE/CLÔTURE').sum()))
+
+st.dataframe(
+    results.sort_values('RSI'),
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        'Prix': st.column_config.NumberColumn(format="%.4f"),
+        'RSI': st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.1f"),
+        'Rendement Backtest %': st.column_config.NumberColumn(format="%.2f %%"),
+    },
+)
+
+errors = {pair: error for pair, error in frames.items() if isinstance(error, str)}
+if errors:
+    with st.expander(f"⚠️ {len(errors)} paire(s) non chargée(s)"):
+        for (symbol, timeframe), error in errors.items():
+            st.write(f"**{symbol} ({timeframe})** : {error}")
+
+if st.button('🔄 Rafraîchir les Données'):
+    load_universe.clear()
+    st.rerun()
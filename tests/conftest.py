@@ -0,0 +1,57 @@
+"""Shared helpers of the test suite: synthetic candles, offline exchanges and a fake clock."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.store import CandleStore  # noqa: E402
+from core.timeframes import timeframe_to_ms  # noqa: E402
+
+START_MS = 1577836800000  # 2020-01-01 00:00 UTC
+
+
+def synthetic_rows(n_candles, timeframe='1h', seed=0, start_price=30000.0):
+    """[[timestamp, o, h, l, c, v], ...] of a random walk, as returned by fetch_ohlcv."""
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0.0, 0.004, n_candles)))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0.0, 0.002, n_candles)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.lognormal(3.0, 1.0, n_candles)
+    step = timeframe_to_ms(timeframe)
+    return [
+        [START_MS + i * step, float(open_[i]), float(high[i]), float(low[i]), float(close[i]), float(volume[i])]
+        for i in range(n_candles)
+    ]
+
+
+class FakeClock:
+    """Simulated time: sleep() records the wait and advances it, advance() only advances it."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CandleStore(str(tmp_path))
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
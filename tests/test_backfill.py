@@ -0,0 +1,162 @@
+import logging
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from conftest import START_MS, synthetic_rows
+from core import backfill as backfill_module
+from core.backfill import Spool, backfill, load_history
+from core.replay import FaultyExchange, ReplayExchange
+from core.store import COLUMNS, read_meta, rows_to_columns
+from core.timeframes import timeframe_to_ms
+
+SYMBOL = 'BTC/USDT'
+STEP = timeframe_to_ms('1h')
+
+
+class Interrupted(Exception):
+    """Stands for a process stopped in the middle of a backfill."""
+
+
+def stored_rows(store, exchange_id='replay'):
+    columns = store.load(exchange_id, SYMBOL, '1h')
+    return [list(row) for row in zip(*(columns[name].tolist() for name in COLUMNS))]
+
+
+def seeded(store, rows, exchange=None):
+    """Store holding the 100 most recent candles, as after a first sync."""
+    exchange = exchange or ReplayExchange({(SYMBOL, '1h'): rows})
+    store.sync(exchange, SYMBOL, '1h', limit=100)
+    return exchange
+
+
+def test_backfill_pages_back_to_since(store, clock):
+    rows = synthetic_rows(1000)
+    exchange = seeded(store, rows)
+
+    assert backfill(exchange, SYMBOL, '1h', START_MS, store=store, page_limit=100, sleep=clock.sleep) == 1000
+    # 900 bougies manquantes : 9 pages de 100, de la plus recente a la plus ancienne
+    pages = [since for _, _, since, _ in exchange.calls[1:]]
+    assert pages == [rows[900 - 100 * i][0] for i in range(1, 10)]
+    assert stored_rows(store) == rows
+    assert not os.path.exists(store.path('replay', SYMBOL, '1h') + '.backfill')
+
+
+def test_backfill_retries_injected_faults(store, clock):
+    rows = synthetic_rows(500)
+    replay = ReplayExchange({(SYMBOL, '1h'): rows})
+    exchange = FaultyExchange(replay, 'replay')
+    seeded(store, rows, exchange)
+
+    exchange.fail_next = 2
+    assert backfill(exchange, SYMBOL, '1h', START_MS, store=store, page_limit=100, sleep=clock.sleep) == 500
+    assert exchange.failures == 2
+    # Attente exponentielle entre les essais d'une meme page
+    assert clock.sleeps == [backfill_module.RETRY_DELAY_S, 2 * backfill_module.RETRY_DELAY_S]
+    assert stored_rows(store) == rows
+
+
+def test_backfill_gives_up_after_the_retries(store, clock):
+    rows = synthetic_rows(500)
+    exchange = FaultyExchange(ReplayExchange({(SYMBOL, '1h'): rows}), 'replay')
+    seeded(store, rows, exchange)
+
+    exchange.fail_next = 10
+    with pytest.raises(ConnectionError):
+        backfill(exchange, SYMBOL, '1h', START_MS, store=store, page_limit=100, retries=2, sleep=clock.sleep)
+    assert exchange.failures == 3
+    assert len(stored_rows(store)) == 100
+
+
+def test_interrupted_backfill_resumes_from_the_spool_cursor(store, clock):
+    rows = synthetic_rows(1000)
+    exchange = seeded(store, rows)
+    pages = []
+
+    def stop_after_three_pages(fraction):
+        pages.append(fraction)
+        if len(pages) == 3:
+            raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        backfill(exchange, SYMBOL, '1h', START_MS, store=store, page_limit=100, progress=stop_after_three_pages,
+                 sleep=clock.sleep)
+    spool_path = store.path('replay', SYMBOL, '1h') + '.backfill'
+    assert read_meta(spool_path) == {'rows': 300, 'cursor': rows[600][0]}
+    # Rien n'est fusionne tant que la date cible n'est pas atteinte
+    assert len(stored_rows(store)) == 100
+
+    del exchange.calls[:]
+    assert backfill(exchange, SYMBOL, '1h', START_MS, store=store, page_limit=100, sleep=clock.sleep) == 1000
+    assert [since for _, _, since, _ in exchange.calls] == [rows[600 - 100 * i][0] for i in range(1, 7)]
+    assert stored_rows(store) == rows
+
+
+def test_backfill_steps_over_a_gap(store, clock, caplog):
+    rows = synthetic_rows(2000)
+    # Maintenance de 300 bougies : la place renvoie les bougies qui suivent le trou
+    venue = rows[:700] + rows[1000:]
+    exchange = seeded(store, venue)
+
+    with caplog.at_level(logging.WARNING, logger='core.backfill'):
+        total = backfill(exchange, SYMBOL, '1h', START_MS, store=store, page_limit=100, sleep=clock.sleep)
+    assert total == len(venue)
+    assert stored_rows(store) == venue
+    assert 'trou de 3 page(s)' in caplog.text
+
+
+def test_backfill_stops_after_consecutive_empty_pages(store, clock, caplog):
+    rows = synthetic_rows(300)
+    exchange = seeded(store, rows)
+    since = START_MS - 50 * 100 * STEP
+
+    with caplog.at_level(logging.INFO, logger='core.backfill'):
+        total = backfill(exchange, SYMBOL, '1h', since, store=store, page_limit=100, max_empty_pages=4,
+                         sleep=clock.sleep)
+    assert total == 300
+    # 2 pages de bougies, puis 4 pages vides avant l'historique de la paire
+    assert len(exchange.calls) == 1 + 2 + 4
+    assert 'debut de l\'historique' in caplog.text
+
+
+def test_merge_matches_a_plain_fetch(store, clock):
+    rows = synthetic_rows(1500)
+    exchange = ReplayExchange({(SYMBOL, '1h'): rows}, now=rows[1199][0] + 1)
+    since = rows[200][0]
+
+    df = load_history(exchange, SYMBOL, '1h', since, store=store, page_limit=100, sleep=clock.sleep)
+    # Meme periode en une seule requete, sans limite de page
+    single = ReplayExchange(exchange.candles, now=exchange.now, max_limit=len(rows))
+    plain = single.fetch_ohlcv(SYMBOL, '1h', since=since)
+    np.testing.assert_array_equal(df.index.as_unit('ms').asi8, [row[0] for row in plain])
+    np.testing.assert_array_equal(df[list(COLUMNS[1:])].to_numpy(), [row[1:] for row in plain])
+
+    # Les mises a jour suivantes completent la serie fusionnee
+    exchange.advance(10 * STEP)
+    df = load_history(exchange, SYMBOL, '1h', since, store=store, page_limit=100, sleep=clock.sleep)
+    assert df.index.as_unit('ms').asi8[-1] == rows[1209][0]
+    assert len(df) == 1010
+
+
+def test_merge_keeps_a_top_up_written_meanwhile(store):
+    rows = synthetic_rows(400)
+    store.append('replay', SYMBOL, '1h', rows[200:300])
+    spool = Spool(store.path('replay', SYMBOL, '1h') + '.backfill')
+    spool.append(rows_to_columns(rows[:200]), rows[0][0])
+
+    replace = store.replace
+    top_up = threading.Thread(target=store.append, args=('replay', SYMBOL, '1h', rows[300:]))
+
+    def replace_during_top_up(*args):
+        # La mise a jour arrive entre la lecture et la reecriture : elle attend le verrou de la serie
+        top_up.start()
+        top_up.join(0.2)
+        assert top_up.is_alive()
+        replace(*args)
+
+    store.replace = replace_during_top_up
+    assert backfill_module.merge_spool(store, 'replay', SYMBOL, '1h', spool) == 300
+    top_up.join()
+    assert stored_rows(store) == rows
@@ -0,0 +1,52 @@
+import numpy as np
+
+from conftest import synthetic_rows
+from core.backtest import DEFAULT_EXECUTION, backtest_trades
+from core.cache import AnalysisCache, data_version
+from core.indicators import calculate_indicators
+from core.replay import ReplayExchange
+
+SYMBOL = 'BTC/USDT'
+
+
+def drop_in_progress_close(exchange, factor=0.9):
+    # La bougie en cours chute : meme horodatage, meme nombre de bougies, nouvelle cloture
+    exchange.candles[(SYMBOL, '1h')][-1][4] *= factor
+
+
+def test_data_version_follows_the_candle_in_progress(store):
+    exchange = ReplayExchange({(SYMBOL, '1h'): synthetic_rows(100)})
+    before = data_version(store.sync(exchange, SYMBOL, '1h'))
+    assert data_version(store.sync(exchange, SYMBOL, '1h')) == before
+
+    drop_in_progress_close(exchange)
+    after = data_version(store.sync(exchange, SYMBOL, '1h'))
+    assert after[:3] == before[:3]
+    assert after != before
+
+
+def test_updated_last_candle_misses_every_layer(store):
+    exchange = ReplayExchange({(SYMBOL, '1h'): synthetic_rows(200)})
+    cache = AnalysisCache()
+
+    def analyse(df):
+        indicators = cache.indicators(SYMBOL, '1h', df)
+        return (indicators, cache.trades(SYMBOL, '1h', indicators, 30, 70),
+                cache.metrics(SYMBOL, '1h', indicators, 30, 70))
+
+    first_rsi = analyse(store.sync(exchange, SYMBOL, '1h'))[0]['RSI'].iloc[-1]
+    analyse(store.sync(exchange, SYMBOL, '1h'))
+    assert (cache.indicators_cache.misses, cache.trades_cache.misses, cache.metrics_cache.misses) == (1, 1, 1)
+
+    drop_in_progress_close(exchange)
+    df = store.sync(exchange, SYMBOL, '1h')
+    indicators, trades, metrics = analyse(df)
+    assert (cache.indicators_cache.misses, cache.trades_cache.misses, cache.metrics_cache.misses) == (2, 2, 2)
+
+    expected = calculate_indicators(df)
+    assert indicators['RSI'].iloc[-1] == expected['RSI'].iloc[-1]
+    assert indicators['RSI'].iloc[-1] != first_rsi
+    fresh = backtest_trades(expected, 30, 70, DEFAULT_EXECUTION, 1.0)
+    assert np.isclose(trades.final_value, fresh.final_value)
+    np.testing.assert_allclose(trades.equity, fresh.equity)
+    assert metrics == AnalysisCache().metrics(SYMBOL, '1h', expected, 30, 70)
@@ -0,0 +1,115 @@
+import math
+
+import numpy as np
+import pytest
+
+from conftest import synthetic_rows
+from core.indicators import RSIRegistry, StreamingRSI, rsi
+
+LENGTH = 14
+
+
+@pytest.fixture
+def candles():
+    rows = synthetic_rows(500)
+    timestamps = np.array([row[0] for row in rows], dtype=np.int64)
+    closes = np.array([row[4] for row in rows])
+    return timestamps, closes
+
+
+def test_update_matches_the_vectorized_rsi(candles):
+    timestamps, closes = candles
+    stream = StreamingRSI(LENGTH)
+    values = [stream.update(close, timestamp) for timestamp, close in zip(timestamps, closes)]
+    np.testing.assert_allclose(values, rsi(closes, LENGTH).to_numpy(), rtol=1e-9)
+    # Pas de valeur avant `LENGTH` variations, comme rsi()
+    assert all(math.isnan(value) for value in values[:LENGTH])
+
+
+@pytest.mark.parametrize('seed_rows', [1, 5, LENGTH, LENGTH + 1, 200])
+def test_seed_then_update_matches_the_vectorized_rsi(candles, seed_rows):
+    timestamps, closes = candles
+    expected = rsi(closes, LENGTH).to_numpy()
+    stream = StreamingRSI(LENGTH)
+    stream.seed(timestamps[:seed_rows], closes[:seed_rows])
+    # Amorce plus courte que la periode : NaN, puis l'etat rattrape rsi() au fil des bougies
+    np.testing.assert_allclose(stream.value, expected[seed_rows - 1], rtol=1e-9)
+    for i in range(seed_rows, len(closes)):
+        assert np.isclose(stream.peek(closes[i]), expected[i], rtol=1e-9, equal_nan=True)
+        stream.update(closes[i], timestamps[i])
+    np.testing.assert_allclose(stream.value, expected[-1], rtol=1e-9)
+
+
+def test_peek_leaves_the_state_unchanged(candles):
+    timestamps, closes = candles
+    stream = StreamingRSI(LENGTH)
+    stream.seed(timestamps[:100], closes[:100])
+    state = (stream.gain_sum, stream.loss_sum, stream.count, stream.prev_close)
+    for price in (closes[100], closes[100] * 1.05, closes[100] * 0.9):
+        stream.peek(price)
+    assert (stream.gain_sum, stream.loss_sum, stream.count, stream.prev_close) == state
+
+
+def test_feed_commits_closed_candles_and_peeks_the_one_in_progress(candles):
+    timestamps, closes = candles
+    expected = rsi(closes, LENGTH).to_numpy()
+    stream = StreamingRSI(LENGTH)
+    for end in range(50, len(closes) + 1, 7):
+        np.testing.assert_allclose(stream.feed(timestamps[:end], closes[:end]), expected[end - 1], rtol=1e-9)
+        assert stream.last_timestamp == timestamps[end - 2]
+    np.testing.assert_allclose(stream.value, expected[stream.count], rtol=1e-9)
+
+
+def test_feed_ignores_candles_already_committed(candles):
+    timestamps, closes = candles
+    expected = rsi(closes, LENGTH).to_numpy()
+    stream = StreamingRSI(LENGTH)
+    stream.feed(timestamps[:300], closes[:300], in_progress=False)
+    state = (stream.gain_sum, stream.loss_sum, stream.count)
+
+    # Meme fenetre, puis une fenetre plus courte qui finit sur la derniere bougie validee
+    assert stream.feed(timestamps[:300], closes[:300], in_progress=False) == stream.value
+    assert stream.feed(timestamps[250:300], closes[250:300], in_progress=False) == stream.value
+    assert (stream.gain_sum, stream.loss_sum, stream.count) == state
+
+    # La bougie en cours est reecrite plusieurs fois avant sa cloture : seul peek() en tient compte
+    for price in (closes[300] * 1.01, closes[300] * 0.98, closes[300]):
+        live = stream.feed(np.append(timestamps[250:300], timestamps[300]), np.append(closes[250:300], price))
+        assert live == stream.peek(price)
+        assert (stream.gain_sum, stream.loss_sum, stream.count) == state
+    np.testing.assert_allclose(stream.feed(timestamps[:302], closes[:302]), expected[301], rtol=1e-9)
+    np.testing.assert_allclose(stream.value, expected[300], rtol=1e-9)
+
+
+def test_feed_reseeds_when_the_frame_does_not_line_up(candles):
+    timestamps, closes = candles
+    expected = rsi(closes[300:], LENGTH).to_numpy()
+    stream = StreamingRSI(LENGTH)
+    stream.feed(timestamps[:100], closes[:100])
+    # Trou entre la derniere bougie validee et la nouvelle fenetre : l'etat repart de cette fenetre
+    np.testing.assert_allclose(stream.feed(timestamps[300:], closes[300:]), expected[-1], rtol=1e-9)
+
+
+def test_registry_series_matches_the_vectorized_rsi(candles):
+    timestamps, closes = candles
+    registry = RSIRegistry(LENGTH, keep_history=True)
+    key = ('BTC/USDT', '1h')
+    first = 50
+    for end in (200, 201, 260, 260, 380, len(closes)):
+        # Fenetre glissante de 150 bougies, comme celle du tableau de bord ; l'etat date de la premiere
+        start = max(first, end - 150)
+        values = registry.series(key, timestamps[start:end], closes[start:end])
+        expected = rsi(closes[first:end], LENGTH).to_numpy()[start - first:]
+        np.testing.assert_allclose(values, expected, rtol=1e-9)
+    assert registry.get(key) is registry.get(key)
+    assert registry.get(('ETH/USDT', '1h')).last_timestamp is None
+
+
+def test_registry_feed_keeps_one_state_per_series(candles):
+    timestamps, closes = candles
+    registry = RSIRegistry(LENGTH)
+    other = closes[::-1].copy()
+    btc = registry.feed(('BTC/USDT', '1h'), timestamps, closes, in_progress=False)
+    eth = registry.feed(('ETH/USDT', '1h'), timestamps, other, in_progress=False)
+    np.testing.assert_allclose(btc, rsi(closes, LENGTH).iloc[-1], rtol=1e-9)
+    np.testing.assert_allclose(eth, rsi(other, LENGTH).iloc[-1], rtol=1e-9)
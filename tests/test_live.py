@@ -0,0 +1,97 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from conftest import synthetic_rows
+from core import live
+from core.indicators import rsi
+from core.live import CandleBuilder, LiveFeed
+from core.replay import ReplayExchange, ReplayStream, candles_to_trades
+from core.store import COLUMNS, candles_to_frame
+from core.strategy import build_strategy
+
+SYMBOL = 'BTC/USDT'
+
+
+class DroppingStream:
+    """ReplayStream whose connection drops once after `after` batches."""
+
+    def __init__(self, stream, after):
+        self.stream = stream
+        self.after = after
+        self.calls = 0
+        self.errors = 0
+
+    async def watch_trades(self, symbol, since=None, limit=None, params=None):
+        self.calls += 1
+        if self.calls == self.after + 1:
+            self.errors += 1
+            raise ConnectionError("connexion perdue")
+        return await self.stream.watch_trades(symbol)
+
+
+def rest_frame(rows):
+    """Candles as served by the REST replay exchange."""
+    exchange = ReplayExchange({(SYMBOL, '15m'): rows})
+    fetched = exchange.fetch_ohlcv(SYMBOL, '15m', limit=len(rows))
+    return candles_to_frame(dict(zip(COLUMNS, zip(*fetched))))
+
+
+def replay_feed(rows, seed_rows, stream_factory=None):
+    feed = LiveFeed(SYMBOL, '15m', keep_candles=len(rows))
+    feed.seed(candles_to_frame(dict(zip(COLUMNS, zip(*rows[:seed_rows])))))
+    stream = ReplayStream({SYMBOL: candles_to_trades(rows[seed_rows:])}, batch_ms=60 * 1000)
+    if stream_factory is not None:
+        stream = stream_factory(stream)
+    asyncio.run(feed.run(stream))
+    return feed, stream
+
+
+def test_candle_builder_aggregates_trades():
+    builder = CandleBuilder('1m')
+    assert builder.add_trade(0, 10.0, 1.0) is None
+    assert builder.add_trade(10_000, 12.0, 0.5) is None
+    assert builder.add_trade(20_000, 9.0, 0.5) is None
+    assert builder.add_trade(30_000, 11.0, 1.0) is None
+    # Trade en retard d'une bougie precedente : ignore
+    assert builder.add_trade(60_000, 11.5, 1.0) == [0, 10.0, 12.0, 9.0, 11.0, 3.0]
+    assert builder.add_trade(59_000, 50.0, 1.0) is None
+    assert builder.candle == [60_000, 11.5, 11.5, 11.5, 11.5, 1.0]
+
+
+def test_replayed_stream_matches_rest_candles():
+    rows = synthetic_rows(300, timeframe='15m')
+    feed, _ = replay_feed(rows, 100)
+
+    # La derniere bougie du flux est encore en cours : les bougies cloturees sont toutes les autres
+    expected = rest_frame(rows[:-1])
+    pd.testing.assert_frame_equal(feed.closed_frame(), expected, check_exact=False, rtol=1e-12)
+    assert feed.builder.candle[0] == rows[-1][0]
+    assert feed.snapshot()['price'] == rows[-1][4]
+
+    timestamp, value = feed.closed_rsi()
+    assert timestamp == rows[-2][0]
+    assert np.isclose(value, rsi(expected['close']).iloc[-1], rtol=1e-9)
+
+
+def test_feed_reconnects_after_a_disconnect(monkeypatch):
+    monkeypatch.setattr(live, 'RECONNECT_DELAY_S', 0.0)
+    rows = synthetic_rows(200, timeframe='15m')
+    feed, stream = replay_feed(rows, 100, lambda replayed: DroppingStream(replayed, after=40))
+
+    assert stream.errors == 1
+    assert stream.calls > 41
+    pd.testing.assert_frame_equal(feed.closed_frame(), rest_frame(rows[:-1]), check_exact=False, rtol=1e-12)
+    assert feed.trade_count == len(candles_to_trades(rows[100:]))
+
+
+def test_live_frame_gives_the_strategy_signal_of_the_rest_candles():
+    rows = synthetic_rows(300, timeframe='15m', seed=3)
+    feed, _ = replay_feed(rows, 100)
+
+    frame = feed.live_frame()
+    pd.testing.assert_frame_equal(frame, rest_frame(rows), check_exact=False, rtol=1e-12)
+    for name in ('rsi_macd', 'bollinger_rsi', 'ema_cross'):
+        strategy = build_strategy(name)
+        np.testing.assert_array_equal(strategy.compile(frame), strategy.compile(rest_frame(rows)))
@@ -0,0 +1,88 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from conftest import synthetic_rows
+from core.backtest import ExecutionModel, backtest_signal
+from core.indicators import calculate_indicators
+from core.paper import PaperEngine, replay_events
+from core.store import COLUMNS, candles_to_frame
+from core.strategy import build_strategy
+
+SYMBOL = 'BTC/USDT'
+
+
+def indicator_frame(n_candles=3000, seed=0):
+    rows = synthetic_rows(n_candles, timeframe='15m', seed=seed)
+    return calculate_indicators(candles_to_frame(dict(zip(COLUMNS, zip(*rows)))))
+
+
+async def replay(engine, events):
+    # Le moteur consomme la file pendant que les evenements y sont pousses, comme dans le bot
+    task = asyncio.create_task(engine.run())
+    for event in events:
+        engine.submit(event)
+    engine.stop()
+    await task
+
+
+@pytest.mark.parametrize('strategy_name', ['rsi', 'rsi_macd'])
+@pytest.mark.parametrize('model', [
+    ExecutionModel(taker_fee=0.001),
+    ExecutionModel(taker_fee=0.001, slippage_bps=5, fill='next_open'),
+    ExecutionModel(sizing='notional', notional=250.0, taker_fee=0.002, slippage_bps=10, fill='next_open'),
+], ids=['close', 'next_open', 'notional'])
+def test_paper_engine_reproduces_the_backtest(strategy_name, model):
+    df = indicator_frame()
+    strategy = build_strategy(strategy_name)
+    engine = PaperEngine(model, 1000.0, path=None)
+
+    asyncio.run(replay(engine, replay_events({(SYMBOL, '15m'): df}, strategy)))
+
+    trades = backtest_signal(df, strategy.compile(df), model, start_balance=1000.0)
+    assert len(engine.fills) == len(trades.rows) > 0
+    np.testing.assert_allclose([order.fill_price for order in engine.fills], trades.prices, rtol=1e-12)
+    np.testing.assert_allclose(engine.equity(), trades.final_value, rtol=1e-9)
+
+
+def test_snapshot_round_trip(tmp_path):
+    df = indicator_frame(1000)
+    model = ExecutionModel(taker_fee=0.001, fill='next_open')
+    engine = PaperEngine(model, 1000.0, path=str(tmp_path / 'paper_state.json'),
+                         pairs=[(SYMBOL, '15m'), ('ETH/USDT', '15m')])
+    for event in replay_events({(SYMBOL, '15m'): df}, build_strategy('rsi')):
+        engine.process(event)
+    engine.snapshot()
+
+    restored = PaperEngine(model, path=engine.path)
+    assert restored.load()
+    assert restored.pnl() == engine.pnl()
+    assert restored.pair_cash == engine.pair_cash
+    assert [order.to_dict() for order in restored.fills] == [order.to_dict() for order in engine.fills]
+
+
+def test_allocated_pairs_trade_like_their_own_backtest():
+    frames = {(f"PAIR{seed}/USDT", '15m'): indicator_frame(2000, seed=seed) for seed in range(3)}
+    strategy = build_strategy('rsi')
+    model = ExecutionModel(taker_fee=0.001, fill='next_open')
+    engine = PaperEngine(model, 900.0, path=None, pairs=list(frames))
+    for event in replay_events(frames, strategy):
+        engine.process(event)
+
+    pnl = engine.pnl()
+    assert [pair['allocated'] for pair in pnl['pairs']] == [300.0] * 3
+    for pair in pnl['pairs']:
+        df = frames[(pair['symbol'], pair['timeframe'])]
+        trades = backtest_signal(df, strategy.compile(df), model, start_balance=300.0)
+        np.testing.assert_allclose(pair['equity'], trades.final_value, rtol=1e-9)
+    np.testing.assert_allclose(engine.equity(), sum(pair['equity'] for pair in pnl['pairs']), rtol=1e-12)
+
+
+def test_signals_of_unallocated_pairs_are_ignored():
+    frames = {('BTC/USDT', '15m'): indicator_frame(1000), ('ETH/USDT', '15m'): indicator_frame(1000, seed=1)}
+    engine = PaperEngine(ExecutionModel(), 1000.0, path=None, pairs=[('BTC/USDT', '15m')])
+    for event in replay_events(frames, build_strategy('rsi')):
+        engine.process(event)
+    assert {order.symbol for order in engine.fills} == {'BTC/USDT'}
+    assert [pair['symbol'] for pair in engine.pnl()['pairs']] == ['BTC/USDT']
@@ -0,0 +1,165 @@
+import pytest
+
+from conftest import synthetic_rows
+from core.data import get_ohlcv_data
+from core.pool import ExchangePool
+from core.replay import FaultyExchange, ReplayExchange
+
+SYMBOL = 'BTC/USDT'
+
+
+class RateLimitExceeded(Exception):
+    """Same name as the ccxt error."""
+
+
+class BadSymbol(Exception):
+    """Same name as the ccxt error."""
+
+
+@pytest.fixture
+def candles():
+    return {(SYMBOL, '1h'): synthetic_rows(300)}
+
+
+@pytest.fixture
+def venues(candles, clock):
+    # Latence simulee : chaque appel avance l'horloge du pool sans attendre
+    return [
+        FaultyExchange(ReplayExchange(candles), 'rapide', delay=0.002, sleep=clock.advance),
+        FaultyExchange(ReplayExchange(candles), 'moyenne', delay=0.006, sleep=clock.advance),
+        FaultyExchange(ReplayExchange(candles), 'lente', delay=0.015, sleep=clock.advance),
+    ]
+
+
+def make_pool(venues, clock, **kwargs):
+    options = dict(retries=2, backoff=0.5, max_backoff=8.0, failure_threshold=3, cooldown=60.0)
+    options.update(kwargs)
+    return ExchangePool(venues, sleep=clock.sleep, clock=clock, **options)
+
+
+def fetch(pool, calls=1):
+    for _ in range(calls):
+        rows = pool.fetch_ohlcv(SYMBOL, '1h', limit=10)
+    return rows
+
+
+def test_routes_to_the_fastest_venue(venues, clock):
+    fast, medium, slow = venues
+    # Liste inversee : la preference initiale ne compte plus une fois les latences mesurees
+    pool = make_pool([slow, medium, fast], clock)
+    fetch(pool, 20)
+
+    assert (slow.calls, medium.calls, fast.calls) == (1, 1, 18)
+    assert pool.candidates(SYMBOL) == ['rapide', 'moyenne', 'lente']
+    assert pool.routes[SYMBOL] == 'rapide'
+    stats = {row['venue']: row for row in pool.stats()}
+    assert stats['rapide']['latency_ms'] == pytest.approx(2.0)
+    assert stats['lente']['latency_ms'] == pytest.approx(15.0)
+    assert clock.sleeps == []
+
+
+def test_retries_with_exponential_backoff(venues, clock):
+    fast, medium, slow = venues
+    pool = make_pool([fast, medium, slow], clock)
+    fetch(pool, 3)
+
+    fast.fail_next = 2
+    assert fetch(pool) == ReplayExchange({(SYMBOL, '1h'): synthetic_rows(300)}).fetch_ohlcv(SYMBOL, '1h', limit=10)
+    assert clock.sleeps == [0.5, 1.0]
+    assert fast.failures == 2
+    assert medium.calls == slow.calls == 1
+    assert {row['venue']: row['healthy'] for row in pool.stats()}['rapide']
+
+
+def test_backoff_is_capped(venues, clock):
+    fast, medium, slow = venues
+    pool = make_pool([fast], clock, retries=4, failure_threshold=10, max_backoff=1.5)
+    fast.fail_next = 4
+    fetch(pool)
+    assert clock.sleeps == [0.5, 1.0, 1.5, 1.5]
+
+
+def test_failing_venue_cools_down_then_comes_back(venues, clock):
+    fast, medium, slow = venues
+    pool = make_pool([fast, medium, slow], clock)
+    fetch(pool, 3)
+
+    fast.fail_next = 3
+    fetch(pool)
+    # Trois echecs de suite : place mise de cote, la requete passe par la suivante
+    assert fast.failures == 3
+    assert clock.sleeps == [0.5, 1.0]
+    assert pool.routes[SYMBOL] == 'moyenne'
+    assert pool.candidates(SYMBOL) == ['moyenne', 'lente', 'rapide']
+
+    calls = fast.calls
+    fetch(pool, 5)
+    assert fast.calls == calls
+
+    clock.advance(61.0)
+    fetch(pool)
+    assert fast.calls == calls + 1
+    assert pool.routes[SYMBOL] == 'rapide'
+    assert {row['venue']: row['healthy'] for row in pool.stats()}['rapide']
+
+
+def test_fails_over_when_the_primary_always_fails(venues, clock):
+    fast, medium, slow = venues
+    pool = make_pool([fast, medium, slow], clock)
+    fast.fail_rate = 1.0
+    fetch(pool, 50)
+
+    # Aucun echec cote appelant ; la place en panne n'est retentee qu'a la fin de chaque mise a l'ecart
+    assert fast.failures == fast.calls == 3
+    # La place lente n'est appelee qu'une fois, pour mesurer sa latence
+    assert (medium.calls, slow.calls) == (49, 1)
+    stats = {row['venue']: row for row in pool.stats()}
+    assert not stats['rapide']['healthy']
+    assert stats['rapide']['errors'] == 3
+
+    clock.advance(61.0)
+    fetch(pool)
+    # Apres la mise a l'ecart, un seul nouvel echec suffit a la prolonger
+    assert fast.calls == 4
+    assert not {row['venue']: row for row in pool.stats()}['rapide']['healthy']
+
+
+def test_rate_limit_sets_the_venue_aside_at_once(venues, clock):
+    fast, medium, slow = venues
+    pool = make_pool([fast, medium, slow], clock)
+    fast.fail_next, fast.error = 1, RateLimitExceeded
+    fetch(pool)
+    assert fast.calls == 1
+    assert clock.sleeps == []
+    assert pool.candidates(SYMBOL)[-1] == 'rapide'
+
+
+def test_request_errors_do_not_count_against_the_venue(venues, clock):
+    fast, medium, slow = venues
+    pool = make_pool([fast, medium], clock)
+    fast.fail_next, fast.error = 1, BadSymbol
+    fetch(pool)
+    assert clock.sleeps == []
+    assert pool.routes[SYMBOL] == 'moyenne'
+    stats = {row['venue']: row for row in pool.stats()}
+    assert stats['rapide']['healthy'] and stats['rapide']['errors'] == 0
+
+
+def test_last_error_is_raised_when_every_venue_fails(venues, clock):
+    fast, medium, slow = venues
+    pool = make_pool([fast, medium], clock, retries=0)
+    fast.fail_rate = medium.fail_rate = 1.0
+    with pytest.raises(ConnectionError, match='moyenne'):
+        fetch(pool)
+
+
+def test_each_venue_keeps_its_own_series(venues, clock, store):
+    fast, medium, slow = venues
+    pool = make_pool([fast, medium], clock)
+    get_ohlcv_data(pool, SYMBOL, '1h', limit=50, store=store)
+    fast.fail_rate = 1.0
+    df = get_ohlcv_data(pool, SYMBOL, '1h', limit=50, store=store)
+
+    assert len(df) == 50
+    assert len(store.frame('rapide', SYMBOL, '1h')) == 50
+    assert len(store.frame('moyenne', SYMBOL, '1h')) == 50
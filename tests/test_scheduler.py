@@ -0,0 +1,59 @@
+from conftest import START_MS
+from core.scheduler import CLOSE_GRACE_MS, CandleCloseScheduler, next_close
+
+MINUTE = 60 * 1000
+HOUR = 60 * MINUTE
+
+
+def test_next_close_boundaries():
+    assert next_close(START_MS, 15 * MINUTE) == START_MS + 15 * MINUTE
+    assert next_close(START_MS + 1, 15 * MINUTE) == START_MS + 15 * MINUTE
+    assert next_close(START_MS + 15 * MINUTE - 1, 15 * MINUTE) == START_MS + 15 * MINUTE
+    assert next_close(START_MS + 15 * MINUTE, 15 * MINUTE) == START_MS + 30 * MINUTE
+    assert next_close(START_MS + 7 * MINUTE, HOUR) == START_MS + HOUR
+
+
+def test_wakes_up_after_the_grace_period(clock):
+    clock.now = START_MS + 14 * MINUTE
+    scheduler = CandleCloseScheduler([('BTC/USDT', '15m')], clock=clock)
+    assert CLOSE_GRACE_MS == 5000
+    assert scheduler.next_wakeup() == (START_MS + 15 * MINUTE + 5000, [('BTC/USDT', '15m')])
+    assert scheduler.delay_seconds() == (65.0, [('BTC/USDT', '15m')])
+
+    # Bougie cloturee mais delai de grace pas encore ecoule : le reveil reste sur cette cloture
+    clock.now = START_MS + 15 * MINUTE + 2000
+    assert scheduler.next_wakeup()[0] == START_MS + 15 * MINUTE + 5000
+    assert scheduler.delay_seconds()[0] == 3.0
+
+    clock.now = START_MS + 15 * MINUTE + 4999
+    assert scheduler.delay_seconds()[0] == 0.001
+    # Reveil atteint : la bougie est traitee, le prochain reveil vise la cloture suivante
+    clock.now += 1
+    assert scheduler.next_wakeup()[0] == START_MS + 30 * MINUTE + 5000
+
+
+def test_batches_pairs_closing_together():
+    watch = [('BTC/USDT', '15m'), ('ETH/USDT', '1h'), ('SOL/USDT', '15m')]
+    scheduler = CandleCloseScheduler(watch)
+    assert scheduler.next_wakeup(START_MS + 50 * MINUTE) == (
+        START_MS + HOUR + CLOSE_GRACE_MS, watch,
+    )
+    assert scheduler.next_wakeup(START_MS + 5 * MINUTE) == (
+        START_MS + 15 * MINUTE + CLOSE_GRACE_MS, [('BTC/USDT', '15m'), ('SOL/USDT', '15m')],
+    )
+
+
+def test_iter_wakeups_fires_once_per_closed_candle():
+    watch = [('BTC/USDT', '15m'), ('BTC/USDT', '1h'), ('BTC/USDT', '4h')]
+    scheduler = CandleCloseScheduler(watch)
+    wakeups = list(scheduler.iter_wakeups(START_MS + MINUTE, START_MS + 24 * HOUR))
+
+    times = [wake_ms for wake_ms, _ in wakeups]
+    assert times == sorted(set(times))
+    assert times == [START_MS + i * 15 * MINUTE + CLOSE_GRACE_MS for i in range(1, 96)]
+    for timeframe, closes in (('15m', 95), ('1h', 23), ('4h', 5)):
+        # 24 h simulees : le reveil de la cloture de minuit (+ delai de grace) tombe hors de la fenetre
+        woken = [wake_ms for wake_ms, batch in wakeups if ('BTC/USDT', timeframe) in batch]
+        assert len(woken) == closes
+        step = {'15m': 15 * MINUTE, '1h': HOUR, '4h': 4 * HOUR}[timeframe]
+        assert all((wake_ms - CLOSE_GRACE_MS - START_MS) % step == 0 for wake_ms in woken)
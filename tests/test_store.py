@@ -0,0 +1,130 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from conftest import synthetic_rows
+from core import store as store_module
+from core.replay import ReplayExchange
+from core.store import COLUMNS, read_meta, rows_to_columns, write_meta
+from core.timeframes import timeframe_to_ms
+
+SYMBOL = 'BTC/USDT'
+STEP = timeframe_to_ms('1h')
+
+
+def replay(rows, visible):
+    """Replay exchange showing the first `visible` candles, the last of them in progress."""
+    return ReplayExchange({(SYMBOL, '1h'): rows}, now=rows[visible - 1][0] + 1)
+
+
+def test_sync_seeds_then_tops_up_incrementally(store):
+    rows = synthetic_rows(300)
+    exchange = replay(rows, 201)
+
+    df = store.sync(exchange, SYMBOL, '1h', limit=100)
+    assert len(df) == 100
+    assert df.index.as_unit('ms').asi8[-1] == rows[200][0]
+    assert exchange.calls == [(SYMBOL, '1h', None, 100)]
+
+    exchange.advance(10 * STEP)
+    df = store.sync(exchange, SYMBOL, '1h', limit=100)
+    # Une seule requete, a partir de la derniere bougie stockee (celle qui etait en cours)
+    assert exchange.calls[1:] == [(SYMBOL, '1h', rows[200][0], 100)]
+    assert read_meta(store.path('replay', SYMBOL, '1h'))['rows'] == 110
+    assert df.index.as_unit('ms').asi8[-1] == rows[210][0]
+    np.testing.assert_array_equal(df['close'].to_numpy(), [row[4] for row in rows[111:211]])
+
+
+def test_sync_replaces_the_candle_in_progress(store):
+    rows = synthetic_rows(50)
+    exchange = replay(rows, 50)
+    store.sync(exchange, SYMBOL, '1h')
+
+    exchange.candles[(SYMBOL, '1h')][-1][4] = 12345.0
+    df = store.sync(exchange, SYMBOL, '1h')
+    assert len(df) == 50
+    assert df['close'].iloc[-1] == 12345.0
+    assert df['close'].iloc[-2] == rows[-2][4]
+
+
+def test_append_ignores_older_rows_and_deduplicates(store):
+    rows = synthetic_rows(20)
+    assert store.append('replay', SYMBOL, '1h', rows[:10]) == 10
+    assert store.append('replay', SYMBOL, '1h', rows[5:8]) == 0
+    assert store.append('replay', SYMBOL, '1h', rows[9:15] + rows[12:13]) == 5
+    timestamps = store.frame('replay', SYMBOL, '1h').index.as_unit('ms').asi8
+    np.testing.assert_array_equal(timestamps, [row[0] for row in rows[:15]])
+
+
+def test_replace_switches_to_a_new_generation(store):
+    rows = synthetic_rows(30)
+    store.append('replay', SYMBOL, '1h', rows)
+    path = store.path('replay', SYMBOL, '1h')
+
+    columns = rows_to_columns(synthetic_rows(40, seed=1))
+    store.replace('replay', SYMBOL, '1h', columns)
+
+    meta = read_meta(path)
+    assert (meta['rows'], meta['generation']) == (40, 1)
+    assert all(os.path.exists(os.path.join(path, f"{name}.1")) for name in COLUMNS)
+    assert not any(os.path.exists(os.path.join(path, name)) for name in COLUMNS)
+    np.testing.assert_array_equal(store.frame('replay', SYMBOL, '1h')['close'].to_numpy(), columns['close'])
+
+    # Les mises a jour suivantes ecrivent dans la nouvelle generation
+    later = synthetic_rows(41, seed=1)[-1:]
+    assert store.append('replay', SYMBOL, '1h', later) == 1
+    assert read_meta(path)['generation'] == 1
+
+
+def test_write_meta_is_atomic(tmp_path, monkeypatch):
+    path = str(tmp_path)
+    write_meta(path, {'rows': 10, 'generation': 0})
+
+    def interrupted(src, dst):
+        raise OSError("interruption simulee")
+
+    monkeypatch.setattr(os, 'replace', interrupted)
+    with pytest.raises(OSError):
+        write_meta(path, {'rows': 20, 'generation': 0})
+    with open(os.path.join(path, 'meta.json')) as handle:
+        assert json.load(handle) == {'rows': 10, 'generation': 0}
+
+
+def test_interrupted_append_exposes_no_partial_row(store, monkeypatch):
+    rows = synthetic_rows(20)
+    store.append('replay', SYMBOL, '1h', rows[:10])
+
+    def interrupted(path, meta):
+        raise OSError("interruption simulee")
+
+    # Colonnes ecrites, meta.json jamais remplace : les lecteurs voient toujours les 10 lignes validees
+    monkeypatch.setattr(store_module, 'write_meta', interrupted)
+    with pytest.raises(OSError):
+        store.append('replay', SYMBOL, '1h', rows[10:])
+    df = store.frame('replay', SYMBOL, '1h')
+    assert len(df) == 10
+    np.testing.assert_array_equal(df['close'].to_numpy(), [row[4] for row in rows[:10]])
+
+
+def test_views_taken_before_a_sync_keep_their_values(store):
+    rows = synthetic_rows(50)
+    exchange = replay(rows, 50)
+    view = store.sync(exchange, SYMBOL, '1h')
+    closes = view['close'].to_numpy().copy()
+    # Autre lecteur des memes fichiers (processus de calcul) : meme garantie
+    attached = store.attach(store.spec('replay', SYMBOL, '1h'))
+    version = read_meta(store.path('replay', SYMBOL, '1h'))['version']
+
+    exchange.candles[(SYMBOL, '1h')][-1][4] = 12345.0
+    updated = store.sync(exchange, SYMBOL, '1h')
+
+    # La bougie en cours est reecrite sur place dans le fichier, sans toucher aux vues deja distribuees
+    np.testing.assert_array_equal(view['close'].to_numpy(), closes)
+    np.testing.assert_array_equal(attached['close'], closes)
+    assert updated['close'].iloc[-1] == 12345.0
+    assert read_meta(store.path('replay', SYMBOL, '1h'))['version'] == version + 1
+    spec = store.spec('replay', SYMBOL, '1h')
+    assert store.attach(spec)['close'][-1] == 12345.0
+    assert not view['close'].to_numpy().flags.writeable